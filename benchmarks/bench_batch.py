@@ -0,0 +1,145 @@
+"""End-to-end batch downloads against the fake Drive server.
+
+    python -m benchmarks.bench_batch --counts 10 100 1000 10000 --sizes-kb 64 1024
+    python -m benchmarks.bench_batch --latency-ms 50 --bandwidth-mb 10 -o results.jsonl
+
+Runs :class:`~drivecore.batch.BatchDownloader` - what the GUI's
+DownloadWorker and the CLI drive - for every batch size x file size, with
+the server's ``--latency-ms`` added to each request and each connection
+capped at ``--bandwidth-mb``. One JSON object per case:
+
+* ``batch``: wall time, files/s, MB/s, requests and new connections
+  (handshakes) per file, per-file overhead (worker time not explained by
+  the bandwidth cap) and the event rate the UI sees (updates reported vs.
+  batches delivered per second);
+* ``ttfb``: time from calling :meth:`DriveEngine.download` to the first
+  body byte, over a sample of files downloaded one after another.
+
+Lines are appended to ``--output`` if given, so runs before and after a
+change can be compared.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from drivecore import BatchDownloader, DriveEngine, RetryPolicy
+from benchmarks.fake_drive import FakeDrive, expected_bytes
+
+
+def add_files(drive, count, size):
+    """``count`` files of ``size`` bytes; returns ``links_data`` for the batch."""
+    links = []
+    for i in range(1, count + 1):
+        drive_id = f"bench{size}x{i}"
+        drive.add_file(drive_id, f"file{i:05d}.bin", size)
+        links.append((f"https://drive.google.com/file/d/{drive_id}/view", i))
+    return links
+
+
+def verify(out_dir, count, size):
+    """All files present with the right size; the first one byte for byte."""
+    names = [f"file{i:05d}.bin" for i in range(1, count + 1)]
+    if any(not os.path.isfile(os.path.join(out_dir, n)) or os.path.getsize(os.path.join(out_dir, n)) != size
+           for n in names):
+        return False
+    with open(os.path.join(out_dir, names[0]), "rb") as f:
+        return f.read() == expected_bytes(0, size)
+
+
+def run_batch(args, count, size):
+    with FakeDrive(latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mb * 1e6 or None) as drive, \
+            tempfile.TemporaryDirectory() as out_dir:
+        links = add_files(drive, count, size)
+        deliveries = []
+        batch = BatchDownloader(links, out_dir, max_workers=args.workers, drive_url=drive.base_url,
+                                on_events=lambda b: deliveries.append(time.perf_counter()),
+                                retry=RetryPolicy(max_attempts=1))
+        t0 = time.perf_counter()
+        done, total = batch.run()
+        elapsed = time.perf_counter() - t0
+
+        lanes = min(args.workers, count)
+        transfer = count * size / (lanes * args.bandwidth_mb * 1e6) if args.bandwidth_mb else 0.0
+        gaps = [b - a for a, b in zip(deliveries, deliveries[1:])]
+        events = batch.event_stats
+        pool = batch.connection_stats
+        return {
+            "case": "batch", "files": count, "file_bytes": size, "workers": args.workers,
+            "latency_ms": args.latency_ms, "bandwidth_mb": args.bandwidth_mb,
+            "done": done, "total": total, "seconds": round(elapsed, 3),
+            "files_per_s": round(count / elapsed, 1), "mb_per_s": round(count * size / elapsed / 1e6, 2),
+            "requests_per_file": round(drive.stats["requests"] / count, 2),
+            "connections_per_file": round(pool["connections"] / count, 3),
+            "overhead_ms_per_file": round(max(0.0, elapsed - transfer) * lanes / count * 1000, 2),
+            "events_per_s": round(events["events"] / elapsed, 1),
+            "ui_updates_per_s": round(events["flushes"] / elapsed, 1),
+            "max_ui_gap_ms": round(max(gaps) * 1000, 1) if gaps else None,
+            "verified": done == count and verify(out_dir, count, size),
+        }
+
+
+def run_ttfb(args, size):
+    with FakeDrive(latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mb * 1e6 or None) as drive, \
+            tempfile.TemporaryDirectory() as out_dir:
+        engine = DriveEngine(drive_hosts=("127.0.0.1",))
+        samples = []
+        for n in range(args.ttfb_sample):
+            url = drive.add_file(f"ttfb{size}x{n}", f"ttfb{n}.bin", size)
+            first = []
+            t0 = time.perf_counter()
+            path = engine.download(url, out_dir, on_progress=lambda done, total: first or first.append(time.perf_counter()))
+            samples.append((first[0] - t0) * 1000)
+            os.remove(path)
+        samples.sort()
+        return {
+            "case": "ttfb", "file_bytes": size, "files": len(samples), "latency_ms": args.latency_ms,
+            "p50_ms": round(statistics.median(samples), 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            "max_ms": round(samples[-1], 2),
+            "requests_per_file": round(drive.stats["requests"] / len(samples), 2),
+            "connections_per_file": round(engine.pool.stats["connections"] / len(samples), 3),
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000], help="files per batch")
+    ap.add_argument("--sizes-kb", type=int, nargs="+", default=[64, 1024], help="size of every file")
+    ap.add_argument("-j", "--workers", type=int, default=BatchDownloader.DEFAULT_MAX_WORKERS)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="added by the server to every request")
+    ap.add_argument("--bandwidth-mb", type=float, default=0.0,
+                    help="per-connection cap of the fake server in MB/s (0 = unlimited)")
+    ap.add_argument("--max-mb", type=float, default=2048.0, help="skip cases downloading more than this")
+    ap.add_argument("--ttfb-sample", type=int, default=20, help="files per ttfb case (0 = skip)")
+    ap.add_argument("-o", "--output", help="append results to this JSON-lines file too")
+    args = ap.parse_args()
+
+    out = open(args.output, "a", encoding="utf-8") if args.output else None
+
+    def emit(row):
+        line = json.dumps(row)
+        print(line, flush=True)
+        if out:
+            out.write(line + "\n")
+            out.flush()
+
+    try:
+        for size in (kb * 1024 for kb in args.sizes_kb):
+            if args.ttfb_sample > 0:
+                emit(run_ttfb(args, size))
+            for count in args.counts:
+                if count * size > args.max_mb * 1024 * 1024:
+                    print(f"skipping {count} x {size} bytes (over --max-mb)", file=sys.stderr)
+                    continue
+                emit(run_batch(args, count, size))
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
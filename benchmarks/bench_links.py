@@ -0,0 +1,72 @@
+"""Bulk link import: pasted text, a link file on disk and direct-URL rewriting.
+
+    python -m benchmarks.bench_links --count 100000
+
+The input mixes the shapes people actually paste - share links, ``open?id=``,
+``uc?export=download``, folder links, HTML anchors with ``&amp;`` and CSV
+rows - with a share of duplicates. Prints one JSON object per case.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from drivecore.links import extract_links, read_link_file, to_direct_url
+
+_SHAPES = (
+    "https://drive.google.com/file/d/{}/view?usp=sharing",
+    "https://drive.google.com/open?id={}",
+    "https://drive.google.com/uc?export=download&id={}",
+    '<a href="https://drive.google.com/uc?export=download&amp;id={}">file</a>',
+    "report.pdf,https://drive.google.com/file/d/{}/view,12 MB",
+    "https://drive.google.com/drive/folders/{}?usp=sharing",
+)
+
+
+def make_lines(count, duplicates, seed=1):
+    rng = random.Random(seed)
+    ids = ["1" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-")
+                         for _ in range(32)) for _ in range(count)]
+    lines = [_SHAPES[i % len(_SHAPES)].format(drive_id) for i, drive_id in enumerate(ids)]
+    lines += rng.sample(lines, int(count * duplicates))
+    rng.shuffle(lines)
+    return lines
+
+
+def timed(case, fn, lines):
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    return result, {"case": case, "lines": lines, "seconds": round(elapsed, 4),
+                    "lines_per_s": round(lines / elapsed) if elapsed else None}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--count", type=int, default=100000, help="distinct links")
+    ap.add_argument("--duplicates", type=float, default=0.1, help="extra share of repeated links")
+    args = ap.parse_args()
+
+    lines = make_lines(args.count, args.duplicates)
+    text = "\n".join(lines)
+
+    links, row = timed("paste", lambda: extract_links(text), len(lines))
+    row["links"] = len(links)
+    print(json.dumps(row), flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "links.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        from_file, row = timed("file", lambda: read_link_file(path), len(lines))
+        row["links"] = len(from_file)
+        print(json.dumps(row), flush=True)
+
+    _, row = timed("to_direct_url", lambda: [to_direct_url(link) for link in links], len(links))
+    print(json.dumps(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Placing many files with clashing names in one folder, without the network.
+
+    python -m benchmarks.bench_names --files 10000 --distinct 10 --existing 1000
+
+``--files`` files share ``--distinct`` names and go into one folder that
+already holds ``--existing`` of them. Two ways of picking a free name:
+
+* ``probe``: ask the disk - ``os.path.exists`` on ``name``, then
+  ``name (1)``, ``name (2)``... until one is free, as a downloader does
+  when it has no memory of the folder;
+* ``index``: :class:`~drivecore.naming.NameIndex`, which lists the folder
+  once and answers from memory.
+
+Every chosen name is created as an empty file, as the download would.
+One JSON object per case: seconds, files/s, stat calls and folder scans.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from drivecore.naming import CONFLICT_SUFFIX, NameIndex
+
+
+def names(files, distinct):
+    return [f"file{i % distinct:03d}.bin" for i in range(files)]
+
+
+def populate(folder, wanted):
+    for name in wanted:
+        path = os.path.join(folder, name)
+        n = 0
+        while os.path.exists(path):
+            n += 1
+            stem, ext = os.path.splitext(name)
+            path = os.path.join(folder, f"{stem} ({n}){ext}")
+        open(path, "wb").close()
+
+
+def run_probe(folder, wanted):
+    stats = 0
+    for name in wanted:
+        stem, ext = os.path.splitext(name)
+        candidate, n = name, 0
+        while True:
+            stats += 1
+            if not os.path.exists(os.path.join(folder, candidate)):
+                break
+            n += 1
+            candidate = f"{stem} ({n}){ext}"
+        open(os.path.join(folder, candidate), "wb").close()
+    return {"stats": stats, "scans": 0}
+
+
+def run_index(folder, wanted):
+    index = NameIndex(folder, CONFLICT_SUFFIX)
+    for i, name in enumerate(wanted):
+        path = index.claim(name, owner=i)
+        open(os.path.join(folder, path), "wb").close()
+    return {"stats": 0, "scans": index.stats["scans"]}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, default=10000, help="files to place")
+    ap.add_argument("--distinct", type=int, default=10, help="different names among them")
+    ap.add_argument("--existing", type=int, default=1000, help="files already in the folder")
+    ap.add_argument("--dir", help="where to create the test folders (default: system temp)")
+    args = ap.parse_args()
+
+    wanted = names(args.files, args.distinct)
+    for case, fn in (("probe", run_probe), ("index", run_index)):
+        with tempfile.TemporaryDirectory(dir=args.dir) as folder:
+            populate(folder, names(args.existing, args.distinct))
+            t0 = time.perf_counter()
+            counts = fn(folder, wanted)
+            elapsed = time.perf_counter() - t0
+            placed = len(os.listdir(folder)) - args.existing
+            print(json.dumps({"case": case, "files": args.files, "distinct": args.distinct,
+                              "existing": args.existing, "placed": placed, "seconds": round(elapsed, 4),
+                              "files_per_s": round(args.files / elapsed) if elapsed else None, **counts}),
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
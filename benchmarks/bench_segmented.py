@@ -0,0 +1,55 @@
+"""Single stream vs. segmented download of one large file.
+
+    python -m benchmarks.bench_segmented --size-mb 256 --bandwidth-mb 20
+
+The fake server caps every connection at ``--bandwidth-mb`` MB/s, so the
+segmented run should approach ``segments`` times the single-stream speed.
+Prints one JSON object per run.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from drivecore import DriveEngine
+from benchmarks.fake_drive import FakeDrive, expected_bytes
+
+
+def run(drive, url, out_dir, segments):
+    engine = DriveEngine(segments=segments, segment_min_size=1024 * 1024,
+                         drive_hosts=("127.0.0.1",))
+    t0 = time.perf_counter()
+    path = engine.download(url, out_dir)
+    elapsed = time.perf_counter() - t0
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(1024 * 1024)
+        f.seek(max(0, size - 1024 * 1024))
+        tail = f.read()
+    ok = (head == expected_bytes(0, len(head))
+          and tail == expected_bytes(size - len(tail), len(tail)))
+    os.remove(path)
+    return {"segments": segments, "bytes": size, "seconds": round(elapsed, 3),
+            "mb_per_s": round(size / elapsed / 1e6, 2), "verified": ok}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size-mb", type=int, default=256)
+    ap.add_argument("--bandwidth-mb", type=float, default=20.0,
+                    help="per-connection cap of the fake server (0 = unlimited)")
+    ap.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--no-ranges", action="store_true", help="server ignores Range")
+    args = ap.parse_args()
+
+    bandwidth = args.bandwidth_mb * 1e6 if args.bandwidth_mb else None
+    with FakeDrive(bandwidth=bandwidth, ranges=not args.no_ranges) as drive, \
+            tempfile.TemporaryDirectory() as out_dir:
+        url = drive.add_file("bigfile", "archive.bin", args.size_mb * 1024 * 1024)
+        for segments in args.segments:
+            print(json.dumps(run(drive, url, out_dir, segments)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Ways of writing a downloaded file to a local disk, without the network.
+
+    python -m benchmarks.bench_write --size-mb 512 --dir /mnt/hdd/tmp
+    python -m benchmarks.bench_write --chunks-kb 64 1024 4096 --fsync never journal
+
+Feeds ``--read-kb`` chunks (what one socket read returns) from
+``--segments`` threads, each owning one contiguous range of the file as
+in a segmented download, or from a single thread with ``--segments 1``:
+
+* ``direct``: what the engine did before the writer stage - a sparse file
+  of the right length and one buffered ``write`` per chunk from each
+  thread;
+* ``writer``: :class:`~drivecore.writer.FileWriter` for every
+  ``--chunks-kb`` write size, with and without ``posix_fallocate``.
+
+Resume checkpoints are taken every ``JOURNAL_EVERY`` bytes per segment
+like the engine does, so the ``--fsync`` policies cost what they would
+in a real download. One JSON object per case: MB/s, write syscalls,
+readers that had to wait for the disk and, where ``filefrag`` exists,
+the number of extents the file ended up in. Point ``--dir`` at the disk
+you care about (a HDD or a network share shows the difference most).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from drivecore.engine import CHUNK_SIZE, JOURNAL_EVERY
+from drivecore.writer import FSYNC_CLOSE, FSYNC_JOURNAL, FSYNC_NEVER, FSYNC_POLICIES, FileWriter
+
+
+def ranges(size, segments):
+    step = size // segments
+    return [(i * step, size if i == segments - 1 else (i + 1) * step) for i in range(segments)]
+
+
+def produce(source, start, stop, read_size, write, checkpoint):
+    """Hand ``[start, stop)`` to ``write`` in socket-sized chunks, checkpointing like the engine."""
+    committed = pos = start
+    while pos < stop:
+        n = min(read_size, stop - pos)
+        offset = pos % (len(source) - read_size)
+        write(source[offset:offset + n])   # bytes mới mỗi lần, như dữ liệu vừa đọc từ socket
+        pos += n
+        if pos - committed >= JOURNAL_EVERY:
+            checkpoint()
+            committed = pos
+    checkpoint()
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=t) for t in targets]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def write_direct(path, size, segments, read_size, fsync, source):
+    with open(path, "wb") as f:
+        f.truncate(size)
+    counts = []
+
+    def segment(start, stop):
+        with open(path, "r+b") as f:
+            f.seek(start)
+            writes = [0]
+
+            def write(chunk):
+                f.write(chunk)
+                writes[0] += 1
+
+            def checkpoint():
+                f.flush()
+                if fsync == FSYNC_JOURNAL:
+                    os.fsync(f.fileno())
+
+            produce(source, start, stop, read_size, write, checkpoint)
+            counts.append(writes[0])
+
+    run_threads([lambda r=r: segment(*r) for r in ranges(size, segments)])
+    if fsync != FSYNC_NEVER:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return {"writes": sum(counts), "waits": 0, "preallocate": False}
+
+
+def write_writer(path, size, segments, read_size, fsync, source, chunk, allocate):
+    writer = FileWriter(path, size, chunk_size=chunk, fsync=fsync, allocate=allocate)
+
+    def segment(start, stop):
+        stream = writer.stream(start)
+
+        def checkpoint():
+            stream.flush()
+            writer.sync()
+
+        produce(source, start, stop, read_size, stream.write, checkpoint)
+
+    try:
+        run_threads([lambda r=r: segment(*r) for r in ranges(size, segments)])
+    finally:
+        writer.close()
+    return {"writes": writer.stats["writes"], "waits": writer.stats["waits"], "preallocate": writer.preallocated}
+
+
+def extents(path):
+    if not shutil.which("filefrag"):
+        return None
+    try:
+        out = subprocess.run(["filefrag", "-s", path], capture_output=True, text=True, timeout=60).stdout
+        return int(out.rsplit(":", 1)[1].split()[0])
+    except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size-mb", type=int, default=512)
+    ap.add_argument("--segments", type=int, default=4, help="threads writing their own range (1 = sequential)")
+    ap.add_argument("--read-kb", type=int, default=CHUNK_SIZE // 1024, help="bytes handed over per socket read")
+    ap.add_argument("--chunks-kb", type=int, nargs="+", default=[64, 1024, 4096], help="FileWriter write sizes")
+    ap.add_argument("--fsync", choices=FSYNC_POLICIES, nargs="+", default=[FSYNC_NEVER, FSYNC_CLOSE])
+    ap.add_argument("--dir", help="where the test file is written (default: a temporary directory)")
+    args = ap.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    read_size = args.read_kb * 1024
+    source = os.urandom(8 * 1024 * 1024 + read_size)
+    cases = [("direct", None, False)]
+    for kb in args.chunks_kb:
+        cases += [("writer", kb * 1024, True), ("writer", kb * 1024, False)]
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, "bench.part")
+        for fsync in args.fsync:
+            for strategy, chunk, allocate in cases:
+                t0 = time.perf_counter()
+                if strategy == "direct":
+                    row = write_direct(path, size, args.segments, read_size, fsync, source)
+                else:
+                    row = write_writer(path, size, args.segments, read_size, fsync, source, chunk, allocate)
+                elapsed = time.perf_counter() - t0
+                row.update({
+                    "strategy": strategy, "write_kb": chunk // 1024 if chunk else args.read_kb,
+                    "fsync": fsync, "segments": args.segments,
+                    "bytes": size, "seconds": round(elapsed, 3), "mb_per_s": round(size / elapsed / 1e6, 1),
+                    "extents": extents(path), "file_ok": os.path.getsize(path) == size,
+                })
+                print(json.dumps(row), flush=True)
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
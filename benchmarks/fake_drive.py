@@ -0,0 +1,315 @@
+"""Local HTTP server that imitates Google Drive's download endpoints.
+
+``/uc?id=<id>&export=download`` redirects straight to the file for small
+files and answers with the virus-scan warning page (a ``download-form``
+pointing at ``/download``) for large ones, like Drive does. ``/download``
+serves the body with ``Accept-Ranges``/``Content-Range`` support.
+
+``/embeddedfolderview?id=<id>`` lists a folder added with
+:meth:`FakeDrive.add_folder` in the same HTML shape as Drive's.
+:meth:`FakeDrive.fail` makes the landing page answer with Drive's quota
+page, a 503 or a 403 for the next few requests of a file, or makes
+``/download`` send a corrupted body or an HTML page in place of the file.
+With ``checksums=True`` file responses carry ``X-Goog-Hash: md5=...``.
+
+File contents are generated from the offset (``byte = offset % 251``), so
+multi-GB files need no disk space and can be verified with
+:func:`expected_bytes`.
+"""
+import base64
+import hashlib
+import html
+import http.server
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+CONFIRM_OVER = 100 * 1024 * 1024   # Drive shows the scan warning above ~100 MB
+_PATTERN = bytes(i % 251 for i in range(251 * 1024))
+_RE_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+_QUOTA_PAGE = ("<html><head><title>Google Drive - Quota exceeded</title></head><body>"
+               '<p class="uc-error-caption">Sorry, you can\'t view or download this file at this time.</p>'
+               '<p class="uc-error-subcaption">Too many users have viewed or downloaded this file recently. '
+               "Please try accessing the file again later.</p></body></html>")
+_BODY_FAILURES = ("corrupt", "html")   # taken by /download rather than /uc
+
+
+def expected_bytes(offset, length):
+    """The content of any fake file between ``offset`` and ``offset + length``."""
+    out = bytearray()
+    while length > 0:
+        start = offset % 251
+        piece = _PATTERN[start:start + min(length, len(_PATTERN) - start)]
+        out += piece
+        offset += len(piece)
+        length -= len(piece)
+    return bytes(out)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeDrive/1.0"
+    disable_nagle_algorithm = True   # header và body gửi riêng: tránh chờ delayed ACK trên kết nối keep-alive
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_page(self, status, body, headers=()):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        drive = self.server.drive
+        drive._count("requests")
+        if drive.latency:
+            time.sleep(drive.latency)
+        parts = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        if parts.path == "/embeddedfolderview" and query.get("id") in drive.folders:
+            self._folder(query["id"])
+            return
+        entry = drive.files.get(query.get("id", ""))
+        failure = drive._take_failure(query["id"], parts.path) if entry else None
+
+        if entry is None:
+            self._send_page(404, "<html><title>Google Drive - Page Not Found</title>"
+                                 '<p class="uc-error-subcaption">Sorry, the file you have requested '
+                                 "does not exist.</p></html>")
+        elif failure == "html":
+            self._send_page(200, _QUOTA_PAGE, [("Content-Disposition", f'attachment; filename="{entry["name"]}"')])
+        elif failure and failure != "corrupt":
+            self._failure(failure)
+        elif parts.path == "/uc":
+            self._landing(query, entry)
+        elif parts.path == "/download":
+            self._file(query, entry, corrupt=failure == "corrupt")
+        else:
+            self._send_page(404, "<html><title>Not Found</title></html>")
+
+    def _folder(self, folder_id):
+        drive = self.server.drive
+        folder = drive.folders[folder_id]
+        entries = []
+        for child in folder["children"]:
+            if child in drive.folders:
+                href, name = f"{drive.base_url}/drive/folders/{child}", drive.folders[child]["name"]
+            else:
+                href, name = f"{drive.base_url}/file/d/{child}/view?usp=drive_web", drive.files[child]["name"]
+            entries.append(
+                f'<div class="flip-entry" id="entry-{child}" tabindex="0" role="link">'
+                f'<div class="flip-entry-info"><a href="{href}" target="_blank">'
+                '<div class="flip-entry-visual"></div>'
+                f'<div class="flip-entry-title">{html.escape(name)}</div></a></div></div>')
+        page = (f"<html><head><title>{html.escape(folder['name'])}</title></head><body>"
+                f'<div class="flip-entries">{"".join(entries)}</div></body></html>')
+        self._send_page(200, page)
+
+    def _failure(self, kind):
+        if kind == "quota":
+            self._send_page(200, _QUOTA_PAGE)
+        elif kind == "denied":
+            self._send_page(403, "<html><title>Google Drive - Access denied</title>"
+                                 '<p class="uc-error-subcaption">You need access</p></html>')
+        else:
+            self._send_page(503, "<html><title>Service Unavailable</title></html>")
+
+    def _landing(self, query, entry):
+        drive = self.server.drive
+        fid = query["id"]
+        if entry["size"] <= drive.confirm_over or query.get("confirm"):
+            target = f"/download?id={fid}&export=download&confirm=t"
+            self.send_response(303)
+            self.send_header("Location", target)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        page = (
+            "<html><head><title>Google Drive - Virus scan warning</title></head><body>"
+            "<p>Google Drive can't scan this file for viruses.</p>"
+            f'<form id="download-form" action="{drive.base_url}/download" method="get">'
+            '<input type="submit" value="Download anyway"/>'
+            f'<input type="hidden" name="id" value="{html.escape(fid)}">'
+            '<input type="hidden" name="export" value="download">'
+            '<input type="hidden" name="confirm" value="t">'
+            '<input type="hidden" name="uuid" value="00000000-fake-uuid">'
+            "</form></body></html>"
+        )
+        self._send_page(200, page)
+
+    def _file(self, query, entry, corrupt=False):
+        drive = self.server.drive
+        size = entry["size"]
+        if size > drive.confirm_over and query.get("confirm") != "t":
+            self._send_page(403, "<html><title>Google Drive - Access denied</title></html>")
+            return
+
+        start, end, status = 0, size - 1, 200
+        m = _RE_RANGE.match(self.headers.get("Range", "")) if drive.ranges else None
+        if m and (m.group(1) or m.group(2)):
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+            else:
+                start = max(0, size - int(m.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Disposition", f'attachment; filename="{entry["name"]}"')
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", f'"{query["id"]}-{size}"')
+        if drive.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if drive.checksums:
+            self.send_header("X-Goog-Hash", f"crc32c=AAAAAA==,md5={drive.md5_b64(query['id'])}")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        offset, chunk = start, 64 * 1024
+        t0 = time.perf_counter()
+        sent = 0
+        try:
+            while offset <= end:
+                n = min(chunk, end - offset + 1)
+                data = expected_bytes(offset, n)
+                if corrupt:
+                    data, corrupt = bytes([data[0] ^ 0xFF]) + data[1:], False
+                self.wfile.write(data)
+                offset += n
+                sent += n
+                if drive.bandwidth:
+                    # per-connection cap, like a single TCP stream to Drive
+                    ahead = sent / drive.bandwidth - (time.perf_counter() - t0)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        drive._count("bytes_sent", sent)
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024   # mặc định là 5: cả trăm kết nối mới cùng lúc sẽ phải chờ SYN gửi lại (~1 s)
+
+    def handle_error(self, request, client_address):
+        # client bỏ ngang body (probe, pause, hủy) là chuyện bình thường
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeDrive:
+    """A threaded fake Drive server; use as a context manager.
+
+    ``latency`` is added to every request (seconds), ``bandwidth`` caps each
+    connection (bytes/s, None = unlimited) and ``ranges=False`` makes the
+    server ignore Range headers. ``checksums=True`` adds Drive's
+    ``X-Goog-Hash`` MD5 to file responses.
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, ranges=True, confirm_over=CONFIRM_OVER,
+                 checksums=False):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.ranges = ranges
+        self.checksums = checksums
+        self.confirm_over = confirm_over
+        self.files = {}
+        self.folders = {}
+        self.failures = {}              # file_id -> [kind, remaining]
+        self.stats = {"requests": 0, "bytes_sent": 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def add_file(self, file_id, name, size):
+        self.files[file_id] = {"name": name, "size": size}
+        return self.url_for(file_id)
+
+    def fail(self, file_id, kind="server", times=1):
+        """Answer the next ``times`` requests for ``file_id`` with an error.
+
+        ``kind`` is ``"quota"`` (Drive's "Too many users" page), ``"server"``
+        (HTTP 503) or ``"denied"`` (HTTP 403) on the landing page, or
+        ``"corrupt"`` (first byte of the body flipped) or ``"html"`` (the
+        quota page served as the file) on ``/download``.
+        """
+        with self._lock:
+            self.failures[file_id] = [kind, times]
+
+    def _take_failure(self, file_id, path):
+        with self._lock:
+            pending = self.failures.get(file_id)
+            if not pending or pending[1] <= 0:
+                return None
+            if (pending[0] in _BODY_FAILURES) != (path == "/download"):
+                return None
+            pending[1] -= 1
+            return pending[0]
+
+    def md5_b64(self, file_id):
+        """Base64 MD5 of a file's content (computed once, then cached)."""
+        entry = self.files[file_id]
+        if "md5" not in entry:
+            h, offset, size = hashlib.md5(), 0, entry["size"]
+            while offset < size:
+                n = min(len(_PATTERN), size - offset)
+                h.update(expected_bytes(offset, n))
+                offset += n
+            entry["md5"] = base64.b64encode(h.digest()).decode("ascii")
+        return entry["md5"]
+
+    def add_folder(self, folder_id, name, children=()):
+        """Add a folder listing ``children`` (ids of files or other folders)."""
+        self.folders[folder_id] = {"name": name, "children": list(children)}
+        return f"{self.base_url}/drive/folders/{folder_id}"
+
+    @property
+    def folder_list_url(self):
+        """``list_url`` for :func:`drivecore.iter_folder` pointing at this server."""
+        return self.base_url + "/embeddedfolderview?id={}"
+
+    def url_for(self, file_id):
+        return f"{self.base_url}/uc?id={file_id}&export=download"
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.drive = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
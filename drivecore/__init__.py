@@ -0,0 +1,67 @@
+"""Download core shared by the GUI (and anything else that needs it).
+
+Nothing in this package imports PyQt6.
+"""
+from .pool import ConnectionPool
+from .writer import FileWriter
+from .engine import DriveEngine, DownloadError, DownloadCancelled, format_rate, format_size
+from .journal import PartJournal
+from .control import TransferControl
+from .ratelimit import BandwidthLimiter, RateSchedule, TokenBucket
+from .metacache import MetadataCache
+from .links import extract_file_id, extract_folder_id, extract_links, link_key, read_link_file, to_direct_url
+from .preflight import ProbeResult, probe_all
+from .index import DownloadIndex
+from .naming import NameIndex, check_template, render_path
+from .folders import FolderEntry, iter_folder
+from .jobs import Job, JobQueue, JobStore
+from .events import EventBatch, EventBus
+from .metrics import TransferMetrics, format_eta
+from .logs import FileLog, LogRing, level_rank
+from .queuedb import QueueDB
+from .retry import RetryPolicy, classify
+from .batch import BatchDownloader
+
+__all__ = [
+    "BandwidthLimiter",
+    "BatchDownloader",
+    "ConnectionPool",
+    "DownloadCancelled",
+    "DownloadError",
+    "DownloadIndex",
+    "DriveEngine",
+    "EventBatch",
+    "EventBus",
+    "FileLog",
+    "FileWriter",
+    "FolderEntry",
+    "Job",
+    "JobQueue",
+    "JobStore",
+    "LogRing",
+    "MetadataCache",
+    "NameIndex",
+    "PartJournal",
+    "ProbeResult",
+    "QueueDB",
+    "RateSchedule",
+    "RetryPolicy",
+    "TokenBucket",
+    "TransferMetrics",
+    "TransferControl",
+    "check_template",
+    "classify",
+    "extract_file_id",
+    "extract_folder_id",
+    "extract_links",
+    "format_eta",
+    "format_rate",
+    "format_size",
+    "iter_folder",
+    "level_rank",
+    "link_key",
+    "probe_all",
+    "read_link_file",
+    "render_path",
+    "to_direct_url",
+]
@@ -0,0 +1,738 @@
+"""Batch download scheduler shared by the GUI and the command line.
+
+:class:`BatchDownloader` owns everything about a run that is not UI:
+pre-flight probing, the destination index, folder expansion, the worker
+pool, pause/stop and the in-process or gdown-subprocess transfers. Front
+ends only feed it links and render the event batches it produces.
+"""
+import collections
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import urllib.parse
+
+from .control import TransferControl
+from .engine import DRIVE_HOSTS, HASHES, DownloadCancelled, DownloadError, DriveEngine, format_rate, format_size, looks_like_html
+from .events import FLUSH_INTERVAL, EventBus
+from .folders import FOLDER_LIST_URL, iter_folder
+from .index import DownloadIndex
+from .jobs import POLICY_FIFO, STATUS_STOPPED, JobQueue
+from .links import DRIVE_URL, FILE_URL, drive_base_url, extract_file_id, extract_folder_id, to_direct_url
+from .metrics import TransferMetrics, format_eta
+from .naming import CONFLICT_SUFFIX, DEFAULT_TEMPLATE, NameIndex, render_path
+from .preflight import probe_all
+from .retry import LABELS, RetryPolicy, classify
+from .writer import FSYNC_NEVER, WRITE_CHUNK
+
+# thanh tiến độ của gdown/tqdm: "37%|█████▎    | 1.26M/3.40M [00:12<00:18, 4.10MB/s]"
+_RE_TQDM_BYTES = re.compile(r"\|\s*([0-9.]+)([kMGTP]?)B?/([0-9.]+)([kMGTP]?)B?\s*\[")
+_SI = {"": 1, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15}
+
+
+def _tqdm_bytes(line):
+    """``(done, total)`` bytes from a tqdm progress line, or None."""
+    m = _RE_TQDM_BYTES.search(line)
+    if not m:
+        return None
+    return int(float(m.group(1)) * _SI[m.group(2)]), int(float(m.group(3)) * _SI[m.group(4)])
+
+
+class BatchDownloader:
+    """Downloads a batch of links with a pool of worker threads.
+
+    ``links_data`` is ``[(link, job_id)]``. Progress is reported as
+    :class:`~drivecore.events.EventBatch` objects passed to ``on_events``
+    (status/size/speed/ETA per job id, byte-accurate batch %, speed and
+    ETA, ``Total: n/m`` and log lines), at most once per
+    ``flush_interval``; speeds are smoothed over every file in flight
+    (:mod:`drivecore.metrics`). :meth:`run`
+    blocks until the batch is over; the other public methods may be
+    called from any thread while it runs.
+
+    Failures are classified (:mod:`drivecore.retry`); quota, network and
+    integrity errors are put back at the end of the queue after a backoff
+    given by ``retry`` while the other workers carry on with the rest.
+    Native downloads compute the ``hashes`` digests on the fly and store
+    them in the destination index. ``drive_url`` (default
+    ``$HISHIRO_DRIVE_URL``) sends every Drive request to another server,
+    such as :mod:`benchmarks.fake_drive`.
+
+    Which job a free worker takes next follows ``policy`` (see
+    :data:`drivecore.jobs.POLICIES`, sizes come from the pre-flight probe)
+    after ``priorities`` (``{job_id: priority}``, higher first); both can
+    be changed while the batch runs. ``write_chunk`` and ``fsync`` are
+    handed to the engine's writer (:mod:`drivecore.writer`).
+
+    Each file is saved under ``template`` (or the job's own entry in
+    ``templates``, ``{job_id: template}``) below ``save_path``; names
+    already in the destination follow ``conflict`` (see
+    :mod:`drivecore.naming`).
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+    ENGINE_NATIVE = "native"          # tải trong tiến trình (drivecore.DriveEngine)
+    ENGINE_SUBPROCESS = "subprocess"  # fallback: mỗi link một "python -m gdown"
+
+    def __init__(self, links_data, save_path, max_workers=DEFAULT_MAX_WORKERS, engine=ENGINE_NATIVE,
+                 limiter=None, meta_cache=None, on_events=None, flush_interval=FLUSH_INTERVAL, retry=None,
+                 hashes=HASHES, drive_url=None, policy=POLICY_FIFO, priorities=None, write_chunk=WRITE_CHUNK,
+                 fsync=FSYNC_NEVER, template=DEFAULT_TEMPLATE, templates=None, conflict=CONFLICT_SUFFIX):
+        self.links_data = links_data          # [(link, job_id)]
+        self.save_path = save_path
+        self.max_workers = max(1, int(max_workers))
+        self.engine = engine
+        self.limiter = limiter                # BandwidthLimiter dùng chung, chỉnh được khi đang tải
+        self.meta_cache = meta_cache          # MetadataCache: bỏ qua trang confirm khi tải lại/retry
+        self.retry = retry or RetryPolicy()   # số lần thử + backoff cho lỗi quota/mạng
+        self.drive_url = drive_base_url(drive_url)
+        drive_hosts = DRIVE_HOSTS
+        if self.drive_url != DRIVE_URL:
+            drive_hosts += (urllib.parse.urlsplit(self.drive_url).hostname,)
+        self._engine = DriveEngine(limiter=limiter, meta_cache=meta_cache, hashes=hashes, drive_hosts=drive_hosts,
+                                   write_chunk=write_chunk, fsync=fsync)
+        self._control = TransferControl()     # pause/stop dùng chung cho mọi luồng + segment
+        self._events = EventBus(on_events or (lambda batch: None), flush_interval,  # gom event, tối đa ~10 lần/giây
+                                on_tick=self._tick)
+        self._lock = threading.Lock()         # bảo vệ _done, _active, _active_procs, _tries, _folders
+        self._done = 0
+        self._started = 0
+        self._active = 0
+        self._active_procs = set()
+        self._tries = {}                      # (job_id, url) -> số lần đã thử và thất bại
+        self._jobs = JobQueue(policy)         # (job_id, job); nhận thêm/bớt/đổi thứ tự khi đang chạy
+        for job_id, priority in (priorities or {}).items():
+            self._jobs.set_priority([job_id], priority)
+        # byte-accurate batch progress, tốc độ + ETA (size điền bởi bước pre-flight)
+        self._sizes = {}                      # job_id -> size (bytes) nếu biết
+        self._metrics = TransferMetrics()     # byte theo từng file (key = (job_id, url)), gộp theo job/batch
+        self._shown = {}                      # giá trị _tick gửi lần trước, chỉ gửi lại khi đổi
+        self._settle = False                  # batch đã xong: xoá tốc độ của mọi dòng ngay
+        self._skipped = set()                 # job_id của file đã có sẵn
+        self._total = len(links_data)         # tăng dần khi folder được liệt kê / thêm link
+        self._folders = {}                    # job_id của link folder -> {"listed", "done", "failed", "listing"}
+        self._ready = threading.Event()       # index đã mở, nhận link thêm vào giữa chừng được
+        self._order = None                    # thứ tự job_id gần nhất của bảng (sau khi user kéo lên/xuống)
+        self.index = None                     # DownloadIndex của save_path, mở khi run()
+        self.template = template or DEFAULT_TEMPLATE
+        self._templates = dict(templates or {})  # job_id -> template riêng của dòng đó
+        self._names = {}                      # job_id -> tên file biết từ pre-flight
+        self.conflict = conflict
+        self.names = None                     # NameIndex của save_path (tên đã có/đã giao), mở khi run()
+
+    # --- helpers ---
+    def _to_direct(self, url: str) -> str:
+        return to_direct_url(url, self.drive_url)
+
+    def _run_gdown(self, direct_url: str, output: str):
+        # -O <folder/> => gdown tự đặt tên file; -O <file> => đúng path đã chọn
+        cmd = [sys.executable, "-m", "gdown", direct_url, "-O", output, "--fuzzy"]
+        # gdown chỉ nhận giới hạn cố định lúc khởi chạy => dùng mức per-file hiện tại
+        if self.limiter and self.limiter.per_file_rate:
+            cmd += ["--speed", f"{int(self.limiter.per_file_rate)}B"]   # gdown đòi đơn vị: <n>(B|KB|MB|GB)
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1, encoding="utf-8", errors="replace"
+        )
+        return proc
+
+    def _tick(self):
+        # chạy trong luồng EventBus trước mỗi lần flush: %, tốc độ, ETA tính từ byte của mọi file
+        snap = self._metrics.sample(settle=self._settle)
+        idle = self._control.paused or not snap.active
+        shown = self._shown
+        for name, value, emit in (
+                ("progress", min(100, snap.done * 100 // snap.total) if snap.total else 0, self._events.progress),
+                ("speed", "—" if idle else format_rate(snap.speed), self._events.speed),
+                ("eta", "—" if idle else format_eta(snap.eta), self._events.eta)):
+            if shown.get(name) != value:
+                shown[name] = value
+                emit(value)
+        for job_id, rate in snap.jobs.items():
+            text = ("", "") if rate is None or self._control.paused else (format_rate(rate[0]), format_eta(rate[1]))
+            if shown.get(job_id) != text:
+                shown[job_id] = text
+                self._events.rate(job_id, *text)
+            if rate is None:
+                del shown[job_id]
+
+    def _emit_total(self):
+        with self._lock:
+            done, total = self._done, self._total
+        self._events.total(f"Total: {done}/{total}")
+
+    def _count_done(self):
+        with self._lock:
+            self._done += 1
+        self._emit_total()
+
+    def _mark_skipped(self, job_id, entry):
+        # file đã có trong thư mục đích (theo index) => không tải lại, và không file nào khác được ghi đè lên nó
+        self._skipped.add(job_id)
+        self.names.reserve(entry["path"].replace(os.sep, "/"))
+        self._events.status(job_id, "Already downloaded", os.path.basename(entry["path"]))
+        self._events.size(job_id, format_size(entry.get("size")))
+        self._count_done()
+
+    def _relpath(self, job_id, url, name, subdir=""):
+        # path (tương đối, "/") của file theo template của job
+        return render_path(self._templates.get(job_id, self.template), name,
+                           file_id=extract_file_id(url) or "", folder=subdir, job=job_id)
+
+    def _place(self, key, name, subdir=""):
+        # path tuyệt đối để lưu file, None nếu tên đã có và policy là skip
+        rel = self.names.claim(self._relpath(key[0], key[1], name, subdir), owner=key)
+        if rel is None:
+            return None
+        path = os.path.join(self.save_path, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _on_probed(self, url, job_id, result):
+        if result.ok:
+            file_id = extract_file_id(url)
+            if result.filename:
+                self._names[job_id] = result.filename
+            entry = (self.index.adopt(file_id, self._relpath(job_id, url, result.filename), result.size)
+                     if file_id and result.filename else None)
+            if entry:
+                self._mark_skipped(job_id, entry)
+                return
+            if result.size is not None:
+                self._sizes[job_id] = result.size
+            self._events.status(job_id, "Queued", result.filename or "N/A")
+            self._events.size(job_id, format_size(result.size))
+        elif result.transient:
+            # quota/mạng lúc kiểm tra: vẫn xếp hàng, lần tải thật sẽ được retry
+            self._events.status(job_id, "Queued", "N/A")
+            self._events.log(f"Could not check {url} ({result.error}); it will be tried anyway.", "WARNING")
+        else:
+            self._events.status(job_id, "Unavailable", LABELS.get(result.kind, "Error"))
+            self._events.log(f"Link unavailable: {url} ({result.error})", "WARNING")
+
+    def _preflight(self, entries):
+        # 1) bỏ qua file đã tải (index trong thư mục đích, không cần mạng)
+        to_probe, folders = [], []
+        skipped = len(self._skipped)
+        for url, job_id in entries:
+            if extract_folder_id(url):
+                folders.append((url, job_id))   # liệt kê sau, song song với lúc tải
+                continue
+            file_id = extract_file_id(url)
+            entry = self.index.lookup(file_id) if file_id else None
+            if entry:
+                self._mark_skipped(job_id, entry)
+            else:
+                to_probe.append((url, job_id))
+
+        # 2) probe song song các link còn lại: tên file, size, link chết
+        self._events.log(f"Checking {len(to_probe)} links...", "INFO")
+        directs = [self._to_direct(url) for url, _ in to_probe]
+        results = probe_all(self._engine, directs, control=self._control,
+                            on_result=lambda j, res: self._on_probed(*to_probe[j], res))
+        alive = [(job_id, url, "")
+                 for (url, job_id), res in zip(to_probe, results)
+                 if res is not None and (res.ok or res.transient) and job_id not in self._skipped]
+        for job_id, url, _ in alive:
+            if job_id in self._sizes:
+                self._metrics.expect((job_id, url), job_id, self._sizes[job_id])
+        dead = sum(1 for res in results if res is not None and not res.ok and not res.transient)
+        self._events.log(f"{len(alive)} links ready ({format_size(sum(self._sizes.get(j, 0) for j, _, _ in alive))}), "
+                              f"{len(self._skipped) - skipped} already downloaded, {dead} unavailable, "
+                              f"{len(folders)} folders to expand.", "INFO")
+        return alive, folders
+
+    def _forget(self, count=1):
+        # job bị xoá khỏi bảng trước khi vào hàng đợi: không còn tính vào tổng
+        with self._lock:
+            self._total -= count
+        self._emit_total()
+
+    def _enqueue(self, jobs, folders):
+        for job in jobs:
+            if not self._jobs.put(job[0], job, self._sizes.get(job[0])) and self._jobs.removed(job[0]):
+                self._forget()   # xoá trong lúc pre-flight
+        if self._order is not None:
+            self._jobs.reorder(self._order)   # user có thể đã đổi thứ tự trong lúc pre-flight
+        # folder: mỗi folder một luồng liệt kê, đẩy file vào hàng đợi khi tìm thấy
+        for url, job_id in folders:
+            if self._jobs.removed(job_id):
+                self._forget()
+                continue
+            if not self._jobs.add_producer():
+                break
+            threading.Thread(target=self._expand_folder, args=(url, job_id),
+                             name=f"FolderLister-{job_id}", daemon=True).start()
+
+    # --- folder links ---
+    def _folder_status(self, job_id, filename=""):
+        # trạng thái gộp của một link folder: "3/12 files" -> "Completed" / "Failed (n)"
+        with self._lock:
+            st = dict(self._folders[job_id])
+        finished = st["done"] + st["failed"]
+        if st["listing"]:
+            status = f"Listing... {finished}/{st['listed']} files"
+        elif finished < st["listed"]:
+            status = f"{finished}/{st['listed']} files"
+        elif st["failed"]:
+            status = f"Failed ({st['failed']}/{st['listed']})"
+        else:
+            status = "Completed"
+        self._events.status(job_id, status, filename)
+
+    def _expand_folder(self, url, job_id):
+        # liệt kê folder theo kiểu generator: file đầu tiên vào hàng đợi ngay,
+        # trong khi các thư mục con sâu hơn vẫn đang được liệt kê
+        # (đã đăng ký producer với hàng đợi trước khi luồng này chạy)
+        with self._lock:
+            self._folders[job_id] = {"listed": 0, "done": 0, "failed": 0, "listing": True}
+        self._folder_status(job_id, "Listing...")
+        n = 0
+        removed = False
+        try:
+            for entry in iter_folder(self._engine, extract_folder_id(url), control=self._control,
+                                     list_url=FOLDER_LIST_URL.replace(DRIVE_URL, self.drive_url)):
+                if self._jobs.removed(job_id):
+                    removed = True   # dòng folder đã bị xoá: ngừng liệt kê, không xếp thêm file
+                    break
+                n += 1
+                file_url = FILE_URL.format(entry.file_id)
+                with self._lock:
+                    self._folders[job_id]["listed"] += 1
+                    if n > 1:
+                        self._total += 1   # file đầu tiên thay cho chính link folder
+                known = self.index.lookup(entry.file_id)
+                if known:
+                    self.names.reserve(known["path"].replace(os.sep, "/"))   # như _mark_skipped: không bị ghi đè
+                    with self._lock:
+                        self._folders[job_id]["done"] += 1
+                    self._count_done()
+                    continue
+                if not self._jobs.put(job_id, (job_id, file_url, entry.subdir, entry.name)):
+                    removed = self._jobs.removed(job_id)
+                    if removed:
+                        self._forget()   # file vừa đếm thêm (hoặc chính link folder nếu là file đầu)
+                    break
+            if removed:
+                if n == 0:
+                    self._forget()   # chưa file nào thay chỗ link folder trong tổng
+            elif n == 0:
+                self._count_done()   # folder rỗng: không có gì để tải
+            self._events.log(f"Folder {url}: found {n} files.", "INFO")
+        except Exception as e:
+            if not self._control.stopped:
+                self._events.log(f"❌ Folder listing failed ({url}): {e}", "ERROR")
+            with self._lock:
+                self._folders[job_id]["failed"] += 1
+                self._folders[job_id]["listed"] += 1
+        finally:
+            with self._lock:
+                self._folders[job_id]["listing"] = False
+            self._folder_status(job_id)
+            self._jobs.remove_producer()
+
+    @property
+    def done(self):
+        return self._done
+
+    @property
+    def total(self):
+        return self._total
+
+    @property
+    def stopped(self):
+        return self._control.stopped
+
+    def run(self):
+        """Download the whole batch; returns ``(done, total)``."""
+        self._events.start()
+        self._events.log("Starting download process...", "INFO")
+        os.makedirs(self.save_path, exist_ok=True)
+        self.index = DownloadIndex(self.save_path)
+        self.names = NameIndex(self.save_path, self.conflict)
+        dropped = self.index.refresh()
+        if dropped:
+            self._events.log(f"{dropped} previously downloaded files changed or went missing.", "INFO")
+
+        # scheduler: đưa các link còn sống vào hàng đợi, N luồng cùng lấy ra xử lý
+        self._jobs.add_producer()   # giữ hàng đợi mở cho tới khi pre-flight xong
+        self._ready.set()
+        try:
+            self._enqueue(*self._preflight(self.links_data))
+        finally:
+            self._jobs.remove_producer()
+
+        workers = []
+        for n in range(self.max_workers):
+            t = threading.Thread(target=self._worker_loop,
+                                 name=f"BatchDownloader-{n + 1}", daemon=True)
+            t.start()
+            workers.append(t)
+        for t in workers:
+            t.join()
+
+        self._engine.pool.close()
+        self.index.save()
+        if self.meta_cache is not None:
+            self.meta_cache.save()
+        if self._control.stopped:
+            self._events.log("Download stopped by user.", "WARNING")
+        self._events.log(f"All downloads attempted. Successfully downloaded {self._done} out of {self._total} links.", "INFO")
+        self._settle = True
+        self._events.stop()   # gửi nốt batch cuối trước khi trả về
+        return self._done, self._total
+
+    def _worker_loop(self):
+        while not self._control.stopped:
+            # chờ trên condition variable, không tốn CPU khi đang pause
+            if not self._control.wait_if_paused():
+                break
+            job = self._jobs.get()   # chặn khi còn folder đang liệt kê / link đang thêm; None = hết việc
+            if job is None:
+                break
+            try:
+                if not self._control.stopped:
+                    self._download_one(*job)
+            finally:
+                self._jobs.task_done()
+
+    # --- queue edits while running (gọi từ luồng khác, vd. GUI) ---
+    def add_jobs(self, entries):
+        # link mới thêm vào bảng khi batch đang chạy: pre-flight ở luồng riêng rồi xếp hàng
+        if not self._ready.is_set() or not self._jobs.add_producer():
+            return False
+        with self._lock:
+            self._total += len(entries)
+
+        def admit():
+            try:
+                self._enqueue(*self._preflight(entries))
+            finally:
+                self._jobs.remove_producer()
+            self._emit_total()
+
+        threading.Thread(target=admit, name="BatchDownloader-admit", daemon=True).start()
+        return True
+
+    def remove_jobs(self, job_ids):
+        # bỏ các job còn trong hàng đợi và mọi file/retry sau này của chúng; file đang tải dở thì vẫn tải xong
+        dropped = self._jobs.discard(job_ids)
+        self._metrics.forget(job_ids)
+        if dropped:
+            with self._lock:
+                self._total -= dropped
+            self._emit_total()
+        return dropped
+
+    def replace_job(self, job_id, link):
+        """Swap the link of a job that is still waiting in the queue.
+
+        False if it already started or finished (or is a folder being
+        listed): the old link is then dropped from the queue, retries
+        included, and the new one is left for the next batch.
+        """
+        with self._lock:
+            in_folder = job_id in self._folders
+        if self.remove_jobs([job_id]) != 1 or in_folder:
+            return False
+        self._sizes.pop(job_id, None)
+        self._names.pop(job_id, None)
+        self._jobs.restore([job_id])
+        return self.add_jobs([(link, job_id)])
+
+    def reorder_jobs(self, job_ids):
+        self._order = list(job_ids)
+        self._jobs.reorder(self._order)
+
+    def set_policy(self, policy):
+        self._jobs.set_policy(policy)
+        self._events.log(f"Queue order: {policy}.", "INFO")
+
+    def set_priority(self, job_ids, priority):
+        self._jobs.set_priority(job_ids, priority)
+
+    def set_template(self, job_ids, template):
+        # chỉ áp dụng cho file chưa được đặt tên; "" = dùng template chung
+        for job_id in job_ids:
+            if template:
+                self._templates[job_id] = template
+            else:
+                self._templates.pop(job_id, None)
+
+    def _download_one(self, job_id, url, subdir="", name=None):
+        in_folder = job_id in self._folders
+        if not in_folder:
+            self._events.status(job_id, "Downloading...", "Preparing...")
+            self._events.attempt(job_id)
+        key = (job_id, url)
+        with self._lock:
+            attempt = self._tries.get(key, 0) + 1
+            if attempt == 1:
+                self._started += 1
+            self._active += 1
+            started, total = self._started, self._total
+        self._metrics.begin(key, job_id)
+        if attempt == 1:
+            self._events.log(f"Processing link {started}/{total}: {url}", "INFO")
+        else:
+            self._events.log(f"Retrying link (attempt {attempt}/{self.retry.max_attempts}): {url}", "INFO")
+
+        direct = self._to_direct(url)
+        out_folder = os.path.join(self.save_path, *subdir.split("/")) if subdir else self.save_path
+        name = name or self._names.get(job_id)
+
+        digests = {}   # md5/sha256 tính trong lúc tải (engine native)
+        try:
+            if self.engine == self.ENGINE_SUBPROCESS:
+                # biết tên trước (pre-flight/liệt kê folder) thì chọn path theo template, không thì để gdown đặt
+                if name:
+                    path = self._place(key, name, subdir)
+                    if path is None:
+                        self._skip_existing(key, in_folder, name)
+                        return
+                    output = path
+                else:
+                    os.makedirs(out_folder, exist_ok=True)
+                    output = out_folder + os.sep
+                current_filename = self._fetch_subprocess(direct, key, output)
+                if not name:
+                    path = os.path.join(out_folder, current_filename) if current_filename else None
+                if path:
+                    self._check_saved(job_id, path)
+            else:
+                path = self._fetch_native(direct, key, out_folder, digests, subdir)
+                if path is None:
+                    self._skip_existing(key, in_folder, name)
+                    return
+                current_filename = os.path.basename(path)
+
+            file_id = extract_file_id(url)
+            if file_id and path and os.path.isfile(path):
+                self.index.record(file_id, path, md5=digests.get("md5"), sha256=digests.get("sha256"))
+
+            # hoàn tất file
+            self._metrics.end(key, more=in_folder)
+            shown = current_filename or "Downloaded file"
+            if in_folder:
+                with self._lock:
+                    self._folders[job_id]["done"] += 1
+                self._folder_status(job_id, shown)
+            else:
+                self._events.status(job_id, "Completed", shown)
+            self._events.log(f"✅ Downloaded: {shown}", "SUCCESS")
+            self._count_done()
+
+        except Exception as e:
+            kind = classify(e)
+            if kind is None or self._control.stopped:
+                self._stop_one(key, in_folder, name)
+                return
+            label = LABELS.get(kind, "Error")
+            self._events.error(job_id, f"{label}: {e}")
+            with self._lock:
+                self._tries[key] = attempt
+            if self.retry.should_retry(kind, attempt):
+                # xếp lại cuối hàng sau backoff; các luồng khác vẫn tải file khác trong lúc chờ
+                delay = self.retry.delay(kind, attempt)
+                if self._jobs.put_later(job_id, (job_id, url, subdir, name), delay,
+                                        None if in_folder else self._sizes.get(job_id)):
+                    self._metrics.end(key, more=True)   # phần đã tải vẫn tính, lần sau tải tiếp
+                    if not in_folder:
+                        self._events.status(job_id, f"Retry {attempt}/{self.retry.max_attempts - 1} in {delay:.0f}s", label)
+                    self._events.log(f"⚠️ {label}: {e} - retrying in {delay:.0f}s ({url})", "WARNING")
+                    return
+            # bỏ hẳn: không còn tính vào tổng byte của batch
+            self._metrics.end(key, keep=False, more=in_folder)
+            self.names.release(key)   # tên được giao lại cho file khác
+            if in_folder:
+                with self._lock:
+                    self._folders[job_id]["failed"] += 1
+                self._folder_status(job_id, label)
+            else:
+                self._events.status(job_id, "Failed", label)
+            self._events.log(f"❌ {label}: {e}", "ERROR")
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _stop_one(self, key, in_folder, name):
+        # Stop không phải lỗi: .part được giữ, dòng về Pending khi mở lại và tải tiếp từ đó
+        job_id = key[0]
+        self._metrics.end(key, more=in_folder)
+        if in_folder:
+            self._folder_status(job_id, name or "")
+        else:
+            self._events.status(job_id, STATUS_STOPPED, name or "N/A")
+        self._events.log(f"Stopped: {name or key[1]} (kept for resume)", "INFO")
+
+    def _skip_existing(self, key, in_folder, name):
+        # policy "skip": tên đã có trong thư mục đích => giữ file cũ, không tải
+        job_id = key[0]
+        self._metrics.end(key, more=in_folder)
+        if in_folder:
+            with self._lock:
+                self._folders[job_id]["done"] += 1
+            self._folder_status(job_id, name)
+        else:
+            self._events.status(job_id, "Skipped (name exists)", name or "N/A")
+        self._events.log(f"Skipped {name or key[1]}: a file with that name is already there.", "INFO")
+        self._count_done()
+
+    def _check_saved(self, job_id, path):
+        # gdown coi returncode 0 là xong, kể cả khi thứ nó lưu là trang lỗi HTML
+        problem = None
+        if looks_like_html(path):
+            problem = "Drive returned a web page instead of the file"
+        else:
+            expected, actual = self._sizes.get(job_id), os.path.getsize(path)
+            if expected is not None and actual != expected:
+                problem = f"Size mismatch: expected {expected} bytes, got {actual}"
+        if problem:
+            os.remove(path)
+            raise DownloadError(problem, kind="integrity")
+
+    def _fetch_native(self, direct, key, out_folder, digests=None, subdir=""):
+        # tải trong chính luồng này, tiến độ báo qua callback (không parse tqdm)
+        job_id = key[0]
+
+        def on_start(name, total_bytes):
+            self._metrics.set_total(key, total_bytes)
+            if job_id in self._folders:
+                self._folder_status(job_id, name)
+            else:
+                self._events.status(job_id, "Downloading...", name)
+
+        def on_progress(done_bytes, total_bytes):
+            if job_id not in self._folders:
+                self._events.bytes(job_id, done_bytes)
+            self._metrics.update(key, done_bytes)
+
+        return self._engine.download(direct, out_folder,
+                                     on_start=on_start, on_progress=on_progress,
+                                     control=self._control, digests=digests,
+                                     target=lambda name: self._place(key, name, subdir))
+
+    def _fetch_subprocess(self, direct, key, output):
+        # fallback: chạy "python -m gdown" và đọc tiến độ từ stdout
+        job_id = key[0]
+        proc = None
+        current_filename = None
+        tail = collections.deque(maxlen=3)   # mấy dòng cuối của gdown, để phân loại lỗi
+        try:
+            proc = self._run_gdown(direct, output)
+            with self._lock:
+                self._active_procs.add(proc)
+            if self._control.stopped:  # stop() có thể đã chạy trước khi proc được đăng ký
+                proc.terminate()
+            elif self._control.paused:
+                self._suspend_proc(proc, True)
+            assert proc.stdout is not None
+
+            for line in proc.stdout:
+                s = line.strip()
+
+                # nhấn Stop
+                if self._control.stopped:
+                    proc.terminate()
+                    raise DownloadCancelled("Stopped by user")
+
+                # bắt tên file từ 'To: ...'
+                if s.startswith("To:"):
+                    target = s.split("To:", 1)[1].strip()
+                    current_filename = os.path.basename(target.replace("\\", "/"))
+                    if job_id in self._folders:
+                        self._folder_status(job_id, current_filename)
+                    else:
+                        self._events.status(job_id, "Downloading...", current_filename)
+                    continue
+
+                # bắt số byte từ dòng progress; tốc độ/ETA do TransferMetrics tính như engine native
+                m_pct = re.match(r"^(\d+)%\|", s)
+                if m_pct:
+                    counts = _tqdm_bytes(s)
+                    size = self._sizes.get(job_id)
+                    if size is not None:
+                        # size thật từ pre-flight; tqdm chỉ cho tỉ lệ (số làm tròn 3 chữ số)
+                        done = size * counts[0] // counts[1] if counts and counts[1] else size * int(m_pct.group(1)) // 100
+                        self._metrics.update(key, min(done, size), size)
+                    elif counts:
+                        self._metrics.update(key, *counts)
+                    continue
+
+                # lọc bớt log ồn
+                if (s == "Downloading..." or s == "" or
+                    s.startswith("From (original):") or s.startswith("From (redirected):") or
+                    s.startswith("From:") or s.startswith("To:") or
+                    s.startswith("Processing") or s.startswith("Checking")):
+                    continue
+
+                # còn lại: ghi log
+                tail.append(s)
+                self._events.log(s, "INFO")
+
+            proc.wait()
+            if self._control.stopped:
+                raise DownloadCancelled("Stopped by user")
+            if proc.returncode != 0:
+                detail = f": {' '.join(tail)}" if tail else ""
+                raise RuntimeError(f"gdown exited with code {proc.returncode}{detail}")
+            return current_filename
+        finally:
+            if proc:
+                if proc.poll() is None:
+                    proc.kill()
+                with self._lock:
+                    self._active_procs.discard(proc)
+
+    @staticmethod
+    def _suspend_proc(proc, suspend):
+        # gdown chạy ở tiến trình riêng: chỉ tạm dừng được bằng SIGSTOP/SIGCONT (POSIX)
+        sig = getattr(signal, "SIGSTOP" if suspend else "SIGCONT", None)
+        if sig is not None and proc.poll() is None:
+            proc.send_signal(sig)
+
+    def _suspend_procs(self, suspend):
+        with self._lock:
+            procs = list(self._active_procs)
+        for proc in procs:
+            self._suspend_proc(proc, suspend)
+
+    # controls
+    @property
+    def is_paused(self):
+        return self._control.paused
+
+    @property
+    def event_stats(self):
+        """``{"events", "flushes"}``: updates reported and batches delivered to ``on_events``."""
+        return dict(self._events.stats)
+
+    @property
+    def connection_stats(self):
+        """Counters of the engine's :class:`~drivecore.pool.ConnectionPool` (handshakes vs. reuse)."""
+        return dict(self._engine.pool.stats)
+
+    def pause(self):
+        self._control.pause()
+        self._suspend_procs(True)
+        self._events.log("Paused.", "INFO")
+
+    def resume(self):
+        self._suspend_procs(False)
+        self._control.resume()
+        self._events.log("Resumed.", "INFO")
+
+    def stop(self):
+        self._control.stop()
+        self._jobs.close()   # đánh thức các luồng đang chờ job
+        self._events.log("Stopping...", "WARNING")
+        # dừng ngay mọi tiến trình đang chạy, kể cả khi gdown chưa in dòng nào
+        self._suspend_procs(False)  # tiến trình đang SIGSTOP sẽ không nhận SIGTERM
+        with self._lock:
+            procs = list(self._active_procs)
+        for proc in procs:
+            if proc.poll() is None:
+                proc.terminate()
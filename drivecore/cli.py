@@ -0,0 +1,200 @@
+"""Headless command line front end.
+
+    python -m drivecore links.txt -o ~/Downloads/drive -j 4 --limit 2M --json
+
+Reads Drive links from any text, CSV or HTML file (``#`` comments
+allowed; ``-`` for stdin), downloads them with
+:class:`~drivecore.batch.BatchDownloader` and prints progress, either as
+log lines or as one JSON object per update. Nothing here imports PyQt6,
+so it runs on servers without a display.
+
+Exit status: 0 when every link was downloaded, 1 when some were not,
+2 when the links can't be read or there are none, 130 when interrupted.
+"""
+import argparse
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+
+from .batch import BatchDownloader
+from .engine import HASHES
+from .jobs import POLICIES, POLICY_FIFO
+from .links import extract_links
+from .metacache import MetadataCache
+from .naming import CONFLICT_SUFFIX, CONFLICTS, DEFAULT_TEMPLATE, check_template
+from .ratelimit import BandwidthLimiter
+from .retry import MAX_ATTEMPTS, RetryPolicy
+from .writer import FSYNC_NEVER, FSYNC_POLICIES, WRITE_CHUNK
+
+_RE_RATE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?(?:/s)?\s*$", re.I)
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_rate(text):
+    """``"500K"``, ``"2M"``, ``"1.5MB/s"`` or plain bytes -> bytes/s; 0 = unlimited."""
+    m = _RE_RATE.match(text)
+    if not m:
+        raise argparse.ArgumentTypeError(f"invalid rate: {text!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+def parse_size(text):
+    """``"64K"``, ``"4M"`` or plain bytes -> bytes."""
+    m = _RE_RATE.match(text)
+    if not m or float(m.group(1)) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2).lower()])
+
+
+def parse_template(text):
+    """A naming template such as ``{folder}/{name}`` or ``{id}_{name}``."""
+    try:
+        return check_template(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def read_links(path):
+    """Drive links in ``path`` (or stdin for ``-``), de-duplicated, in order.
+
+    Any text, CSV or HTML works; lines starting with ``#`` are skipped.
+    """
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")
+    try:
+        return extract_links(line for line in f if not line.lstrip().startswith("#"))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class _Printer:
+    """Renders event batches as text or JSON lines."""
+
+    def __init__(self, stream, as_json):
+        self.stream = stream
+        self.as_json = as_json
+        self._lock = threading.Lock()
+        self._last = None
+
+    def _write(self, text):
+        with self._lock:
+            if self.stream is None:
+                return
+            try:
+                self.stream.write(text + "\n")
+                self.stream.flush()
+            except BrokenPipeError:
+                self.stream = None   # output closed (e.g. piped into head): keep downloading quietly
+
+    def event(self, kind, **fields):
+        if self.as_json:
+            self._write(json.dumps(dict(event=kind, time=round(time.time(), 3), **fields), ensure_ascii=False))
+
+    def __call__(self, batch):
+        if self.as_json:
+            self.event("update", progress=batch.progress, speed=batch.speed, eta=batch.eta, total=batch.total,
+                       jobs={str(job_id): {"status": status, "filename": filename}
+                             for job_id, (status, filename) in batch.statuses.items()},
+                       rates={str(job_id): {"speed": speed, "eta": eta}
+                              for job_id, (speed, eta) in batch.rates.items()},
+                       sizes={str(job_id): size for job_id, size in batch.sizes.items()},
+                       logs=[{"level": level, "message": message} for message, level in batch.logs])
+            return
+        for message, level in batch.logs:
+            self._write(f"[{level}] {message}")
+        state = (batch.progress, batch.total)
+        if (batch.progress is not None or batch.total is not None) and state != self._last:
+            self._last = state
+            parts = [f"{batch.progress}%" if batch.progress is not None else None,
+                     batch.speed, f"ETA {batch.eta}" if batch.eta and batch.eta != "—" else None, batch.total]
+            self._write("... " + "  ".join(p for p in parts if p))
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="python -m drivecore",
+                                 description="Download Google Drive links without the GUI.")
+    ap.add_argument("links", help="file with one link per line, or - for stdin")
+    ap.add_argument("-o", "--output", default=os.getcwd(), help="destination folder (default: current)")
+    ap.add_argument("-t", "--template", type=parse_template, default=DEFAULT_TEMPLATE,
+                    help="path of each file below the destination; fields {name} {stem} {ext} {id} "
+                         "{folder} {job} (default: %(default)s)")
+    ap.add_argument("--on-conflict", choices=CONFLICTS, default=CONFLICT_SUFFIX,
+                    help="when a file with the same name is already there: save as 'name (1).ext', "
+                         "overwrite it or skip the download (default: %(default)s)")
+    ap.add_argument("-j", "--jobs", type=int, default=BatchDownloader.DEFAULT_MAX_WORKERS,
+                    help="parallel downloads (default: %(default)s)")
+    ap.add_argument("--limit", type=parse_rate, default=0, metavar="RATE",
+                    help="total bandwidth cap, e.g. 500K or 2M (default: unlimited)")
+    ap.add_argument("--per-file-limit", type=parse_rate, default=0, metavar="RATE",
+                    help="bandwidth cap per file (default: unlimited)")
+    ap.add_argument("--engine", choices=(BatchDownloader.ENGINE_NATIVE, BatchDownloader.ENGINE_SUBPROCESS),
+                    default=BatchDownloader.ENGINE_NATIVE)
+    ap.add_argument("--order", choices=POLICIES, default=POLICY_FIFO,
+                    help="which file starts next: list order, smallest first (by probed size) "
+                         "or one per link in turn (default: %(default)s)")
+    ap.add_argument("--retries", type=int, default=MAX_ATTEMPTS - 1, metavar="N",
+                    help="retries per file after quota or network errors (default: %(default)s)")
+    ap.add_argument("--sha256", action="store_true",
+                    help="also compute SHA-256 of every file (MD5 is always checked when known)")
+    ap.add_argument("--write-chunk", type=parse_size, default=WRITE_CHUNK, metavar="SIZE",
+                    help="bytes gathered per disk write, e.g. 256K or 4M (default: 1M)")
+    ap.add_argument("--fsync", choices=FSYNC_POLICIES, default=FSYNC_NEVER,
+                    help="flush files to disk: never, once when a file is finished, or also before "
+                         "every resume checkpoint (default: %(default)s)")
+    ap.add_argument("--json", action="store_true", help="print one JSON object per progress update")
+    ap.add_argument("--drive-url", metavar="URL",
+                    help="send Drive requests to this server instead, e.g. a local fake Drive "
+                         "(default: $HISHIRO_DRIVE_URL or https://drive.google.com)")
+    ap.add_argument("--no-cache", action="store_true", help="don't read or write the metadata cache")
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        links = read_links(args.links)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not links:
+        print("error: no links to download", file=sys.stderr)
+        return 2
+
+    printer = _Printer(sys.stdout, args.json)
+    limiter = BandwidthLimiter(args.limit, args.per_file_limit)
+    meta_cache = MetadataCache(path=None) if args.no_cache else MetadataCache()
+    links_data = [(link, i) for i, link in enumerate(links, 1)]
+    batch = BatchDownloader(links_data, os.path.abspath(os.path.expanduser(args.output)),
+                            max_workers=args.jobs, engine=args.engine, limiter=limiter,
+                            meta_cache=meta_cache, on_events=printer,
+                            retry=RetryPolicy(max_attempts=max(0, args.retries) + 1),
+                            hashes=HASHES + ("sha256",) if args.sha256 else HASHES,
+                            drive_url=args.drive_url, policy=args.order, write_chunk=args.write_chunk,
+                            fsync=args.fsync, template=args.template, conflict=args.on_conflict)
+    printer.event("start", output=batch.save_path, jobs={str(i): link for link, i in links_data})
+
+    # Ctrl+C lần đầu: dừng êm (giữ .part để tải tiếp); lần hai: thoát ngay
+    def on_sigint(signum, frame):
+        if batch.stopped:
+            raise KeyboardInterrupt
+        batch.stop()
+
+    previous = signal.signal(signal.SIGINT, on_sigint)
+    runner = threading.Thread(target=batch.run, name="BatchDownloader", daemon=True)
+    try:
+        runner.start()
+        while runner.is_alive():
+            runner.join(0.2)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+    printer.event("finished", done=batch.done, total=batch.total, stopped=batch.stopped)
+    if batch.stopped:
+        return 130
+    return 0 if batch.done >= batch.total else 1
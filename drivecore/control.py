@@ -0,0 +1,59 @@
+"""Pause/stop switch shared by every transfer of a batch."""
+import threading
+
+from .engine import DownloadCancelled
+
+
+class TransferControl:
+    """Blocks transfers while paused and cancels them once stopped.
+
+    Transfers call :meth:`checkpoint` between chunks. While paused they
+    sleep on a condition variable without reading from the socket, so the
+    connection stalls instead of downloading in the background, and they
+    carry on from the same byte offset when resumed.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._paused = False
+        self._stopped = False
+
+    @property
+    def paused(self):
+        return self._paused
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def wait_if_paused(self, timeout=None):
+        """Block while paused; returns False if stopped (or still paused at timeout)."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._paused or self._stopped, timeout)
+            return not self._stopped and not self._paused
+
+    def sleep(self, seconds):
+        """Sleep up to ``seconds``, returning early if stopped."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._stopped, seconds)
+
+    def checkpoint(self):
+        """Wait out a pause, then raise DownloadCancelled if stopped."""
+        if self._paused:
+            self.wait_if_paused()
+        if self._stopped:
+            raise DownloadCancelled("Stopped by user")
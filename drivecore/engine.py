@@ -0,0 +1,774 @@
+"""In-process download engine.
+
+Fetches the Drive landing page, follows the virus-scan confirmation and
+streams the file body over plain HTTP from the calling thread, reporting
+progress through callbacks instead of printing tqdm bars. Requests go over
+keep-alive connections from a :class:`~drivecore.pool.ConnectionPool`;
+bytes reach the disk through a :class:`~drivecore.writer.FileWriter`.
+"""
+import base64
+import binascii
+import codecs
+import hashlib
+import html
+import http.client
+import os
+import re
+import threading
+import time
+import urllib.parse
+
+from .journal import PartJournal
+from .links import extract_file_id
+from .pool import ConnectionPool
+from .writer import FSYNC_NEVER, QUEUE_DEPTH, WRITE_CHUNK, FileWriter
+
+CHUNK_SIZE = 256 * 1024          # bytes per socket read; writes are gathered to WRITE_CHUNK
+MAX_REDIRECTS = 10
+MAX_CONFIRM_PAGES = 3
+MAX_PAGE_SIZE = 2 * 1024 * 1024
+TIMEOUT = 60
+SEGMENTS = 4
+SEGMENT_MIN_SIZE = 16 * 1024 * 1024
+JOURNAL_EVERY = 4 * 1024 * 1024   # bytes written per segment between journal updates
+MAX_RECONNECTS = 3                # per segment, e.g. after the server dropped a paused socket
+HASH_CHUNK = 1024 * 1024
+HASHES = ("md5",)                 # digests computed while downloading; "sha256" may be added
+SNIFF_SIZE = 1024                 # bytes looked at to tell an HTML page from the real file
+DRIVE_HOSTS = ("google.com", "googleusercontent.com")
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+_RE_FORM = re.compile(r'<form[^>]+id="download-form"[^>]+action="([^"]+)"', re.I)
+_RE_HIDDEN = re.compile(r'<input[^>]+type="hidden"[^>]+name="([^"]+)"[^>]+value="([^"]*)"', re.I)
+_RE_CONFIRM_HREF = re.compile(r'href="(/uc\?export=download[^"]+)"', re.I)
+_RE_DOWNLOAD_URL = re.compile(r'"downloadUrl":"([^"]+)"')
+_RE_ERROR = re.compile(r'<p class="uc-error-subcaption">(.*?)</p>', re.S | re.I)
+_RE_TITLE = re.compile(r"<title>(.*?)</title>", re.S | re.I)
+_RE_TAGS = re.compile(r"<[^>]+>")
+_RE_FILENAME_STAR = re.compile(r"filename\*\s*=\s*([^']*)''([^;]+)", re.I)
+_RE_FILENAME = re.compile(r'filename\s*=\s*"?([^";]+)"?', re.I)
+_RE_GOOG_MD5 = re.compile(r"md5=([A-Za-z0-9+/=]+)")
+_RE_RANGE_TOTAL = re.compile(r"/(\d+)\s*$")
+_HTML_STARTS = (b"<!doctype html", b"<html", b"<head", b"<body")
+
+
+class DownloadError(Exception):
+    """The file could not be downloaded (HTTP error, Drive refused it, ...).
+
+    ``status`` is the HTTP status when the server answered with an error;
+    ``kind`` is set where the cause is already known (see
+    :func:`drivecore.retry.classify`).
+    """
+
+    def __init__(self, *args, status=None, kind=None):
+        super().__init__(*args)
+        self.status = status
+        self.kind = kind
+
+
+class DownloadCancelled(DownloadError):
+    """The caller asked to stop while the transfer was running."""
+
+
+def format_rate(bytes_per_sec):
+    """Format a transfer rate the way tqdm does, e.g. ``4.10MB/s``."""
+    value = float(bytes_per_sec)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1000 or unit == "GB":
+            return f"{value:.2f}{unit}/s"
+        value /= 1000
+
+
+def format_size(n):
+    """Human-readable byte count, e.g. ``12.30 MB``; ``—`` if unknown."""
+    if n is None:
+        return "—"
+    value = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1000:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.2f} {unit}"
+        value /= 1000
+    return f"{value:.2f} TB"
+
+
+def looks_like_html(path, name=None):
+    """True if ``path`` holds a web page although ``name`` is not an .htm(l) file.
+
+    That is how an error or quota page saved in place of the real file
+    shows up (gdown does it, a misbehaving server may too).
+    """
+    if (name or path).lower().endswith((".htm", ".html", ".xhtml")):
+        return False
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_SIZE)
+    except OSError:
+        return False
+    head = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    return head.startswith(_HTML_STARTS)
+
+
+def _b64_to_hex(value):
+    try:
+        return base64.b64decode(value, validate=True).hex()
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _is_drive_host(host, drive_hosts=DRIVE_HOSTS):
+    host = (host or "").lower()
+    return any(host == h or host.endswith("." + h) for h in drive_hosts)
+
+
+def _safe_name(name):
+    name = name.replace("\\", "/").rsplit("/", 1)[-1].strip()
+    name = re.sub(r'[<>:"|?*\x00-\x1f]', "_", name)
+    return name if name not in ("", ".", "..") else "download"
+
+
+class _Response:
+    """An HTTP response together with the (pooled) connection that carries it."""
+
+    def __init__(self, url, conn, resp, pool):
+        self.url = url
+        self.conn = conn
+        self.resp = resp
+        self.status = resp.status
+        self.cookies = {}
+        self._pool = pool
+
+    def getheader(self, name, default=None):
+        return self.resp.getheader(name, default)
+
+    def read(self, n=None):
+        return self.resp.read(n)
+
+    def close(self):
+        # có thể bị gọi nhiều lần; connection chỉ được trả về pool một lần
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.release(self.conn, self.resp)
+
+
+class _Progress:
+    """Byte counter shared by the segments of one download.
+
+    ``throttle(n)`` (the bandwidth limiter) runs after every chunk, outside
+    the lock so segments waiting on it don't block each other's progress.
+    """
+
+    def __init__(self, total, callback, done=0, throttle=None):
+        self.total = total
+        self.done = done
+        self._callback = callback
+        self._throttle = throttle
+        self._lock = threading.Lock()
+
+    def add(self, n):
+        with self._lock:
+            self.done += n
+            if self._callback:
+                self._callback(self.done, self.total)
+        if self._throttle:
+            self._throttle(n)
+
+
+class _Hasher:
+    """Digests of a file computed from the bytes as they are written.
+
+    Bytes arriving at the current end of the hashed prefix (a single
+    stream, or the first segment) are hashed on the spot; anything written
+    out of order by other segments, or kept from an earlier session, is
+    read back once in :meth:`finish`.
+    """
+
+    def __init__(self, algorithms):
+        self._hashes = {name: hashlib.new(name) for name in algorithms}
+        self.pos = 0
+        self._lock = threading.Lock()
+
+    def update(self, offset, data):
+        if offset != self.pos:
+            return
+        with self._lock:
+            if offset == self.pos:
+                for h in self._hashes.values():
+                    h.update(data)
+                self.pos += len(data)
+
+    def finish(self, path):
+        """Hash whatever of ``path`` is still missing; returns ``{name: hexdigest}``."""
+        with self._lock:
+            with open(path, "rb") as f:
+                f.seek(self.pos)
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    for h in self._hashes.values():
+                        h.update(chunk)
+                    self.pos += len(chunk)
+            return {name: h.hexdigest() for name, h in self._hashes.items()}
+
+
+class DriveEngine:
+    """Downloads Drive (or plain HTTP) links without spawning gdown.
+
+    Files of at least ``2 * segment_min_size`` bytes whose server accepts
+    byte ranges are fetched as ``segments`` parallel Range requests. All
+    transfers draw from ``limiter`` (a :class:`BandwidthLimiter`) if set.
+    The ``hashes`` digests (hashlib names) of every file are computed while
+    it downloads and checked against the MD5 the server or cache knows.
+    Connections are kept alive in ``pool`` and reused by later requests to
+    the same host. Files are written ``write_chunk`` bytes at a time, with
+    at most ``write_queue`` buffers waiting for the disk, preallocated when
+    their size is known (``preallocate``) and fsynced per ``fsync`` (see
+    :mod:`drivecore.writer`).
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, timeout=TIMEOUT, segments=SEGMENTS,
+                 segment_min_size=SEGMENT_MIN_SIZE, drive_hosts=DRIVE_HOSTS, limiter=None,
+                 meta_cache=None, hashes=HASHES, pool=None, write_chunk=WRITE_CHUNK, write_queue=QUEUE_DEPTH,
+                 preallocate=True, fsync=FSYNC_NEVER):
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.segments = segments
+        self.segment_min_size = segment_min_size
+        self.drive_hosts = tuple(drive_hosts)
+        self.limiter = limiter       # BandwidthLimiter shared by every download, or None
+        self.meta_cache = meta_cache # MetadataCache of resolved Drive files, or None
+        self.hashes = tuple(hashes)
+        self.pool = pool or ConnectionPool()
+        self.write_chunk = write_chunk
+        self.write_queue = write_queue
+        self.preallocate = preallocate
+        self.fsync = fsync
+
+    # --- HTTP ---
+    def _open(self, url, headers=None, cookies=None, landing=False):
+        """GET ``url`` following redirects; returns a :class:`_Response`.
+
+        With ``landing`` a first request to a Drive host (its landing
+        page) goes without ``headers``; the redirects it leads to carry them.
+        """
+        for hop in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            req_headers = {"User-Agent": USER_AGENT}
+            drive = _is_drive_host(parts.hostname, self.drive_hosts)
+            if cookies and drive:
+                req_headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+            if not (landing and hop == 0 and drive):
+                req_headers.update(headers or {})
+            conn, resp = self._request(parts, path, req_headers)
+
+            if cookies is not None:
+                for raw in resp.headers.get_all("Set-Cookie") or []:
+                    name, _, value = raw.split(";", 1)[0].partition("=")
+                    cookies[name.strip()] = value.strip()
+
+            if resp.status in (301, 302, 303, 307, 308):
+                location = resp.getheader("Location")
+                if resp.length is not None and resp.length <= MAX_PAGE_SIZE:
+                    resp.read()   # đọc hết body để giữ lại connection
+                self.pool.release(conn, resp)
+                if not location:
+                    raise DownloadError(f"HTTP {resp.status} without Location for {url}")
+                url = urllib.parse.urljoin(url, location)
+                continue
+            return _Response(url, conn, resp, self.pool)
+        raise DownloadError(f"Too many redirects for {url}")
+
+    def _request(self, parts, path, headers):
+        """Send a GET on a pooled connection; returns ``(conn, response)``.
+
+        An idle connection the server has meanwhile closed fails on first
+        use; the request is then repeated on the next one, or a new one.
+        """
+        while True:
+            conn, reused = self.pool.get(parts.scheme, parts.netloc, self.timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                return conn, conn.getresponse()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if reused and isinstance(e, ConnectionError):
+                    continue
+                raise DownloadError(f"Connection failed: {e}", kind="network") from e
+
+    # --- Drive ---
+    def _confirm_url(self, page, url, cookies):
+        """Find the "download anyway" target on a Drive warning page."""
+        m = _RE_FORM.search(page)
+        if m:
+            action = html.unescape(m.group(1))
+            params = [(html.unescape(k), html.unescape(v)) for k, v in _RE_HIDDEN.findall(page)]
+            return urllib.parse.urljoin(url, action) + "?" + urllib.parse.urlencode(params)
+        m = _RE_CONFIRM_HREF.search(page)
+        if m:
+            return urllib.parse.urljoin(url, html.unescape(m.group(1)))
+        m = _RE_DOWNLOAD_URL.search(page)
+        if m:
+            return codecs.decode(m.group(1), "unicode_escape")
+        for name, value in cookies.items():
+            if name.startswith("download_warning"):
+                sep = "&" if "?" in url else "?"
+                return f"{url}{sep}confirm={value}"
+        return None
+
+    def _page_error(self, page):
+        m = _RE_ERROR.search(page) or _RE_TITLE.search(page)
+        if not m:
+            return None
+        text = html.unescape(_RE_TAGS.sub("", m.group(1))).strip()
+        return " ".join(text.split()) or None
+
+    def fetch_page(self, url):
+        """GET a Drive web page (e.g. a folder listing) and return its text."""
+        resp = self._open(url, cookies={})
+        try:
+            page = resp.read(MAX_PAGE_SIZE).decode("utf-8", "replace")
+        finally:
+            resp.close()
+        if resp.status >= 400:
+            reason = self._page_error(page)
+            raise DownloadError(f"HTTP {resp.status}: {reason}" if reason else f"HTTP {resp.status} for {url}",
+                                status=resp.status)
+        return page
+
+    def _open_cached(self, entry, headers=None):
+        """Open a cached download URL; None if Drive no longer serves the file there."""
+        try:
+            resp = self._open(entry["download_url"], headers=headers, cookies={})
+        except DownloadError:
+            return None
+        ctype = (resp.getheader("Content-Type") or "").lower()
+        if resp.status < 400 and (resp.getheader("Content-Disposition") or not ctype.startswith("text/html")):
+            return resp
+        resp.close()
+        return None
+
+    def resolve(self, url, headers=None):
+        """Open the file body behind ``url``.
+
+        Drive links go through the landing and virus-scan pages first; the
+        returned response is positioned at the start of the real content.
+        With a ``meta_cache`` the final URL is remembered per file id, so
+        retries and repeat batches skip those pages.
+        """
+        file_id = self.file_id_for(url)
+        if self.meta_cache is not None and file_id:
+            entry = self.meta_cache.get(file_id)
+            if entry and entry.get("download_url"):
+                resp = self._open_cached(entry, headers)
+                if resp is not None:
+                    return resp
+                self.meta_cache.invalidate(file_id)
+
+        resp = self._resolve_pages(url, headers)
+        if self.meta_cache is not None and file_id:
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(resp.url).query)
+            self.meta_cache.put(file_id, filename=self.filename_for(resp),
+                                size=self.size_for(resp),
+                                mime=resp.getheader("Content-Type"),
+                                # hash của một câu trả lời 206 có thể chỉ là của đoạn được gửi
+                                md5=self.md5_for(resp) if resp.status != 206 else None,
+                                download_url=resp.url,
+                                confirm=(query.get("confirm") or [None])[0])
+            self.meta_cache.save_if_due()
+        return resp
+
+    def probe(self, url):
+        """Filename, size and MIME type of ``url`` without downloading it.
+
+        Answered from ``meta_cache`` when possible; otherwise the link is
+        resolved (which also caches the final download URL) asking for the
+        first byte only, so the connection can go back to the pool.
+        """
+        file_id = self.file_id_for(url)
+        if self.meta_cache is not None and file_id:
+            entry = self.meta_cache.get(file_id)
+            if entry and entry.get("filename"):
+                return entry
+        try:
+            resp = self.resolve(url, headers={"Range": "bytes=0-0"})
+        except DownloadError as e:
+            if e.status != 416:
+                raise
+            resp = self.resolve(url)   # file rỗng: không có byte đầu để hỏi
+        try:
+            if resp.status == 206:
+                resp.read()
+            return {"filename": self.filename_for(resp), "size": self.size_for(resp),
+                    "mime": resp.getheader("Content-Type")}
+        finally:
+            resp.close()
+
+    def _resolve_pages(self, url, headers=None):
+        """Walk the landing and warning pages of ``url`` to the file body.
+
+        ``headers`` (e.g. a Range) go with every request but the landing
+        page itself: with the redirect to the file as with the "download
+        anyway" request. A page that comes back cut short by them (206) is
+        fetched again whole before it is read.
+        """
+        cookies = {}
+        landing = True
+        for _ in range(MAX_CONFIRM_PAGES + 1):
+            resp = self._open(url, headers=headers, cookies=cookies, landing=landing)
+            if resp.status >= 400:
+                page = resp.read(MAX_PAGE_SIZE).decode("utf-8", "replace")
+                resp.close()
+                reason = self._page_error(page)
+                raise DownloadError(f"HTTP {resp.status}: {reason}" if reason else f"HTTP {resp.status} for {url}",
+                                    status=resp.status)
+            ctype = (resp.getheader("Content-Type") or "").lower()
+            if (not _is_drive_host(urllib.parse.urlsplit(resp.url).hostname, self.drive_hosts)
+                    or resp.getheader("Content-Disposition")
+                    or not ctype.startswith("text/html")):
+                resp.cookies = cookies
+                return resp
+
+            if resp.status == 206:
+                resp.close()
+                resp = self._open(resp.url, cookies=cookies)   # trang bị cắt theo Range: lấy lại cả trang
+            page = resp.read(MAX_PAGE_SIZE).decode("utf-8", "replace")
+            resp.close()
+            next_url = self._confirm_url(page, resp.url, cookies)
+            if not next_url:
+                reason = self._page_error(page) or "Drive returned a web page instead of the file"
+                raise DownloadError(reason)
+            url, landing = next_url, False
+        raise DownloadError("Too many confirmation pages")
+
+    @staticmethod
+    def size_for(resp):
+        """Size of the whole file behind ``resp`` (a 206 answer too), or None."""
+        if resp.status == 206:
+            m = _RE_RANGE_TOTAL.search(resp.getheader("Content-Range") or "")
+            return int(m.group(1)) if m else None
+        length = resp.getheader("Content-Length")
+        return int(length) if length and length.isdigit() else None
+
+    @staticmethod
+    def md5_for(resp):
+        """MD5 (hex) the server declares for the body (``X-Goog-Hash``/``Content-MD5``), or None."""
+        m = _RE_GOOG_MD5.search(resp.getheader("X-Goog-Hash") or "")
+        value = m.group(1) if m else resp.getheader("Content-MD5")
+        return _b64_to_hex(value) if value else None
+
+    @staticmethod
+    def filename_for(resp):
+        disposition = resp.getheader("Content-Disposition") or ""
+        m = _RE_FILENAME_STAR.search(disposition)
+        if m:
+            charset = m.group(1) or "utf-8"
+            return _safe_name(urllib.parse.unquote(m.group(2).strip(), encoding=charset, errors="replace"))
+        m = _RE_FILENAME.search(disposition)
+        if m:
+            return _safe_name(m.group(1))
+        return _safe_name(urllib.parse.unquote(urllib.parse.urlsplit(resp.url).path))
+
+    # --- transfer ---
+    def _split(self, gaps):
+        """Cut the missing ``[start, stop)`` ranges into at most ~``segments`` pieces."""
+        pieces = []
+        budget = max(1, self.segments)
+        for start, stop in gaps:
+            length = stop - start
+            count = max(1, min(budget, length // max(1, self.segment_min_size)))
+            if length < 2 * self.segment_min_size:
+                count = 1
+            size = length // count
+            for i in range(count):
+                pieces.append((start + i * size, stop if i == count - 1 else start + (i + 1) * size))
+        return pieces
+
+    def _open_range(self, resp, start, stop):
+        """Request bytes ``[start, stop)`` of the resolved file; None if ignored."""
+        ranged = self._open(resp.url, headers={"Range": f"bytes={start}-{stop - 1}"},
+                            cookies=dict(resp.cookies))
+        content_range = ranged.getheader("Content-Range") or ""
+        if ranged.status == 206 and content_range.startswith(f"bytes {start}-"):
+            return ranged
+        ranged.close()
+        return None
+
+    def _writer(self, part, size=None, truncate=True):
+        return FileWriter(part, size, truncate=truncate, chunk_size=self.write_chunk,
+                          queue_depth=self.write_queue, fsync=self.fsync, allocate=self.preallocate)
+
+    def _copy(self, src, stream, remaining, progress, checkpoint, hasher=None):
+        """Copy ``remaining`` bytes (or everything if None) from ``src`` to a writer ``stream``."""
+        while remaining is None or remaining > 0:
+            checkpoint()
+            n = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            try:
+                chunk = src.read(n)
+            except (OSError, http.client.HTTPException) as e:
+                raise DownloadError(f"Connection lost after {progress.done} bytes: {e}", kind="network") from e
+            if not chunk:
+                if remaining is not None:
+                    raise DownloadError(f"Connection closed with {remaining} bytes missing", kind="network")
+                break
+            stream.write(chunk)
+            if hasher:
+                hasher.update(hasher.pos, chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+            progress.add(len(chunk))
+
+    def _fetch_range(self, src, resp, writer, start, stop, progress, checkpoint, journal, hasher=None):
+        """Write ``[start, stop)`` from ``src`` through ``writer``, journaling as it goes.
+
+        If the connection drops (e.g. the server gave up on a stalled
+        socket during a long pause) the range is re-requested from the
+        current offset, up to ``MAX_RECONNECTS`` times.
+        """
+        reconnects = 0
+        stream = writer.stream(start)
+        committed = pos = start
+        try:
+            while pos < stop:
+                checkpoint()
+                try:
+                    chunk = src.read(min(self.chunk_size, stop - pos))
+                    if not chunk:
+                        raise DownloadError(f"Connection closed with {stop - pos} bytes missing", kind="network")
+                except (OSError, http.client.HTTPException, DownloadError) as e:
+                    src.close()
+                    if reconnects >= MAX_RECONNECTS:
+                        if isinstance(e, DownloadError):
+                            raise
+                        raise DownloadError(f"Connection lost after {progress.done} bytes: {e}",
+                                            kind="network") from e
+                    reconnects += 1
+                    checkpoint()
+                    src = self._open_range(resp, pos, stop)
+                    if src is None:
+                        raise DownloadError("Server stopped honouring Range requests", kind="network") from e
+                    continue
+                stream.write(chunk)
+                if hasher:
+                    hasher.update(pos, chunk)
+                pos += len(chunk)
+                progress.add(len(chunk))
+                if pos - committed >= JOURNAL_EVERY:
+                    stream.flush()
+                    writer.sync()   # dữ liệu phải nằm trong file trước khi journal ghi nhận
+                    journal.add(committed, pos)
+                    committed = pos
+        except BaseException:
+            src.close()
+            try:
+                stream.flush()
+                writer.sync()
+            except Exception:
+                pass   # lỗi gốc mới là lỗi cần báo; phần chưa vào journal sẽ được tải lại
+            else:
+                journal.add(committed, pos)
+            raise
+        src.close()
+        stream.flush()
+        writer.sync()
+        journal.add(committed, pos)
+
+    def _fetch_pieces(self, resp, opened, pieces, writer, progress, control, journal, hasher=None):
+        """Download ``pieces`` with up to ``segments`` connections.
+
+        ``opened`` maps piece indexes to responses that are already open
+        (the initial response and the range probe).
+        """
+        abort = threading.Event()
+        errors = []
+        lock = threading.Lock()
+        count = min(max(1, self.segments), len(pieces))
+        queue = list(pieces[count:])
+
+        def checkpoint():
+            if abort.is_set():
+                raise DownloadCancelled("Aborted")
+            if control:
+                control.checkpoint()
+
+        def run(src, piece):
+            while True:
+                try:
+                    if src is None:
+                        src = self._open_range(resp, *piece)
+                        if src is None:
+                            raise DownloadError("Server stopped honouring Range requests", kind="network")
+                    self._fetch_range(src, resp, writer, piece[0], piece[1], progress, checkpoint, journal, hasher)
+                except BaseException as e:
+                    errors.append(e)
+                    abort.set()
+                    return
+                finally:
+                    if src is not None:
+                        src.close()
+                src = None
+                with lock:
+                    if not queue or abort.is_set():
+                        return
+                    piece = queue.pop(0)
+
+        for i, src in opened.items():
+            if i >= count:
+                src.close()
+        threads = []
+        for i, piece in enumerate(pieces[:count]):
+            src = opened.get(i)
+            t = threading.Thread(target=run, args=(src, piece), daemon=True, name=f"segment-{i}")
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        if errors:
+            # báo lỗi thật, không phải DownloadCancelled của các segment bị abort theo
+            raise next((e for e in errors if not isinstance(e, DownloadCancelled)), errors[0])
+
+    def _verify(self, part, name, file_id, hasher, expected_md5, digests, journal):
+        """Integrity checks on the finished ``part``; raises DownloadError on failure."""
+        problem = None
+        if looks_like_html(part, name):
+            with open(part, "rb") as f:
+                reason = self._page_error(f.read(MAX_PAGE_SIZE).decode("utf-8", "replace"))
+            problem = "Drive returned a web page instead of the file" + (f": {reason}" if reason else "")
+        elif hasher:
+            result = hasher.finish(part)
+            if digests is not None:
+                digests.update(result)
+            if expected_md5 and result["md5"] != expected_md5.lower():
+                problem = f"Checksum mismatch: expected MD5 {expected_md5}, got {result['md5']}"
+        if problem is None:
+            return
+        # nội dung sai: bỏ cả .part lẫn journal (không resume từ dữ liệu hỏng), quên URL đã cache
+        if journal:
+            journal.remove()
+        os.remove(part)
+        if self.meta_cache is not None and file_id:
+            self.meta_cache.invalidate(file_id)
+        raise DownloadError(problem, kind="integrity")
+
+    @staticmethod
+    def file_id_for(url):
+        return extract_file_id(url)
+
+    def download(self, url, out_folder, on_start=None, on_progress=None, control=None,
+                 expected_md5=None, digests=None, target=None):
+        """Download ``url`` into ``out_folder`` and return the saved path.
+
+        ``target(filename)``, if given, chooses the path instead (see
+        :class:`~drivecore.naming.NameIndex`); when it returns None the
+        file is not downloaded and None is returned.
+
+        ``on_start(filename, total)`` is called once the name is known
+        (``total`` is ``None`` if the server did not send a length),
+        ``on_progress(done, total)`` after every chunk. ``control`` (a
+        :class:`~drivecore.control.TransferControl`) is checked between
+        chunks: pausing it stalls the transfer, stopping it raises
+        DownloadCancelled.
+
+        When the size is known and the server accepts ranges, bytes go to
+        ``<name>.part`` with a :class:`PartJournal` next to it; a later call
+        for the same file resumes from whatever ranges are already there.
+
+        The file is checked before it is renamed into place: an HTML page
+        where a binary was expected, or an MD5 different from
+        ``expected_md5`` (or the one the server/cache declares), raises
+        DownloadError and discards the partial file. The computed digests
+        are stored into the ``digests`` dict if one is given.
+        """
+        resp = self.resolve(url)
+        part = journal = writer = bucket = throttle = None
+        if self.limiter:
+            bucket = self.limiter.file_bucket()
+
+            def throttle(n):
+                delay = self.limiter.reserve(n, bucket)
+                if delay > 0:
+                    (control.sleep if control else time.sleep)(delay)
+        try:
+            name = self.filename_for(resp)
+            path = target(name) if target else os.path.join(out_folder, name)
+            if path is None:
+                return None
+            name = os.path.basename(path)
+            length = resp.getheader("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+            etag = resp.getheader("ETag")
+            file_id = self.file_id_for(url)
+            if not expected_md5:
+                cached = self.meta_cache.get(file_id) if self.meta_cache is not None and file_id else None
+                expected_md5 = self.md5_for(resp) or (cached or {}).get("md5")
+            algorithms = self.hashes + (("md5",) if expected_md5 and "md5" not in self.hashes else ())
+            hasher = _Hasher(algorithms) if algorithms else None
+            part = path + ".part"
+            accepts_ranges = "bytes" in (resp.getheader("Accept-Ranges") or "").lower()
+            if on_start:
+                on_start(name, total)
+
+            if total is not None and accepts_ranges:
+                journal = PartJournal.load(part)
+                opened = {}
+                if (journal and journal.matches(file_id, total, etag)
+                        and os.path.exists(part) and os.path.getsize(part) == total):
+                    pieces = self._split(journal.missing())
+                    first = self._open_range(resp, *pieces[0]) if pieces else None
+                    if first is not None or not pieces:
+                        resp.close()   # tiếp tục từ journal, không cần response đầu
+                        opened = {0: first} if first is not None else {}
+                    else:
+                        journal = None
+                else:
+                    journal = None
+                if journal is None:
+                    journal = PartJournal(part, url=url, file_id=file_id, size=total, etag=etag)
+                    writer = self._writer(part, total)   # preallocate: các segment ghi đúng offset, ít phân mảnh
+                    journal.save()
+                    pieces = self._split([(0, total)])
+                    opened = {0: resp}
+                    if len(pieces) > 1:
+                        probe = self._open_range(resp, *pieces[1])
+                        if probe is None:
+                            pieces = [(0, total)]   # Range bị bỏ qua: một luồng
+                        else:
+                            opened[1] = probe
+                else:
+                    writer = self._writer(part, total, truncate=False)
+                progress = _Progress(total, on_progress, done=journal.completed(), throttle=throttle)
+                if pieces:
+                    self._fetch_pieces(resp, opened, pieces, writer, progress, control, journal, hasher)
+                writer.close()
+                if journal.missing() or os.path.getsize(part) != total:
+                    raise DownloadError(f"Incomplete download: got {journal.completed()} of {total} bytes",
+                                        kind="network")
+            else:
+                # không biết kích thước / không hỗ trợ Range: tải một luồng, không resume được
+                progress = _Progress(total, on_progress, throttle=throttle)
+                writer = self._writer(part, total)
+                stream = writer.stream()
+                self._copy(resp, stream, total, progress, control.checkpoint if control else lambda: None, hasher)
+                stream.flush()
+                writer.close()
+                if total is not None and progress.done != total:
+                    raise DownloadError(f"Incomplete download: got {progress.done} of {total} bytes",
+                                        kind="network")
+
+            self._verify(part, name, file_id, hasher, expected_md5, digests, journal)
+            os.replace(part, path)
+            part = None
+            if journal:
+                journal.remove()
+            return path
+        finally:
+            resp.close()
+            if writer is not None:
+                writer.close(raise_errors=False)   # ghi nốt phần đã nhận để journal khớp với file
+            if bucket is not None:
+                self.limiter.release(bucket)
+            if part and os.path.exists(part):
+                if journal:
+                    journal.save()   # giữ .part + journal để lần sau tải tiếp
+                else:
+                    os.remove(part)
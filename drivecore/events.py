@@ -0,0 +1,153 @@
+"""Coalescing event bus between download threads and a UI.
+
+Transfer threads report status, size, progress, speed and log events as
+often as they like; the bus keeps only the latest value of each (per job
+where that applies) plus every log line, and hands the lot to a sink as a
+single :class:`EventBatch` on a fixed tick. However many files run in
+parallel, the sink is called at most ``1 / interval`` times per second.
+``on_tick`` runs just before each flush, for values that are computed
+per tick rather than reported (smoothed speed and ETA).
+"""
+import threading
+
+FLUSH_INTERVAL = 0.1   # 10 Hz
+
+
+class EventBatch:
+    """Everything that happened since the previous flush.
+
+    ``statuses`` maps job id -> ``(status, filename)``, ``sizes`` job id
+    -> size text, ``bytes`` job id -> bytes downloaded so far and
+    ``errors`` job id -> last error message and ``rates`` job id ->
+    ``(speed, eta)`` text (empty once the job stops transferring), latest
+    value only; ``attempts`` counts downloads started per job id since the
+    last flush. ``progress``/``speed``/``eta``/``total`` are None when
+    unchanged; ``logs`` is every ``(message, level)`` in order.
+    """
+
+    __slots__ = ("statuses", "sizes", "bytes", "errors", "rates", "attempts", "progress", "speed", "eta", "total",
+                 "logs")
+
+    def __init__(self):
+        self.statuses = {}
+        self.sizes = {}
+        self.bytes = {}
+        self.errors = {}
+        self.rates = {}
+        self.attempts = {}
+        self.progress = None
+        self.speed = None
+        self.eta = None
+        self.total = None
+        self.logs = []
+
+    def __bool__(self):
+        return bool(self.statuses or self.sizes or self.bytes or self.errors or self.rates or self.attempts
+                    or self.logs or self.progress is not None or self.speed is not None or self.eta is not None
+                    or self.total is not None)
+
+
+class EventBus:
+    """Collects events from any thread and flushes them to ``sink`` in batches."""
+
+    def __init__(self, sink, interval=FLUSH_INTERVAL, on_tick=None):
+        self._sink = sink
+        self.interval = interval
+        self._on_tick = on_tick
+        self._lock = threading.Lock()
+        self._batch = EventBatch()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"events": 0, "flushes": 0}
+
+    # --- producers ---
+    def status(self, job_id, status, filename):
+        with self._lock:
+            self._batch.statuses[job_id] = (status, filename)
+            self.stats["events"] += 1
+
+    def size(self, job_id, text):
+        with self._lock:
+            self._batch.sizes[job_id] = text
+            self.stats["events"] += 1
+
+    def bytes(self, job_id, done):
+        with self._lock:
+            self._batch.bytes[job_id] = done
+            self.stats["events"] += 1
+
+    def error(self, job_id, message):
+        with self._lock:
+            self._batch.errors[job_id] = message
+            self.stats["events"] += 1
+
+    def rate(self, job_id, speed, eta):
+        with self._lock:
+            self._batch.rates[job_id] = (speed, eta)
+            self.stats["events"] += 1
+
+    def attempt(self, job_id):
+        with self._lock:
+            self._batch.attempts[job_id] = self._batch.attempts.get(job_id, 0) + 1
+            self.stats["events"] += 1
+
+    def progress(self, pct):
+        with self._lock:
+            self._batch.progress = pct
+            self.stats["events"] += 1
+
+    def speed(self, text):
+        with self._lock:
+            self._batch.speed = text
+            self.stats["events"] += 1
+
+    def eta(self, text):
+        with self._lock:
+            self._batch.eta = text
+            self.stats["events"] += 1
+
+    def total(self, text):
+        with self._lock:
+            self._batch.total = text
+            self.stats["events"] += 1
+
+    def log(self, message, level="INFO"):
+        with self._lock:
+            self._batch.logs.append((message, level))
+            self.stats["events"] += 1
+
+    # --- flushing ---
+    def drain(self):
+        """Take the pending batch (None if nothing happened)."""
+        with self._lock:
+            if not self._batch:
+                return None
+            batch, self._batch = self._batch, EventBatch()
+            return batch
+
+    def flush(self):
+        if self._on_tick is not None:
+            self._on_tick()
+        batch = self.drain()
+        if batch is not None:
+            self.stats["flushes"] += 1
+            self._sink(batch)
+
+    def _run(self):
+        # waiting a full interval after each flush is what guarantees the cap
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="EventBus", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop ticking and deliver whatever is still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
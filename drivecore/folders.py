@@ -0,0 +1,92 @@
+"""Recursive listing of shared Google Drive folders.
+
+Folders are read from Drive's ``embeddedfolderview`` page, which lists the
+direct children of a public folder as plain HTML. :func:`iter_folder` walks
+the tree lazily: the files of a folder are yielded as soon as that folder
+has been listed, before any of its subfolders are fetched, so callers can
+start downloading while the rest of the tree is still being enumerated.
+"""
+import html
+import re
+
+from .engine import DownloadError, _safe_name
+
+FOLDER_LIST_URL = "https://drive.google.com/embeddedfolderview?id={}"
+MAX_DEPTH = 32
+
+_RE_ENTRY = re.compile(
+    r'<div class="flip-entry" id="entry-([A-Za-z0-9_-]+)".*?'
+    r'<a href="([^"]*)".*?'
+    r'<div class="flip-entry-title">(.*?)</div>', re.S)
+_RE_TITLE = re.compile(r"<title>(.*?)</title>", re.S | re.I)
+
+
+class FolderEntry:
+    """One file found inside a folder tree.
+
+    ``path`` is the list of folder names from the root folder (included)
+    down to the folder holding the file.
+    """
+
+    __slots__ = ("file_id", "name", "path")
+
+    def __init__(self, file_id, name, path):
+        self.file_id = file_id
+        self.name = name
+        self.path = path
+
+    @property
+    def subdir(self):
+        """``path`` joined with ``/``, for use below a destination folder."""
+        return "/".join(self.path)
+
+    def __repr__(self):
+        return f"FolderEntry({self.file_id!r}, {self.subdir + '/' + self.name!r})"
+
+
+def parse_folder_page(page):
+    """Parse an ``embeddedfolderview`` page into ``(title, children)``.
+
+    ``children`` is a list of ``(id, name, is_folder)`` in page order.
+    """
+    m = _RE_TITLE.search(page)
+    title = html.unescape(m.group(1)).strip() if m else None
+    children = []
+    for file_id, href, name in _RE_ENTRY.findall(page):
+        is_folder = "/folders/" in href or "folderview" in href
+        children.append((file_id, html.unescape(name).strip(), is_folder))
+    return title, children
+
+
+def iter_folder(engine, folder_id, path=None, list_url=FOLDER_LIST_URL, control=None,
+                max_depth=MAX_DEPTH):
+    """Yield a :class:`FolderEntry` for every file below ``folder_id``.
+
+    Depth-first, one listing request per folder, performed only when the
+    generator is advanced that far. ``path`` defaults to the root folder's
+    own name; folders seen twice (shortcuts looping back) are skipped.
+    ``control`` is checked before each listing so stop/pause apply.
+    """
+    seen = set()
+    stack = [(folder_id, list(path) if path is not None else None, 0)]
+    while stack:
+        fid, where, depth = stack.pop()
+        if fid in seen:
+            continue
+        seen.add(fid)
+        if control:
+            control.wait_if_paused()
+            control.checkpoint()
+        title, children = parse_folder_page(engine.fetch_page(list_url.format(fid)))
+        if where is None:
+            if title is None:
+                raise DownloadError(f"Not a shared Drive folder: {fid}")
+            where = [_safe_name(title)]
+        subfolders = []
+        for child_id, name, is_folder in children:
+            if is_folder:
+                subfolders.append((child_id, where + [_safe_name(name)], depth + 1))
+            else:
+                yield FolderEntry(child_id, _safe_name(name), where)
+        if depth < max_depth:
+            stack.extend(reversed(subfolders))
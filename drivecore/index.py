@@ -0,0 +1,137 @@
+"""Index of completed downloads kept inside the destination folder.
+
+``.hishiro_index.json`` maps Drive file ids to the file saved for them
+(path relative to the folder, size, MD5 and SHA-256 if known, mtime). A
+later batch into the same folder skips those ids without touching the
+network.
+
+Validation is incremental: an entry whose size and mtime still match the
+file on disk is trusted as is; only files whose mtime changed are re-hashed
+(when a hash is known) before being kept.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+INDEX_NAME = ".hishiro_index.json"
+SAVE_INTERVAL = 5.0
+HASH_CHUNK = 1024 * 1024
+
+
+def file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+class DownloadIndex:
+    """``file_id -> {path, size, md5, sha256, mtime_ns}`` for one destination folder."""
+
+    def __init__(self, folder, name=INDEX_NAME):
+        self.folder = folder
+        self.path = os.path.join(folder, name)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _abspath(self, entry):
+        return os.path.join(self.folder, entry["path"])
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._entries = {k: v for k, v in data.items() if isinstance(v, dict) and "path" in v}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_save = time.monotonic()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+
+    def save_if_due(self):
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+
+    def _still_valid(self, entry):
+        """Check one entry against the disk; may update its mtime. Caller holds the lock."""
+        try:
+            st = os.stat(self._abspath(entry))
+        except OSError:
+            return False
+        if st.st_size != entry.get("size"):
+            return False
+        if st.st_mtime_ns == entry.get("mtime_ns"):
+            return True
+        # mtime đổi: chỉ chấp nhận nếu nội dung vẫn khớp hash đã lưu
+        if entry.get("md5") and file_md5(self._abspath(entry)) == entry["md5"]:
+            entry["mtime_ns"] = st.st_mtime_ns
+            self._dirty = True
+            return True
+        return False
+
+    def refresh(self):
+        """Drop entries whose file vanished or changed; returns how many were dropped."""
+        with self._lock:
+            stale = [k for k, v in self._entries.items() if not self._still_valid(v)]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self._dirty = True
+        self.save()
+        return len(stale)
+
+    def lookup(self, file_id):
+        """The entry for ``file_id`` if its file is still there, else None."""
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                return None
+            if not self._still_valid(entry):
+                del self._entries[file_id]
+                self._dirty = True
+                return None
+            return dict(entry, abspath=self._abspath(entry))
+
+    def record(self, file_id, path, md5=None, sha256=None):
+        """Remember that ``file_id`` was saved to ``path`` (inside the folder)."""
+        st = os.stat(path)
+        with self._lock:
+            self._entries[file_id] = {"path": os.path.relpath(path, self.folder), "size": st.st_size,
+                                      "md5": md5, "sha256": sha256, "mtime_ns": st.st_mtime_ns}
+            self._dirty = True
+        self.save_if_due()
+
+    def adopt(self, file_id, filename, size):
+        """Index a file that is already in the folder with the expected name and size.
+
+        Covers files downloaded before the index existed (or by gdown);
+        returns the new entry or None.
+        """
+        if not filename or size is None:
+            return None
+        path = os.path.join(self.folder, filename)
+        try:
+            if os.path.getsize(path) != size:
+                return None
+        except OSError:
+            return None
+        self.record(file_id, path)
+        return self.lookup(file_id)
@@ -0,0 +1,343 @@
+"""In-memory list of queued links and their display state.
+
+Kept free of Qt so the same store can back the GUI table model and
+anything else that needs the queue. Every job gets an id that never
+changes, so a download can keep reporting progress while rows are added,
+moved or removed around it.
+"""
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+STATUS_PENDING = "Pending"
+STATUS_STOPPED = "Stopped"          # dừng giữa chừng bởi Stop; mở lại thành Pending, tải tiếp từ .part
+
+# thứ tự JobQueue giao job cho các luồng tải (trong cùng một mức priority)
+POLICY_FIFO = "fifo"                # theo thứ tự của bảng
+POLICY_SHORTEST = "shortest"        # file nhỏ trước (size từ pre-flight; chưa biết size thì xếp sau)
+POLICY_ROUND_ROBIN = "round_robin"  # lần lượt từng link: folder lớn không chặn các link khác
+POLICIES = (POLICY_FIFO, POLICY_SHORTEST, POLICY_ROUND_ROBIN)
+
+
+class Job:
+    """One link in the queue and what the table shows for it.
+
+    Jobs with a higher ``priority`` are downloaded first, whatever the
+    scheduling policy. ``template`` names the job's files (see
+    :mod:`drivecore.naming`); empty means the batch's template.
+    ``speed``/``eta`` are only shown while the job transfers and are not
+    stored.
+    """
+
+    __slots__ = ("job_id", "link", "status", "filename", "size", "priority", "template", "speed", "eta")
+
+    def __init__(self, link, status=STATUS_PENDING, filename="N/A", size="—", job_id=None, priority=0,
+                 template=""):
+        self.job_id = job_id
+        self.link = link
+        self.status = status
+        self.filename = filename
+        self.size = size
+        self.priority = priority
+        self.template = template
+        self.speed = ""
+        self.eta = ""
+
+
+class JobStore:
+    """Ordered jobs addressed by row or by id.
+
+    ``job_id -> row`` is kept as an index that is repaired lazily: edits
+    only record the first row whose position changed, and :meth:`row_of`
+    renumbers from there on demand, so bursts of status updates and edits
+    cost O(changed rows) instead of a rebuild each time.
+    """
+
+    def __init__(self):
+        self._jobs = []
+        self._rows = {}
+        self._valid_to = 0            # rows below this have a correct entry in _rows
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __getitem__(self, row):
+        return self._jobs[row]
+
+    def __iter__(self):
+        return iter(self._jobs)
+
+    def links(self):
+        return [job.link for job in self._jobs]
+
+    def ids(self):
+        return [job.job_id for job in self._jobs]
+
+    def _invalidate(self, row):
+        self._valid_to = min(self._valid_to, row)
+
+    def row_of(self, job_id):
+        """Current row of ``job_id``, or None if it was removed."""
+        row = self._rows.get(job_id)
+        if row is not None and row < self._valid_to:
+            return row
+        for r in range(self._valid_to, len(self._jobs)):
+            self._rows[self._jobs[r].job_id] = r
+        self._valid_to = len(self._jobs)
+        return self._rows.get(job_id)
+
+    def get(self, job_id):
+        row = self.row_of(job_id)
+        return None if row is None else self._jobs[row]
+
+    def extend(self, jobs):
+        """Append ``jobs``; returns the ``(first, last)`` rows.
+
+        Jobs without an id get a fresh one; jobs that already carry one
+        (reloaded from disk) keep it, and later ids continue after it.
+        """
+        first = len(self._jobs)
+        for job in jobs:
+            if job.job_id is None:
+                job.job_id = self._next_id
+            self._next_id = max(self._next_id, job.job_id + 1)
+            self._rows[job.job_id] = len(self._jobs)
+            self._jobs.append(job)
+        if self._valid_to == first:
+            self._valid_to = len(self._jobs)
+        return first, len(self._jobs) - 1
+
+    def remove_range(self, first, last):
+        """Drop rows ``first..last`` (inclusive); returns the removed ids."""
+        removed = [job.job_id for job in self._jobs[first:last + 1]]
+        del self._jobs[first:last + 1]
+        for job_id in removed:
+            self._rows.pop(job_id, None)
+        self._invalidate(first)
+        return removed
+
+    def move(self, row, new_row):
+        self._jobs.insert(new_row, self._jobs.pop(row))
+        self._invalidate(min(row, new_row))
+
+    def move_rows(self, rows, dest):
+        """Move ``rows`` (in their current order) to start at ``dest`` of the remaining list."""
+        rows = sorted(set(rows))
+        picked = [self._jobs[r] for r in rows]
+        keep = set(rows)
+        rest = [job for r, job in enumerate(self._jobs) if r not in keep]
+        self._jobs = rest[:dest] + picked + rest[dest:]
+        self._invalidate(min(rows[0], dest) if rows else dest)
+
+    def clear(self):
+        self._jobs = []
+        self._rows = {}
+        self._valid_to = 0
+
+
+class JobQueue:
+    """Thread-safe queue of jobs waiting for a download slot.
+
+    Items are ``(key, job)``; ``key`` is the id of the table row the job
+    belongs to (several files of one folder link share a key), so
+    :meth:`discard` and :meth:`reorder` can act on rows the user edited
+    while the batch runs.
+
+    Jobs come out by key priority (:meth:`set_priority`), then by
+    ``policy`` (see :data:`POLICIES`): queue order, smallest ``size``
+    first, or one job per key in turn. The pending jobs are a heap, so
+    :meth:`get` stays O(log n); changing the policy or a priority
+    re-sorts them once.
+
+    :meth:`get` blocks while the queue is empty but more work may still
+    arrive - a producer (folder lister, links added mid-run) is registered
+    or another consumer is still busy - and returns None once nothing can
+    arrive any more. The queue is then closed and :meth:`put` refuses work.
+
+    :meth:`put_later` parks a job (e.g. a retry) until a given delay has
+    passed and then appends it at the back; parked jobs keep :meth:`get`
+    waiting but never hold up the jobs that are ready.
+
+    Keys passed to :meth:`discard` stay removed: later :meth:`put` and
+    :meth:`put_later` calls for them (files of a folder still being
+    listed, retries of a transfer that was in flight) are refused until
+    :meth:`restore` is called.
+    """
+
+    def __init__(self, policy=POLICY_FIFO, clock=time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy: {policy!r}")
+        self.policy = policy
+        self._cond = threading.Condition()
+        self._items = []                  # heap of (rank, seq, key, job, size, turn)
+        self._delayed = []                # heap of (ready_at, seq, key, job, size)
+        self._seq = itertools.count()
+        self._priority = {}               # key -> priority (mặc định 0)
+        self._turns = collections.Counter()  # key -> số job đã xếp hàng (cho round robin)
+        self._removed = set()             # key đã bị xoá khỏi bảng: không nhận job mới của chúng
+        self._clock = clock
+        self._busy = 0
+        self._producers = 0
+        self._closed = False
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items) + len(self._delayed)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _rank(self, key, size, turn):
+        if self.policy == POLICY_SHORTEST:
+            second = size if size is not None else float("inf")
+        elif self.policy == POLICY_ROUND_ROBIN:
+            second = turn
+        else:
+            second = 0
+        return -self._priority.get(key, 0), second
+
+    def _push(self, key, job, size, seq=None):
+        turn = self._turns[key]
+        self._turns[key] += 1
+        seq = next(self._seq) if seq is None else seq
+        heapq.heappush(self._items, (self._rank(key, size, turn), seq, key, job, size, turn))
+
+    def _resort(self, items):
+        # xếp lại toàn bộ heap theo priority/policy hiện tại (giữ seq: thứ tự trong hàng không đổi)
+        self._items = [(self._rank(key, size, turn), seq, key, job, size, turn)
+                       for _, seq, key, job, size, turn in items]
+        heapq.heapify(self._items)
+
+    def put(self, key, job, size=None):
+        """Queue ``job`` at the back; ``size`` (bytes, if known) is used by the shortest-first policy."""
+        with self._cond:
+            if self._closed or key in self._removed:
+                return False
+            self._push(key, job, size)
+            self._cond.notify()
+            return True
+
+    def put_later(self, key, job, delay, size=None):
+        """Queue ``job`` at the back once ``delay`` seconds have passed."""
+        with self._cond:
+            if self._closed or key in self._removed:
+                return False
+            heapq.heappush(self._delayed, (self._clock() + delay, next(self._seq), key, job, size))
+            self._cond.notify()
+            return True
+
+    def _promote(self):
+        # chuyển các job đã hết thời gian chờ xuống cuối hàng; trả về số giây tới job kế tiếp
+        now = self._clock()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, key, job, size = heapq.heappop(self._delayed)
+            self._push(key, job, size)
+        return self._delayed[0][0] - now if self._delayed else None
+
+    def get(self):
+        """Next job, or None when the batch is over; pair with :meth:`task_done`."""
+        with self._cond:
+            while True:
+                wait = self._promote()
+                if self._items:
+                    self._busy += 1
+                    return heapq.heappop(self._items)[3]
+                if self._closed or (wait is None and self._busy == 0 and self._producers == 0):
+                    self._closed = True
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait(wait)
+
+    def task_done(self):
+        with self._cond:
+            self._busy -= 1
+            self._cond.notify_all()
+
+    def add_producer(self):
+        """Register a producer; False if the queue is already closed."""
+        with self._cond:
+            if self._closed:
+                return False
+            self._producers += 1
+            return True
+
+    def remove_producer(self):
+        with self._cond:
+            self._producers -= 1
+            self._cond.notify_all()
+
+    def discard(self, keys):
+        """Drop every queued job whose key is in ``keys`` and refuse new ones; returns how many."""
+        keys = set(keys)
+        with self._cond:
+            self._removed |= keys
+            before = len(self._items) + len(self._delayed)
+            self._items = [item for item in self._items if item[2] not in keys]
+            heapq.heapify(self._items)
+            self._delayed = [item for item in self._delayed if item[2] not in keys]
+            heapq.heapify(self._delayed)
+            return before - len(self._items) - len(self._delayed)
+
+    def removed(self, key):
+        """True if ``key`` was discarded (and not restored)."""
+        with self._cond:
+            return key in self._removed
+
+    def restore(self, keys):
+        """Accept jobs for ``keys`` again after :meth:`discard`."""
+        with self._cond:
+            self._removed.difference_update(keys)
+
+    def reorder(self, keys):
+        """Make the queue order follow the position of each job's key in ``keys``."""
+        rank = {key: i for i, key in enumerate(keys)}
+        with self._cond:
+            last = len(rank)
+            items = sorted(self._items, key=lambda item: (rank.get(item[2], last), item[1]))
+            # số thứ tự mới, lớn hơn mọi seq cũ: job thêm sau vẫn xếp cuối hàng
+            self._resort([(None, next(self._seq), key, job, size, turn)
+                          for _, _, key, job, size, turn in items])
+
+    def set_policy(self, policy):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy: {policy!r}")
+        with self._cond:
+            if policy != self.policy:
+                self.policy = policy
+                self._resort(self._items)
+
+    def set_priority(self, keys, priority):
+        """Give ``keys`` (queued now or later) ``priority``; higher goes first, default 0."""
+        with self._cond:
+            for key in keys:
+                if priority:
+                    self._priority[key] = priority
+                else:
+                    self._priority.pop(key, None)
+            self._resort(self._items)
+
+    def close(self):
+        """Refuse new work and wake every waiting consumer."""
+        with self._cond:
+            self._closed = True
+            self._items = []
+            self._delayed = []
+            self._cond.notify_all()
+
+
+def contiguous_ranges(rows):
+    """Group row numbers into ``(first, last)`` runs, last run first.
+
+    Removing the runs in this order keeps the earlier row numbers valid.
+    """
+    runs = []
+    for row in sorted(set(rows)):
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return [tuple(r) for r in reversed(runs)]
@@ -0,0 +1,99 @@
+"""Sidecar journal for resumable ``.part`` files.
+
+``<name>.part.json`` records where the bytes came from (URL, Drive file id,
+size, ETag) and which byte ranges of ``<name>.part`` are already on disk,
+so an interrupted download can continue with Range requests.
+"""
+import json
+import os
+import threading
+import time
+
+SAVE_INTERVAL = 1.0   # seconds between journal rewrites while downloading
+
+
+class PartJournal:
+    """Completed byte ranges of one ``.part`` file (half-open ``[start, stop)``)."""
+
+    def __init__(self, part_path, url=None, file_id=None, size=None, etag=None, ranges=()):
+        self.part_path = part_path
+        self.path = part_path + ".json"
+        self.url = url
+        self.file_id = file_id
+        self.size = size
+        self.etag = etag
+        self.ranges = []
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        for start, stop in ranges:
+            self._merge(start, stop)
+
+    @classmethod
+    def load(cls, part_path):
+        """Read the journal next to ``part_path``; None if missing or unreadable."""
+        try:
+            with open(part_path + ".json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(part_path, url=data.get("url"), file_id=data.get("file_id"),
+                       size=data.get("size"), etag=data.get("etag"),
+                       ranges=[tuple(r) for r in data.get("ranges", [])])
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def matches(self, file_id, size, etag):
+        """True if the journal describes the same remote file."""
+        if self.size != size or (self.file_id and file_id and self.file_id != file_id):
+            return False
+        return not (self.etag and etag and self.etag != etag)
+
+    def _merge(self, start, stop):
+        if stop <= start:
+            return
+        merged = []
+        for s, e in self.ranges:
+            if e < start or s > stop:
+                merged.append((s, e))
+            else:
+                start, stop = min(s, start), max(e, stop)
+        merged.append((start, stop))
+        merged.sort()
+        self.ranges = merged
+
+    def add(self, start, stop):
+        """Mark ``[start, stop)`` as written (and flushed) to the .part file."""
+        with self._lock:
+            self._merge(start, stop)
+            due = time.monotonic() - self._last_save >= SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def completed(self):
+        with self._lock:
+            return sum(e - s for s, e in self.ranges)
+
+    def missing(self):
+        """Byte ranges still to download, as half-open ``(start, stop)`` tuples."""
+        with self._lock:
+            gaps, pos = [], 0
+            for s, e in self.ranges:
+                if s > pos:
+                    gaps.append((pos, s))
+                pos = max(pos, e)
+            if self.size is not None and pos < self.size:
+                gaps.append((pos, self.size))
+            return gaps
+
+    def save(self):
+        with self._lock:
+            data = {"url": self.url, "file_id": self.file_id, "size": self.size,
+                    "etag": self.etag, "ranges": [list(r) for r in self.ranges]}
+            self._last_save = time.monotonic()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    def remove(self):
+        for p in (self.path, self.path + ".tmp"):
+            if os.path.exists(p):
+                os.remove(p)
@@ -0,0 +1,119 @@
+"""Google Drive link helpers."""
+import os
+import re
+
+DRIVE_URL = "https://drive.google.com"
+DRIVE_URL_ENV = "HISHIRO_DRIVE_URL"   # e.g. http://127.0.0.1:8765 to talk to benchmarks.fake_drive
+DRIVE_DOWNLOAD_URL = DRIVE_URL + "/uc?id={}&export=download"
+FILE_URL = "https://drive.google.com/file/d/{}/view"
+FOLDER_URL = "https://drive.google.com/drive/folders/{}"
+
+KIND_FILE = "file"
+KIND_FOLDER = "folder"
+
+# tìm mốc bằng str.find (C, rất nhanh) rồi chỉ match id ngay tại đó; folder được ưu tiên như trước
+_PATH_MARKERS = (("/folders/", KIND_FOLDER), ("/file/d/", KIND_FILE))
+_RE_ID = re.compile(r"[A-Za-z0-9_-]+")
+_RE_ID_PARAM = re.compile(r"[?&]id=([A-Za-z0-9_-]+)")
+# link Drive bất kỳ trong văn bản tự do / HTML / CSV (có hoặc không có scheme), lấy luôn id
+# trong cùng một lần quét: (phần path trước mốc, "file/d" | "folders" | "" cho ?id=, id)
+_RE_DRIVE_LINK = re.compile(r"(?:drive|docs|drive\.usercontent)\.google\.com([^\s\"'<>,;()]*?)"
+                            r"(?:/(file/d|folders)/|[?&]id=)([A-Za-z0-9_-]+)")
+
+
+def parse_link(url):
+    """``(kind, id)`` for a Drive file or folder link, or None.
+
+    ``kind`` is :data:`KIND_FILE` or :data:`KIND_FOLDER`; the host is not
+    checked, so direct ``uc?id=`` URLs of any server work too.
+    """
+    for marker, kind in _PATH_MARKERS:
+        i = url.find(marker)
+        if i >= 0:
+            m = _RE_ID.match(url, i + len(marker))
+            if m:
+                return kind, m.group()
+    m = _RE_ID_PARAM.search(url)
+    if not m:
+        return None
+    return (KIND_FOLDER if "folderview" in url else KIND_FILE), m.group(1)
+
+
+def extract_file_id(url):
+    """The Drive file id in ``url`` (``/file/d/<id>`` or ``?id=<id>``), or None.
+
+    Folder links are not files and return None.
+    """
+    parsed = parse_link(url)
+    return parsed[1] if parsed and parsed[0] == KIND_FILE else None
+
+
+def extract_folder_id(url):
+    """The Drive folder id in ``url`` (``/drive/folders/<id>``, ``folderview?id=``), or None."""
+    parsed = parse_link(url)
+    return parsed[1] if parsed and parsed[0] == KIND_FOLDER else None
+
+
+def drive_base_url(override=None):
+    """Where Drive requests go: ``override``, else ``$HISHIRO_DRIVE_URL``, else Drive itself."""
+    return (override or os.environ.get(DRIVE_URL_ENV) or DRIVE_URL).rstrip("/")
+
+
+def to_direct_url(url, base_url=DRIVE_URL):
+    """Rewrite a Drive share link to its ``uc?export=download`` form on ``base_url``.
+
+    Links without a recognisable file id are returned unchanged.
+    """
+    file_id = extract_file_id(url)
+    return f"{base_url}/uc?id={file_id}&export=download" if file_id else url
+
+
+def normalize_link(kind, drive_id):
+    """The canonical share URL for ``(kind, id)``."""
+    return (FOLDER_URL if kind == KIND_FOLDER else FILE_URL).format(drive_id)
+
+
+def link_key(url):
+    """What identifies ``url`` for de-duplication: ``(kind, id)``, or the URL itself."""
+    return parse_link(url) or url
+
+
+def iter_links(lines):
+    """Yield ``(kind, id)`` for every Drive link in ``lines`` (any iterable of str).
+
+    Links can sit anywhere in the text - HTML attributes (``&amp;``
+    escaped), CSV cells, prose - and there may be several per line.
+    """
+    findall = _RE_DRIVE_LINK.findall
+    for line in lines:
+        if "&amp;" in line:
+            line = line.replace("&amp;", "&")
+        for path, marker, drive_id in findall(line):
+            if marker == "folders" or (not marker and "folderview" in path):
+                yield KIND_FOLDER, drive_id
+            else:
+                yield KIND_FILE, drive_id
+
+
+def extract_links(text, seen=None):
+    """Normalized, de-duplicated Drive links found in ``text``, in order.
+
+    ``text`` is a string or an iterable of lines (e.g. an open file, read
+    lazily). ``seen`` is a set of ``(kind, id)`` already known - e.g. the
+    queue - and is updated in place.
+    """
+    if isinstance(text, str):
+        text = (text,)
+    seen = set() if seen is None else seen
+    links = []
+    for key in iter_links(text):
+        if key not in seen:
+            seen.add(key)
+            links.append((FOLDER_URL if key[0] == KIND_FOLDER else FILE_URL).format(key[1]))
+    return links
+
+
+def read_link_file(path, seen=None, encoding="utf-8"):
+    """:func:`extract_links` over a text/CSV/HTML file, streamed line by line."""
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        return extract_links(f, seen)
@@ -0,0 +1,94 @@
+"""Bounded in-memory log history and the rotating log file on disk.
+
+Levels are the strings the GUI already uses (``INFO``, ``SUCCESS``,
+``WARNING``, ``ERROR``). The file log lives in the destination folder as
+``.hishiro_download.log`` (plus ``.1``, ``.2``, ... once it rotates), so the
+history of a folder survives restarts and can be shown again.
+"""
+import collections
+import logging
+import logging.handlers
+import os
+import threading
+
+LOG_NAME = ".hishiro_download.log"
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUPS = 3
+RING_LINES = 5000
+
+LEVELS = {"INFO": 0, "SUCCESS": 0, "WARNING": 1, "ERROR": 2}
+_SUCCESS = 25
+_TO_LOGGING = {"INFO": logging.INFO, "SUCCESS": _SUCCESS, "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+logging.addLevelName(_SUCCESS, "SUCCESS")
+
+
+def level_rank(level):
+    return LEVELS.get(level, 0)
+
+
+class LogRing:
+    """The last ``maxlen`` ``(message, level)`` entries; older ones are dropped."""
+
+    def __init__(self, maxlen=RING_LINES):
+        self._entries = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def extend(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def filtered(self, min_rank=0):
+        """Entries at or above ``min_rank`` (see :data:`LEVELS`), oldest first."""
+        with self._lock:
+            return [e for e in self._entries if level_rank(e[1]) >= min_rank]
+
+
+class FileLog:
+    """Rotating log file in ``folder``; one instance per open folder."""
+
+    def __init__(self, folder, name=LOG_NAME, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.folder = folder
+        self.path = os.path.join(folder, name)
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self._handler.setFormatter(logging.Formatter(_FORMAT))
+        # logger riêng theo đường dẫn, không lan lên root logger
+        self._logger = logging.getLogger(f"hishiro.download.{self.path}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+
+    def write(self, entries):
+        for message, level in entries:
+            self._logger.log(_TO_LOGGING.get(level, logging.INFO), message)
+
+    def close(self):
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+    def tail(self, n=RING_LINES):
+        """The last ``n`` entries of the current file as ``(message, level)``."""
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                lines = collections.deque(f, maxlen=n)
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            stamp, sep, rest = line.rstrip("\n").partition(" [")
+            level, sep2, message = rest.partition("] ")
+            if sep and sep2 and level in LEVELS:
+                entries.append((message, level))
+            elif entries:
+                # dòng tiếp theo của một message nhiều dòng
+                entries[-1] = (entries[-1][0] + "\n" + line.rstrip("\n"), entries[-1][1])
+        return entries
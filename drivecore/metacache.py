@@ -0,0 +1,96 @@
+"""Resolve-once cache of Drive file metadata.
+
+Keyed by Drive file id, each entry keeps what the landing/confirm pages
+told us: filename, size, MIME type, MD5 (when the server declares one),
+the final download URL and its confirm token, plus when it was fetched.
+Entries older than ``ttl`` are dropped. The cache is a small JSON file so
+it survives restarts.
+"""
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 6 * 3600          # seconds
+SAVE_INTERVAL = 5.0             # min seconds between writes from save_if_due()
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".hishiro_download")
+DEFAULT_PATH = os.path.join(STATE_DIR, "metadata.json")
+
+FIELDS = ("filename", "size", "mime", "md5", "download_url", "confirm", "fetched_at")
+
+
+class MetadataCache:
+    """Thread-safe ``file_id -> metadata`` map with TTL eviction."""
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._last_save = 0.0
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expired(self, entry):
+        return self._clock() - entry.get("fetched_at", 0) > self.ttl
+
+    def get(self, file_id):
+        """A copy of the entry for ``file_id``, or None if absent/expired."""
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                return None
+            if self._expired(entry):
+                del self._entries[file_id]
+                self._dirty = True
+                return None
+            return dict(entry)
+
+    def put(self, file_id, **fields):
+        """Store/refresh ``file_id``; unknown keys are ignored."""
+        with self._lock:
+            entry = self._entries.setdefault(file_id, {})
+            entry.update((k, v) for k, v in fields.items() if k in FIELDS)
+            entry["fetched_at"] = fields.get("fetched_at", self._clock())
+            self._dirty = True
+
+    def invalidate(self, file_id):
+        with self._lock:
+            if self._entries.pop(file_id, None) is not None:
+                self._dirty = True
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._entries = {k: v for k, v in data.items()
+                             if isinstance(v, dict) and not self._expired(v)}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            live = {k: v for k, v in self._entries.items() if not self._expired(v)}
+            self._entries = live
+            self._dirty = False
+            self._last_save = time.monotonic()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(live, f)
+            os.replace(tmp, self.path)
+
+    def save_if_due(self):
+        """Write the file at most every ``SAVE_INTERVAL`` seconds."""
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
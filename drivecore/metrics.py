@@ -0,0 +1,226 @@
+"""Bytes, smoothed speed and ETA per job and for the whole batch.
+
+Transfer threads only report byte counts; :meth:`TransferMetrics.sample`
+runs on the UI tick and turns the bytes that arrived since the previous
+tick into exponentially weighted moving averages - one per job and one
+for the batch - so several files downloading at once add up to a single
+batch rate, and a stalled transfer decays towards zero instead of keeping
+its last value. ETA is the bytes still to come over the smoothed rate.
+"""
+import collections
+import threading
+import time
+
+HALF_LIFE = 3.0     # seconds for an old rate to count half as much
+IDLE_GRACE = 1.0    # seconds a job keeps its rate between two files (folder links)
+
+Snapshot = collections.namedtuple("Snapshot", "done total speed eta active jobs")
+Snapshot.__doc__ = """Batch state at one tick.
+
+``done``/``total`` are bytes (``total`` only counts files whose size is
+known), ``speed`` bytes/s, ``eta`` seconds or None, ``active`` whether
+anything is transferring, and ``jobs`` maps job id -> ``(speed, eta)``,
+or None once a job has stopped transferring.
+"""
+
+
+def format_eta(seconds):
+    """Remaining time the way tqdm prints it, e.g. ``02:05`` or ``1:02:05``; ``—`` if unknown."""
+    if seconds is None:
+        return "—"
+    minutes, secs = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def _eta(left, speed):
+    if left is None:
+        return None
+    if left == 0:
+        return 0.0
+    return left / speed if speed > 0 else None
+
+
+class _Rate:
+    """Bytes/s smoothed over time, fed with the bytes seen on each tick."""
+
+    __slots__ = ("value", "_age", "_bytes")
+
+    def __init__(self):
+        self.value = 0.0
+        self._age = 0.0
+        self._bytes = 0
+
+    def add(self, nbytes, dt, half_life):
+        if dt <= 0 or (not self._age and not nbytes):
+            return   # chưa có byte nào: chưa tính thời gian (vd. lúc đang pre-flight)
+        self._age += dt
+        if self._age < half_life:
+            # mấy giây đầu: trung bình từ lúc bắt đầu, tránh số ảo của vài tick đầu tiên
+            self._bytes += nbytes
+            self.value = self._bytes / self._age
+        else:
+            keep = 0.5 ** (dt / half_life)
+            self.value = self.value * keep + nbytes / dt * (1 - keep)
+
+
+class _Transfer:
+    __slots__ = ("job_id", "done", "total", "fresh")
+
+    def __init__(self, job_id, total=None):
+        self.job_id = job_id
+        self.done = 0
+        self.total = total
+        self.fresh = False   # lần báo byte đầu tiên của một lần thử: có thể là phần resume
+
+
+class TransferMetrics:
+    """Byte counters per transfer, rolled up per job and for the batch; thread-safe.
+
+    A transfer is one file, identified by any hashable ``key``; several
+    transfers may belong to the same job (the files of a folder link).
+    Its first byte count after :meth:`begin` only sets the baseline, so
+    bytes kept from an interrupted attempt count towards progress but not
+    towards speed.
+    """
+
+    def __init__(self, half_life=HALF_LIFE, idle_grace=IDLE_GRACE, clock=time.monotonic):
+        self.half_life = half_life
+        self.idle_grace = idle_grace
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._transfers = {}                    # key -> _Transfer
+        self._active = set()                    # key của các file đang tải
+        self._jobs = {}                         # job_id -> [_Rate, idle since (None = active)]
+        self._ended = set()                     # job_id không còn file nào sắp tải: bỏ ngay, không chờ
+        self._arrived = collections.Counter()   # job_id -> bytes since the previous sample
+        self._batch = _Rate()
+        self._last = None
+        self.done = 0                           # chỉ tính các file đã biết size, khớp với total
+        self.total = 0
+
+    def _transfer(self, key, job_id):
+        t = self._transfers.get(key)
+        if t is None:
+            t = self._transfers[key] = _Transfer(job_id)
+        return t
+
+    def _set_total(self, t, total):
+        if total is None or total == t.total:
+            return
+        if t.total is None:
+            self.done += t.done
+        self.total += total - (t.total or 0)
+        t.total = total
+
+    # --- producers (luồng tải) ---
+    def expect(self, key, job_id, size):
+        """A queued file of ``size`` bytes: counted in the batch total before it starts."""
+        with self._lock:
+            self._set_total(self._transfer(key, job_id), size)
+
+    def begin(self, key, job_id):
+        """An attempt at ``key`` starts."""
+        with self._lock:
+            t = self._transfer(key, job_id)
+            t.fresh = True
+            self._active.add(key)
+            self._ended.discard(job_id)
+
+    def set_total(self, key, total):
+        """The size of ``key`` became known (or changed)."""
+        with self._lock:
+            t = self._transfers.get(key)
+            if t is not None:
+                self._set_total(t, total)
+
+    def update(self, key, done, total=None):
+        """``done`` bytes of ``key`` are on disk."""
+        with self._lock:
+            t = self._transfers.get(key)
+            if t is None:
+                return
+            self._set_total(t, total)
+            if t.fresh:
+                t.fresh = False
+            elif done > t.done:
+                self._arrived[t.job_id] += done - t.done
+            if t.total is not None:
+                self.done += done - t.done
+            t.done = done
+
+    def end(self, key, keep=True, more=False):
+        """The attempt at ``key`` is over.
+
+        ``keep=False`` drops the file from the batch (given up); ``more``
+        says its job has other files to come, so the job's rate is kept
+        for ``idle_grace`` seconds instead of being cleared at the next tick.
+        """
+        with self._lock:
+            t = self._transfers.get(key)
+            if t is None:
+                return
+            self._active.discard(key)
+            if not more:
+                self._ended.add(t.job_id)
+            if not keep:
+                del self._transfers[key]
+                if t.total is not None:
+                    self.total -= t.total
+                    self.done -= t.done
+            elif t.total is None:
+                self._set_total(t, t.done)   # không biết size trước: xong rồi thì tính theo số byte đã tải
+
+    def forget(self, job_ids):
+        """Drop the unfinished files of ``job_ids`` that are not transferring (removed from the queue)."""
+        job_ids = set(job_ids)
+        with self._lock:
+            for key, t in list(self._transfers.items()):
+                if (t.job_id in job_ids and key not in self._active
+                        and (t.total is None or t.done < t.total)):
+                    del self._transfers[key]
+                    if t.total is not None:
+                        self.total -= t.total
+                        self.done -= t.done
+
+    # --- consumer (tick của UI) ---
+    def sample(self, settle=False):
+        """:class:`Snapshot` of the batch; ``settle`` drops idle jobs at once (end of the batch)."""
+        now = self._clock()
+        with self._lock:
+            dt = now - self._last if self._last is not None else 0.0
+            self._last = now
+            arrived, self._arrived = self._arrived, collections.Counter()
+            self._batch.add(sum(arrived.values()), dt, self.half_life)
+
+            left = {}   # job_id -> bytes còn lại của các file đang tải, None nếu có file chưa biết size
+            for key in self._active:
+                t = self._transfers[key]
+                if t.total is None or left.get(t.job_id, 0) is None:
+                    left[t.job_id] = None
+                else:
+                    left[t.job_id] = left.get(t.job_id, 0) + max(0, t.total - t.done)
+
+            jobs = {}
+            for job_id in left:
+                if job_id not in self._jobs:
+                    self._jobs[job_id] = [_Rate(), None]
+            for job_id, entry in list(self._jobs.items()):
+                rate = entry[0]
+                rate.add(arrived.get(job_id, 0), dt, self.half_life)
+                if job_id in left:
+                    entry[1] = None
+                    jobs[job_id] = (rate.value, _eta(left[job_id], rate.value))
+                    continue
+                if entry[1] is None:
+                    entry[1] = now
+                if settle or job_id in self._ended or now - entry[1] >= self.idle_grace:
+                    del self._jobs[job_id]
+                    self._ended.discard(job_id)
+                    jobs[job_id] = None
+                else:
+                    jobs[job_id] = (rate.value, None)
+
+            speed = self._batch.value
+            eta = _eta(max(0, self.total - self.done), speed) if self.total else None
+            return Snapshot(self.done, self.total, speed, eta, bool(left), jobs)
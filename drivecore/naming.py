@@ -0,0 +1,155 @@
+"""Where each downloaded file goes, and what happens when the name is taken.
+
+A naming template turns a Drive file into a path below the destination
+folder, e.g. ``{folder}/{name}`` (the default: Drive folder structure,
+file name as served) or ``{id}_{name}``. Fields:
+
+* ``name``: the file name Drive serves, ``stem`` and ``ext`` (with the
+  dot) its two halves;
+* ``id``: the Drive file id;
+* ``folder``: the path of the file inside a shared folder link, empty for
+  file links;
+* ``job``: the id of the queue row.
+
+``/`` in a template makes subfolders; empty, ``.`` and ``..`` parts are
+dropped, so a template can never leave the destination folder.
+
+:class:`NameIndex` hands out those paths. Each folder is listed once, the
+first time a file is placed in it; after that every check is a set lookup,
+so placing thousands of files with the same name in one folder costs no
+more disk access than placing one. Names already on disk follow the
+conflict policy (``suffix``: ``name (1).ext``, ``overwrite`` or
+``skip``); two files of the same batch that want the same name always
+get suffixes, never the same path.
+"""
+import os
+import string
+import sys
+import threading
+
+from .engine import _safe_name
+
+DEFAULT_TEMPLATE = "{folder}/{name}"
+FIELDS = ("name", "stem", "ext", "id", "folder", "job")
+
+CONFLICT_SUFFIX = "suffix"        # "name (1).ext", "name (2).ext", ...
+CONFLICT_OVERWRITE = "overwrite"  # thay file có sẵn (chỉ file từ trước batch)
+CONFLICT_SKIP = "skip"            # giữ file có sẵn, không tải
+CONFLICTS = (CONFLICT_SUFFIX, CONFLICT_OVERWRITE, CONFLICT_SKIP)
+
+# hệ thống file mặc định của Windows/macOS không phân biệt hoa thường
+CASE_INSENSITIVE = sys.platform in ("win32", "darwin")
+
+_FORMATTER = string.Formatter()
+
+
+def _key(name):
+    return name.casefold() if CASE_INSENSITIVE else name
+
+
+def check_template(template):
+    """Raise ValueError if ``template`` is malformed or uses an unknown field."""
+    try:
+        fields = [field for _, field, _, _ in _FORMATTER.parse(template) if field is not None]
+    except ValueError as e:
+        raise ValueError(f"invalid template {template!r}: {e}") from None
+    for field in fields:
+        if field not in FIELDS:
+            raise ValueError(f"unknown field {{{field}}} in template {template!r} "
+                             f"(use {', '.join('{' + f + '}' for f in FIELDS)})")
+    return template
+
+
+def render_path(template, name, file_id="", folder="", job=""):
+    """Relative ``/``-separated path for one file under ``template``."""
+    stem, ext = os.path.splitext(name)
+    text = check_template(template or DEFAULT_TEMPLATE).format(
+        name=name, stem=stem, ext=ext, id=file_id or "", folder=folder or "", job=job)
+    parts = [p.strip() for p in text.replace("\\", "/").split("/")]
+    if not parts[-1]:
+        parts[-1] = name   # "{folder}/" = giữ tên gốc trong thư mục đó
+    parts = [_safe_name(p) for p in parts if p not in ("", ".", "..")]
+    return "/".join(parts) or _safe_name(name)
+
+
+class NameIndex:
+    """Paths taken below ``root``, claimed once per file without re-scanning.
+
+    ``owner`` (any hashable, e.g. ``(job_id, url)``) makes a claim sticky:
+    the same owner gets the same path back, so a retried file resumes its
+    ``.part`` instead of picking a new suffix.
+    """
+
+    def __init__(self, root, conflict=CONFLICT_SUFFIX):
+        if conflict not in CONFLICTS:
+            raise ValueError(f"unknown conflict policy: {conflict!r}")
+        self.root = root
+        self.conflict = conflict
+        self._lock = threading.Lock()
+        self._on_disk = {}    # key của thư mục -> key của các tên có sẵn (liệt kê một lần)
+        self._claimed = {}    # (thư mục, tên) -> owner, mọi path đã giao trong batch
+        self._owners = {}     # owner -> path đã giao
+        self._next = {}       # (thư mục, stem, ext) -> số suffix thử tiếp theo
+        self.stats = {"scans": 0, "claims": 0, "renamed": 0, "skipped": 0}
+
+    def _listing(self, folder):
+        """Names on disk in ``folder`` (relative), read on first use. Caller holds the lock."""
+        dkey = _key(folder)
+        names = self._on_disk.get(dkey)
+        if names is None:
+            try:
+                with os.scandir(os.path.join(self.root, *folder.split("/")) if folder else self.root) as it:
+                    names = {_key(e.name) for e in it}
+            except OSError:
+                names = set()   # thư mục chưa có
+            self._on_disk[dkey] = names
+            self.stats["scans"] += 1
+        return names
+
+    def _suffixed(self, folder, name, on_disk):
+        stem, ext = os.path.splitext(name)
+        counter = (_key(folder), _key(stem), _key(ext))
+        n = self._next.get(counter, 1)
+        while True:
+            candidate = f"{stem} ({n}){ext}"
+            ckey = _key(candidate)
+            n += 1
+            if ckey not in on_disk and (_key(folder), ckey) not in self._claimed:
+                break
+        self._next[counter] = n
+        return candidate
+
+    def claim(self, path, owner=None):
+        """The path to save ``path`` to, or None if the policy says skip it."""
+        with self._lock:
+            if owner is not None and owner in self._owners:
+                return self._owners[owner]
+            folder, _, name = path.rpartition("/")
+            on_disk = self._listing(folder)
+            exists = _key(name) in on_disk
+            if exists and self.conflict == CONFLICT_SKIP:
+                self.stats["skipped"] += 1
+                return None
+            if (_key(folder), _key(name)) in self._claimed or (exists and self.conflict == CONFLICT_SUFFIX):
+                name = self._suffixed(folder, name, on_disk)
+                path = f"{folder}/{name}" if folder else name
+                self.stats["renamed"] += 1
+            self._claimed[(_key(folder), _key(name))] = owner
+            if owner is not None:
+                self._owners[owner] = path
+            self.stats["claims"] += 1
+            return path
+
+    def reserve(self, path):
+        """Mark ``path`` as taken by this batch (e.g. a file it keeps), whatever the policy."""
+        with self._lock:
+            folder, _, name = path.rpartition("/")
+            self._claimed.setdefault((_key(folder), _key(name)), None)
+
+    def release(self, owner):
+        """Give back the path claimed by ``owner`` (its download was abandoned)."""
+        with self._lock:
+            path = self._owners.pop(owner, None)
+            if path is not None:
+                folder, _, name = path.rpartition("/")
+                self._claimed.pop((_key(folder), _key(name)), None)
@@ -0,0 +1,116 @@
+"""Keep-alive HTTP(S) connections shared by every request of a DriveEngine.
+
+Without it each file costs a TCP and TLS handshake for the landing page,
+another for the redirect to the content host, and one per probe and
+segment. :class:`ConnectionPool` hands out idle connections to the same
+``scheme://host:port`` instead and offers the host's last TLS session
+when it does have to connect again.
+
+Like urllib3's pools it never blocks: ``per_host`` bounds how many idle
+connections are kept per host, and extra ones are simply closed when
+released, so the segments of one file never wait on each other for a
+connection.
+"""
+import http.client
+import ssl
+import threading
+import time
+
+PER_HOST = 16          # idle connections kept per host
+IDLE_TIMEOUT = 30.0    # seconds; servers drop keep-alive sockets that sit idle longer
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that offers ``session`` for TLS resumption."""
+
+    session = None
+    recorded = False    # session/resumption already noted by the pool
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname,
+                                              session=self.session)
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per ``(scheme, host:port)``; thread-safe.
+
+    ``stats`` counts ``requests`` sent, new ``connections`` (handshakes),
+    connections ``reused`` from the pool, TLS handshakes that resumed a
+    session (``tls_resumed``) and idle connections dropped as ``stale``.
+    """
+
+    def __init__(self, per_host=PER_HOST, idle_timeout=IDLE_TIMEOUT, context=None):
+        self.per_host = per_host
+        self.idle_timeout = idle_timeout
+        self._context = context or ssl.create_default_context()
+        self._lock = threading.Lock()
+        self._idle = {}         # (scheme, netloc) -> [(conn, released_at)], newest last
+        self._sessions = {}     # netloc -> last TLS session seen
+        self.stats = {"requests": 0, "connections": 0, "reused": 0, "tls_resumed": 0, "stale": 0}
+
+    def get(self, scheme, netloc, timeout):
+        """``(conn, reused)``: an idle connection to ``scheme://netloc`` or a new one."""
+        key = (scheme, netloc)
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            self.stats["requests"] += 1
+            idle = self._idle.get(key)
+            conn = None
+            while idle and conn is None:
+                candidate, since = idle.pop()
+                if now - since < self.idle_timeout:
+                    conn = candidate
+                else:
+                    stale.append(candidate)
+            self.stats["stale"] += len(stale)
+            if conn is not None:
+                self.stats["reused"] += 1
+            else:
+                self.stats["connections"] += 1
+                session = self._sessions.get(netloc)
+        for old in stale:
+            old.close()
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+
+        if scheme == "https":
+            conn = _HTTPSConnection(netloc, timeout=timeout, context=self._context)
+            conn.session = session
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=timeout)
+        conn.pool_key = key
+        return conn, False
+
+    def release(self, conn, resp):
+        """Take ``conn`` back after ``resp``; it is only kept if the body was read to the end."""
+        reusable = resp.isclosed() and not resp.will_close and conn.sock is not None
+        resp.close()
+        if isinstance(conn, _HTTPSConnection) and conn.sock is not None and not conn.recorded:
+            # lần đầu connection được trả về: ghi lại session TLS cho lần kết nối sau
+            sock, conn.recorded = conn.sock, True
+            with self._lock:
+                if sock.session_reused:
+                    self.stats["tls_resumed"] += 1
+                if sock.session is not None:
+                    self._sessions[conn.pool_key[1]] = sock.session
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(conn.pool_key, [])
+                if len(idle) < self.per_host:
+                    idle.append((conn, time.monotonic()))
+                    return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
@@ -0,0 +1,74 @@
+"""Pre-flight probing of a whole batch before any file is downloaded."""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .engine import DownloadCancelled, DownloadError
+from .retry import classify, is_retryable
+
+PROBE_CONCURRENCY = 8
+
+
+class ProbeResult:
+    """What the probe learned about one link.
+
+    ``error`` is set when the probe failed and ``kind`` says why (see
+    :func:`drivecore.retry.classify`); a link is only dead if the failure
+    is not one that may clear up on its own.
+    """
+
+    __slots__ = ("url", "filename", "size", "mime", "error", "kind")
+
+    def __init__(self, url, filename=None, size=None, mime=None, error=None, kind=None):
+        self.url = url
+        self.filename = filename
+        self.size = size
+        self.mime = mime
+        self.error = error
+        self.kind = kind
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def transient(self):
+        """The probe failed, but a download attempt (with retries) may still work."""
+        return self.error is not None and is_retryable(self.kind)
+
+
+def _probe_one(engine, url, control):
+    if control:
+        control.checkpoint()
+    try:
+        meta = engine.probe(url)
+    except DownloadCancelled:
+        raise
+    except DownloadError as e:
+        return ProbeResult(url, error=str(e), kind=classify(e))
+    return ProbeResult(url, meta.get("filename"), meta.get("size"), meta.get("mime"))
+
+
+def probe_all(engine, urls, concurrency=PROBE_CONCURRENCY, on_result=None, control=None):
+    """Probe ``urls`` with at most ``concurrency`` requests in flight.
+
+    ``on_result(index, result)`` is called as each probe finishes (from the
+    calling thread). Returns the results in input order; links not probed
+    because ``control`` was stopped are left as None.
+    """
+    results = [None] * len(urls)
+    if not urls:
+        return results
+    pool = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls))),
+                              thread_name_prefix="probe")
+    try:
+        futures = {pool.submit(_probe_one, engine, url, control): i for i, url in enumerate(urls)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except DownloadCancelled:
+                break
+            if on_result:
+                on_result(i, results[i])
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return results
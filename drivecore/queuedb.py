@@ -0,0 +1,264 @@
+"""Persistent copy of the link queue in SQLite.
+
+Every row of the queue - link, status, filename, size, bytes downloaded,
+attempts, the last error, its priority and naming template - is mirrored into
+``~/.hishiro_download/queue.sqlite3`` so closing the app loses nothing.
+Callers only record changes in memory; a background thread writes them
+out in one transaction per ``interval`` with the database in WAL mode, so
+a burst of status updates never waits on the disk. :meth:`QueueDB.load`
+reads the queue back in chunks, letting a large queue appear while the
+window is already usable.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from .jobs import Job, STATUS_PENDING
+from .metacache import STATE_DIR
+
+DEFAULT_PATH = os.path.join(STATE_DIR, "queue.sqlite3")
+WRITE_INTERVAL = 1.0            # seconds between write transactions
+LOAD_CHUNK = 5000               # rows per chunk yielded by load()
+
+# trạng thái giữ nguyên khi mở lại; mọi trạng thái dở dang khác quay về Pending
+FINAL_STATUSES = ("Completed", "Already downloaded", "Skipped (name exists)", "Unavailable")
+
+FIELDS = ("position", "link", "status", "filename", "size", "bytes_done", "error", "priority", "template")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id     INTEGER PRIMARY KEY,
+    position   INTEGER NOT NULL,
+    link       TEXT NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'Pending',
+    filename   TEXT NOT NULL DEFAULT 'N/A',
+    size       TEXT NOT NULL DEFAULT '—',
+    bytes_done INTEGER NOT NULL DEFAULT 0,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    priority   INTEGER NOT NULL DEFAULT 0,
+    template   TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_position ON jobs(position);
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def resumed_status(status):
+    """What a reloaded row shows: finished rows keep their status, the rest are Pending."""
+    if status in FINAL_STATUSES or status.startswith("Failed"):
+        return status
+    return STATUS_PENDING
+
+
+class QueueDB:
+    """The queue table on disk; ``path=None`` keeps it in memory only."""
+
+    def __init__(self, path=DEFAULT_PATH, interval=WRITE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # một kết nối, chỉ dùng dưới _io_lock (luồng ghi + load)
+        self._conn = sqlite3.connect(path or ":memory:", timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # file tạo bởi bản cũ chưa có cột priority/template
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "priority" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        if "template" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN template TEXT NOT NULL DEFAULT ''")
+        self._io_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self._positions = {}            # job_id -> position, for rows loaded or added
+        row = self._conn.execute("SELECT MAX(position) FROM jobs").fetchone()
+        self._load_limit = row[0] if row[0] is not None else 0
+        self._next_position = self._load_limit + 1
+        self._reset_pending()
+        self.stats = {"transactions": 0, "rows": 0}
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="QueueDB", daemon=True)
+        self._thread.start()
+
+    def _reset_pending(self):
+        self._clear = False
+        self._inserts = {}
+        self._updates = {}
+        self._attempts = {}
+        self._deletes = set()
+        self._settings = {}
+
+    # --- reading ---
+    def load(self, chunk=LOAD_CHUNK):
+        """Yield the stored queue as lists of :class:`~drivecore.jobs.Job`, in order.
+
+        Only rows that existed when the database was opened are read, so
+        jobs added meanwhile are never returned twice.
+        """
+        last = None
+        while True:
+            with self._io_lock:
+                rows = self._conn.execute(
+                    "SELECT job_id, position, link, status, filename, size, priority, template FROM jobs"
+                    " WHERE position > ? AND position <= ? ORDER BY position LIMIT ?",
+                    (-1 if last is None else last, self._load_limit, chunk)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][1]
+            with self._lock:
+                for job_id, position, *_ in rows:
+                    self._positions.setdefault(job_id, position)
+            yield [Job(link, resumed_status(status), filename, size, job_id=job_id, priority=priority,
+                       template=template)
+                   for job_id, _, link, status, filename, size, priority, template in rows]
+
+    def details(self, job_id):
+        """``{"bytes_done", "attempts", "error"}`` as last written, or None."""
+        with self._io_lock:
+            row = self._conn.execute("SELECT bytes_done, attempts, error FROM jobs WHERE job_id = ?",
+                                     (job_id,)).fetchone()
+        return None if row is None else dict(zip(("bytes_done", "attempts", "error"), row))
+
+    def setting(self, key, default=None):
+        with self._lock:
+            if key in self._settings:
+                return self._settings[key]
+        with self._io_lock:
+            row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    # --- recording changes (cheap; written by the background thread) ---
+    def add(self, jobs):
+        """Append ``jobs`` (which already carry their ids) after everything stored."""
+        with self._lock:
+            for job in jobs:
+                position = self._next_position
+                self._next_position += 1
+                self._positions[job.job_id] = position
+                self._deletes.discard(job.job_id)
+                self._inserts[job.job_id] = {"position": position, "link": job.link, "status": job.status,
+                                             "filename": job.filename, "size": job.size,
+                                             "bytes_done": 0, "error": None, "priority": job.priority,
+                                             "template": job.template}
+
+    def update(self, job_id, **fields):
+        """Change some of :data:`FIELDS` for ``job_id``; the latest value wins."""
+        with self._lock:
+            self._record(job_id, {k: v for k, v in fields.items() if k in FIELDS})
+
+    def _record(self, job_id, fields):
+        if job_id in self._deletes:
+            return
+        pending = self._inserts.get(job_id)
+        if pending is not None:
+            pending.update(fields)
+        else:
+            self._updates.setdefault(job_id, {}).update(fields)
+
+    def attempt(self, job_id, count=1):
+        with self._lock:
+            if job_id not in self._deletes:
+                self._attempts[job_id] = self._attempts.get(job_id, 0) + count
+
+    def remove(self, job_ids):
+        with self._lock:
+            for job_id in job_ids:
+                self._inserts.pop(job_id, None)
+                self._updates.pop(job_id, None)
+                self._attempts.pop(job_id, None)
+                self._positions.pop(job_id, None)
+                self._deletes.add(job_id)
+
+    def reorder(self, job_ids):
+        """Give ``job_ids`` the positions they hold between them, in this order."""
+        with self._lock:
+            known = [job_id for job_id in job_ids if job_id in self._positions]
+            slots = sorted(self._positions[job_id] for job_id in known)
+            for job_id, position in zip(known, slots):
+                self._positions[job_id] = position
+                self._record(job_id, {"position": position})
+
+    def clear(self):
+        with self._lock:
+            settings = self._settings
+            self._reset_pending()
+            self._clear, self._settings = True, settings
+            self._positions = {}
+
+    def set_setting(self, key, value):
+        with self._lock:
+            self._settings[key] = value
+
+    # --- writing ---
+    def flush(self):
+        """Write every recorded change in one transaction."""
+        with self._lock:
+            if not (self._clear or self._inserts or self._updates or self._attempts
+                    or self._deletes or self._settings):
+                return
+            clear, inserts, updates = self._clear, self._inserts, self._updates
+            attempts, deletes, settings = self._attempts, self._deletes, self._settings
+            self._reset_pending()
+
+        now = time.time()
+        with self._io_lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                if clear:
+                    conn.execute("DELETE FROM jobs")
+                if deletes:
+                    conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(i,) for i in deletes])
+                if inserts:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO jobs (job_id, position, link, status, filename, size,"
+                        " bytes_done, error, priority, template, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(job_id, r["position"], r["link"], r["status"], r["filename"], r["size"],
+                          r["bytes_done"], r["error"], r["priority"], r["template"], now)
+                         for job_id, r in inserts.items()])
+                # các update cùng tập cột đi chung một executemany
+                groups = {}
+                for job_id, fields in updates.items():
+                    keys = tuple(sorted(fields))
+                    groups.setdefault(keys, []).append(tuple(fields[k] for k in keys) + (now, job_id))
+                for keys, params in groups.items():
+                    assignments = ", ".join(f"{k} = ?" for k in keys)
+                    conn.executemany(f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?", params)
+                if attempts:
+                    conn.executemany("UPDATE jobs SET attempts = attempts + ? WHERE job_id = ?",
+                                     [(n, job_id) for job_id, n in attempts.items()])
+                if settings:
+                    conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                     list(settings.items()))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        self.stats["transactions"] += 1
+        self.stats["rows"] += len(inserts) + len(updates) + len(attempts) + len(deletes)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass   # đĩa đầy/bị khoá: bỏ lượt ghi này, app vẫn chạy tiếp
+
+    def close(self):
+        """Stop the writer, write what is left and close the database."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self._io_lock:
+            self._conn.close()
@@ -0,0 +1,169 @@
+"""Token-bucket bandwidth limiting shared by all transfers.
+
+Rates are bytes per second; ``None`` (or 0) means unlimited. Clocks are
+injectable so the limiter can be driven by a fake clock.
+"""
+import datetime
+import threading
+import time
+
+BURST_SECONDS = 0.5          # bucket depth, as seconds worth of the rate
+SCHEDULE_RECHECK = 1.0       # seconds between schedule evaluations
+
+
+class TokenBucket:
+    """A token bucket that hands out delays instead of sleeping itself.
+
+    :meth:`reserve` takes ``n`` tokens immediately (the balance may go
+    negative) and returns how long the caller must wait for the debt to be
+    repaid, so concurrent callers queue up fairly without holding a lock
+    while they sleep.
+    """
+
+    def __init__(self, rate=None, burst=None, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rate = None
+        self._burst = None
+        self._tokens = 0.0
+        self._stamp = clock()
+        self.set_rate(rate, burst)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def set_rate(self, rate, burst=None):
+        with self._lock:
+            self._refill()
+            was_limited = self._rate is not None
+            self._rate = float(rate) if rate else None
+            self._burst = float(burst) if burst else (self._rate * BURST_SECONDS if self._rate else None)
+            if self._burst is not None:
+                # start full when a limit is switched on, keep any debt otherwise
+                self._tokens = min(self._tokens, self._burst) if was_limited else self._burst
+
+    def _refill(self):
+        now = self._clock()
+        if self._rate:
+            self._tokens = min(self._burst, self._tokens + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+    def reserve(self, n):
+        """Take ``n`` tokens; return the seconds to wait before using them."""
+        with self._lock:
+            if not self._rate:
+                return 0.0
+            self._refill()
+            self._tokens -= n
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+
+class RateSchedule:
+    """Time-of-day overrides for the global rate.
+
+    ``rules`` is a list of ``(start, end, rate)`` with ``datetime.time``
+    bounds; a window may wrap past midnight (22:00 -> 07:00). The first
+    matching rule wins.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+
+    @staticmethod
+    def _inside(t, start, end):
+        if start <= end:
+            return start <= t < end
+        return t >= start or t < end
+
+    def match(self, when):
+        """Return ``(True, rate)`` for the rule covering ``when``, else ``(False, None)``."""
+        t = when.time()
+        for start, end, rate in self.rules:
+            if self._inside(t, start, end):
+                return True, rate
+        return False, None
+
+
+class BandwidthLimiter:
+    """Global cap for the whole batch plus an optional cap per file.
+
+    Every transfer asks :meth:`file_bucket` for its own bucket and calls
+    :meth:`reserve` after each chunk. Rates can be changed at any time
+    from another thread and apply to transfers already running.
+    """
+
+    def __init__(self, global_rate=None, per_file_rate=None, schedule=None,
+                 clock=time.monotonic, now=datetime.datetime.now):
+        self._clock = clock
+        self._now = now
+        self._lock = threading.Lock()
+        self._global_rate = global_rate or None
+        self._per_file_rate = per_file_rate or None
+        self._schedule = schedule
+        self._checked = None
+        self._global = TokenBucket(self._global_rate, clock=clock)
+        self._files = []
+
+    @property
+    def global_rate(self):
+        return self._global_rate
+
+    @property
+    def per_file_rate(self):
+        return self._per_file_rate
+
+    def effective_rate(self):
+        """The global rate currently in force (after the schedule)."""
+        return self._global.rate
+
+    def set_global_rate(self, rate):
+        with self._lock:
+            self._global_rate = rate or None
+            self._checked = None   # re-apply the schedule on the next reserve()
+
+    def set_per_file_rate(self, rate):
+        with self._lock:
+            self._per_file_rate = rate or None
+            buckets = list(self._files)
+        for bucket in buckets:
+            bucket.set_rate(self._per_file_rate)
+
+    def set_schedule(self, schedule):
+        with self._lock:
+            self._schedule = schedule
+            self._checked = None
+
+    def file_bucket(self):
+        """A new per-file bucket; call :meth:`release` when the file is done."""
+        bucket = TokenBucket(self._per_file_rate, clock=self._clock)
+        with self._lock:
+            self._files.append(bucket)
+        return bucket
+
+    def release(self, bucket):
+        with self._lock:
+            if bucket in self._files:
+                self._files.remove(bucket)
+
+    def _apply_schedule(self):
+        now = self._clock()
+        with self._lock:
+            if self._checked is not None and now - self._checked < SCHEDULE_RECHECK:
+                return
+            self._checked = now
+            rate = self._global_rate
+            if self._schedule:
+                matched, override = self._schedule.match(self._now())
+                if matched:
+                    rate = override or None
+        if rate != self._global.rate:
+            self._global.set_rate(rate)
+
+    def reserve(self, n, bucket=None):
+        """Account for ``n`` bytes; return the seconds the caller should wait."""
+        self._apply_schedule()
+        delay = self._global.reserve(n)
+        if bucket is not None:
+            delay = max(delay, bucket.reserve(n))
+        return delay
@@ -0,0 +1,108 @@
+"""Why a download failed, and when to try it again.
+
+:func:`classify` sorts a failure into one of the ``ERROR_*`` kinds. Drive's
+"Too many users have viewed or downloaded this file" quota and network
+trouble (timeouts, dropped connections, 5xx) usually clear up on their
+own, and a corrupt download (checksum mismatch, an HTML page saved in
+place of the file) is worth fetching again, so :class:`RetryPolicy`
+hands out a jittered exponential backoff for them - a much longer one for
+quota, which Drive lifts after minutes or hours rather than seconds.
+Permission and not-found errors fail at once.
+"""
+import http.client
+import random
+
+from .engine import DownloadCancelled, DownloadError
+
+ERROR_QUOTA = "quota"
+ERROR_PERMISSION = "permission"
+ERROR_NOT_FOUND = "not_found"
+ERROR_NETWORK = "network"
+ERROR_INTEGRITY = "integrity"
+ERROR_OTHER = "other"
+
+RETRYABLE = (ERROR_QUOTA, ERROR_NETWORK, ERROR_INTEGRITY)
+LABELS = {
+    ERROR_QUOTA: "Quota exceeded",
+    ERROR_PERMISSION: "Permission denied",
+    ERROR_NOT_FOUND: "Not found",
+    ERROR_NETWORK: "Network error",
+    ERROR_INTEGRITY: "Corrupt download",
+    ERROR_OTHER: "Error",
+}
+
+MAX_ATTEMPTS = 5                  # lần tải đầu tiên + 4 lần thử lại
+BACKOFF_BASE = 2.0                # seconds before the first network retry
+BACKOFF_CAP = 120.0
+QUOTA_BACKOFF_BASE = 60.0
+QUOTA_BACKOFF_CAP = 1800.0
+
+# thứ tự quan trọng: trang quota của Drive đôi khi trả về 403
+_QUOTA_TEXT = ("too many users", "quota", "rate limit", "ratelimit", "too many requests")
+_PERMISSION_TEXT = ("access denied", "you need access", "permission", "not have access", "sign in")
+_NOT_FOUND_TEXT = ("not found", "does not exist", "no longer available", "has been removed", "not a shared drive")
+_INTEGRITY_TEXT = ("checksum mismatch", "instead of the file")
+_NETWORK_TEXT = ("connection", "timed out", "timeout", "incomplete download", "temporarily", "unreachable")
+
+
+def classify(exc):
+    """The ``ERROR_*`` kind of ``exc``, or None if the transfer was cancelled."""
+    if isinstance(exc, DownloadCancelled):
+        return None
+    text = str(exc).lower()
+    if any(t in text for t in _QUOTA_TEXT):
+        return ERROR_QUOTA
+    if isinstance(exc, DownloadError):
+        if exc.kind:
+            return exc.kind
+        if exc.status == 429:
+            return ERROR_QUOTA
+        if exc.status in (401, 403):
+            return ERROR_PERMISSION
+        if exc.status in (404, 410):
+            return ERROR_NOT_FOUND
+        if exc.status is not None and (exc.status >= 500 or exc.status == 408):
+            return ERROR_NETWORK
+    elif isinstance(exc, (ConnectionError, TimeoutError, http.client.HTTPException)):
+        return ERROR_NETWORK
+    if any(t in text for t in _PERMISSION_TEXT):
+        return ERROR_PERMISSION
+    if any(t in text for t in _NOT_FOUND_TEXT):
+        return ERROR_NOT_FOUND
+    if any(t in text for t in _INTEGRITY_TEXT):
+        return ERROR_INTEGRITY
+    if any(t in text for t in _NETWORK_TEXT):
+        return ERROR_NETWORK
+    return ERROR_OTHER
+
+
+def is_retryable(kind):
+    return kind in RETRYABLE
+
+
+class RetryPolicy:
+    """How many times a job is tried and how long to wait in between.
+
+    The wait before retry ``n`` is drawn from the upper half of
+    ``min(cap, base * 2 ** (n - 1))`` so jobs that failed together don't
+    come back together.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base=BACKOFF_BASE, cap=BACKOFF_CAP,
+                 quota_base=QUOTA_BACKOFF_BASE, quota_cap=QUOTA_BACKOFF_CAP, rng=random.random):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base = base
+        self.cap = cap
+        self.quota_base = quota_base
+        self.quota_cap = quota_cap
+        self._rng = rng
+
+    def should_retry(self, kind, attempt):
+        """True if a job that just failed its ``attempt``-th try gets another one."""
+        return is_retryable(kind) and attempt < self.max_attempts
+
+    def delay(self, kind, attempt):
+        """Seconds to wait after the ``attempt``-th failed try."""
+        base, cap = (self.quota_base, self.quota_cap) if kind == ERROR_QUOTA else (self.base, self.cap)
+        ceiling = min(cap, base * 2 ** (attempt - 1))
+        return ceiling / 2 + self._rng() * ceiling / 2
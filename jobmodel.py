@@ -0,0 +1,166 @@
+from PyQt6 import QtCore
+from drivecore.jobs import Job, JobStore, STATUS_PENDING, contiguous_ranges
+
+
+# --- Table model for the link queue ---
+class JobTableModel(QtCore.QAbstractTableModel):
+    # thứ tự cột khớp với header của bảng
+    COLUMNS = ("Link", "Status", "Filename", "Size", "Speed", "ETA")
+    COL_LINK, COL_STATUS, COL_FILENAME, COL_SIZE, COL_SPEED, COL_ETA = range(6)
+    _FIELDS = ("link", "status", "filename", "size", "speed", "eta")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = JobStore()
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (QtCore.Qt.ItemDataRole.DisplayRole,
+                                               QtCore.Qt.ItemDataRole.ToolTipRole):
+            return None
+        return getattr(self.store[index.row()], self._FIELDS[index.column()])
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return QtCore.QCoreApplication.translate("Form_DriveGoogleMultilinkDownloader",
+                                                     self.COLUMNS[section])
+        return section + 1
+
+    # --- editing ---
+    def links(self):
+        return self.store.links()
+
+    def ids(self):
+        return self.store.ids()
+
+    def link(self, row):
+        return self.store[row].link
+
+    def add_links(self, links, meta=None):
+        # một lần beginInsertRows cho cả lô, không chèn từng dòng; trả về [(link, job_id)]
+        if not links:
+            return []
+        jobs = []
+        for link in links:
+            filename, size = meta(link) if meta else ("N/A", "—")
+            jobs.append(Job(link, STATUS_PENDING, filename, size))
+        self.append_jobs(jobs)
+        return [(job.link, job.job_id) for job in jobs]
+
+    def append_jobs(self, jobs):
+        # Job có sẵn job_id (nạp lại từ QueueDB) thì giữ nguyên id đó
+        if not jobs:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(jobs) - 1)
+        self.store.extend(jobs)
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        # trả về job_id của các dòng đã xoá
+        removed = []
+        for first, last in contiguous_ranges(rows):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            removed += self.store.remove_range(first, last)
+            self.endRemoveRows()
+        return removed
+
+    def move_row(self, row, new_row):
+        if row == new_row or not (0 <= new_row < len(self.store)):
+            return False
+        # Qt muốn vị trí đích tính trước khi bỏ dòng nguồn ra
+        dest = new_row + 1 if new_row > row else new_row
+        self.beginMoveRows(QtCore.QModelIndex(), row, row, QtCore.QModelIndex(), dest)
+        self.store.move(row, new_row)
+        self.endMoveRows()
+        return True
+
+    def move_rows(self, rows, dest):
+        # chuyển nhiều dòng (kể cả không liền nhau) trong một lần layoutChanged; selection đi theo dòng
+        ids = self.store.ids()
+        self.layoutAboutToBeChanged.emit()
+        self.store.move_rows(rows, dest)
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [self.index(self.store.row_of(ids[i.row()]), i.column())
+                                                    for i in persistent])
+        self.layoutChanged.emit()
+
+    def set_priority(self, job_ids, priority):
+        for job_id in job_ids:
+            job = self.store.get(job_id)
+            if job is not None:
+                job.priority = priority
+
+    def priorities(self):
+        # {job_id: priority} của các dòng được ưu tiên
+        return {job.job_id: job.priority for job in self.store if job.priority}
+
+    def set_template(self, job_ids, template):
+        for job_id in job_ids:
+            job = self.store.get(job_id)
+            if job is not None:
+                job.template = template
+
+    def templates(self):
+        # {job_id: template} của các dòng có template riêng
+        return {job.job_id: job.template for job in self.store if job.template}
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
+
+    def set_link(self, row, link, filename="N/A", size="—"):
+        job = self.store[row]
+        job.link, job.status, job.filename, job.size = link, STATUS_PENDING, filename, size
+        job.speed = job.eta = ""
+        self._changed(row, self.COL_LINK, self.COL_ETA)
+        return job.job_id
+
+    def reset_all(self, meta=None):
+        # đưa mọi dòng về "Pending" trước một lượt tải mới; một dataChanged cho cả bảng
+        for job in self.store:
+            job.status = STATUS_PENDING
+            job.filename, job.size = meta(job.link) if meta else ("N/A", "—")
+            job.speed = job.eta = ""
+        if len(self.store):
+            self._changed(0, self.COL_STATUS, self.COL_ETA, len(self.store) - 1)
+
+    # --- updates from the worker (theo job_id, không theo dòng) ---
+    def set_status(self, job_id, status, filename):
+        row = self.store.row_of(job_id)
+        if row is None:
+            return False
+        job = self.store[row]
+        job.status, job.filename = status, filename
+        self._changed(row, self.COL_STATUS, self.COL_FILENAME)
+        return True
+
+    def set_size(self, job_id, size):
+        row = self.store.row_of(job_id)
+        if row is None:
+            return False
+        self.store[row].size = size
+        self._changed(row, self.COL_SIZE, self.COL_SIZE)
+        return True
+
+    def set_rate(self, job_id, speed, eta):
+        row = self.store.row_of(job_id)
+        if row is None:
+            return False
+        job = self.store[row]
+        job.speed, job.eta = speed, eta
+        self._changed(row, self.COL_SPEED, self.COL_ETA)
+        return True
+
+    def _changed(self, row, first_col, last_col, last_row=None):
+        self.dataChanged.emit(self.index(row, first_col),
+                              self.index(row if last_row is None else last_row, last_col))
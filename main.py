@@ -2,162 +2,88 @@ import sys
 from PyQt6 import QtWidgets, QtCore, QtGui
 from ui_DriveGoogleMultilinkDownloader import Ui_Form_DriveGoogleMultilinkDownloader
 from ui_AddLink import Ui_Form_AddLink
+from jobmodel import JobTableModel
+from drivecore.jobs import POLICY_FIFO, POLICY_ROUND_ROBIN, POLICY_SHORTEST
+from drivecore.naming import CONFLICT_OVERWRITE, CONFLICT_SKIP, CONFLICT_SUFFIX, DEFAULT_TEMPLATE
+from drivecore import (BandwidthLimiter, BatchDownloader, FileLog, LogRing, MetadataCache, QueueDB, RateSchedule,
+                       check_template, extract_file_id, extract_links, format_size, level_rank, link_key,
+                       read_link_file)
 import gdown
 import os
-import threading
-import time
-import re
-import subprocess
 # --- DriveDownloader Thread Class ---
 class DownloadWorker(QtCore.QObject):
+    # Qt front end of drivecore.BatchDownloader, chạy trong một QThread
     finished = QtCore.pyqtSignal()
-    progress_update = QtCore.pyqtSignal(int)               # % của file hiện tại
-    log_message = QtCore.pyqtSignal(str, str)              # (msg, level)
-    update_item_status = QtCore.pyqtSignal(int, str, str)  # (row, status, filename)
-    total_update = QtCore.pyqtSignal(str)                  # "Total: n/total"
-    speed_update = QtCore.pyqtSignal(str)                  # "4.10MB/s"
+    # Mọi cập nhật (status/size/tốc độ/ETA theo job_id, % theo byte của cả batch, tốc độ, ETA,
+    # "Total: n/total", log) được gom lại và gửi một EventBatch mỗi tick (~10 Hz)
+    events = QtCore.pyqtSignal(object)
 
-    def __init__(self, links_data, save_path):
+    DEFAULT_MAX_WORKERS = BatchDownloader.DEFAULT_MAX_WORKERS
+    ENGINE_NATIVE = BatchDownloader.ENGINE_NATIVE
+    ENGINE_SUBPROCESS = BatchDownloader.ENGINE_SUBPROCESS
+
+    def __init__(self, links_data, save_path, max_workers=DEFAULT_MAX_WORKERS, engine=ENGINE_NATIVE,
+                 limiter=None, meta_cache=None, policy=POLICY_FIFO, priorities=None,
+                 template=DEFAULT_TEMPLATE, templates=None, conflict=CONFLICT_SUFFIX):
         super().__init__()
-        self.links_data = links_data          # [(link, row_index)]
-        self.save_path = save_path
-        self._is_paused = False
-        self._is_stopped = False
-        self._last_speed_emit = 0.0           # throttle cập nhật tốc độ
-
-    # --- helpers ---
-    def _to_direct(self, url: str) -> str:
-        m = re.search(r"/file/d/([A-Za-z0-9_-]+)", url)
-        if m:
-            fid = m.group(1)
-            return f"https://drive.google.com/uc?id={fid}&export=download"
-        m = re.search(r"[?&]id=([^&]+)", url)
-        return f"https://drive.google.com/uc?id={m.group(1)}&export=download" if m else url
-
-    def _run_gdown(self, direct_url: str, out_folder: str):
-        # -O <folder/> => gdown tự đặt tên file
-        if not out_folder.endswith(os.sep):
-            out_folder = out_folder + os.sep
-        cmd = [sys.executable, "-m", "gdown", direct_url, "-O", out_folder, "--fuzzy"]
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            text=True, bufsize=1, encoding="utf-8", errors="replace"
-        )
-        return proc
+        self.batch = BatchDownloader(links_data, save_path, max_workers=max_workers, engine=engine,
+                                     limiter=limiter, meta_cache=meta_cache, on_events=self.events.emit,
+                                     policy=policy, priorities=priorities,
+                                     template=template, templates=templates, conflict=conflict)
 
     @QtCore.pyqtSlot()
     def run(self):
-        total = len(self.links_data)
-        done = 0
-        self.log_message.emit("Starting download process...", "INFO")
-        os.makedirs(self.save_path, exist_ok=True)
-
-        for idx, (url, row) in enumerate(self.links_data, start=1):
-            if self._is_stopped:
-                self.log_message.emit("Download stopped by user.", "WARNING")
-                break
-
-            while self._is_paused and not self._is_stopped:
-                time.sleep(0.1)
-
-            # reset progress + speed mỗi file
-            self.progress_update.emit(0)
-            self.speed_update.emit("—")
-            self.update_item_status.emit(row, "Downloading...", "Preparing...")
-            self.log_message.emit(f"Processing link {idx}/{total}: {url}", "INFO")
-
-            direct = self._to_direct(url)
-            proc = None
-            current_filename = None
-            self._last_speed_emit = 0.0
-
-            try:
-                proc = self._run_gdown(direct, self.save_path)
-                assert proc.stdout is not None
-
-                for line in proc.stdout:
-                    s = line.strip()
-
-                    # nhấn Stop
-                    if self._is_stopped:
-                        proc.terminate()
-                        raise RuntimeError("Stopped by user")
-
-                    # bắt tên file từ 'To: ...'
-                    if s.startswith("To:"):
-                        tail = s.split("To:", 1)[1].strip()
-                        current_filename = os.path.basename(tail.replace("\\", "/"))
-                        self.update_item_status.emit(row, "Downloading...", current_filename)
-                        continue
-
-                    # bắt % + tốc độ (MB/s, KB/s, GB/s...) từ dòng progress
-                    # ví dụ gdown/tqdm: "37%|█████▎ ... [00:12<00:18, 4.10MB/s]"
-                    m_pct = re.match(r"^(\d+)%\|", s)
-                    if m_pct:
-                        self.progress_update.emit(int(m_pct.group(1)))
-
-                        # cố gắng tách tốc độ nếu có: lấy phần ", 4.10MB/s]"
-                        m_speed = re.search(r"\[\s*.*?,\s*([0-9.]+\s*(?:[KMG]?B)/s)\s*\]$", s)
-                        if m_speed:
-                            now = time.time()
-                            if now - self._last_speed_emit > 0.3:  # throttle ~300ms
-                                speed = m_speed.group(1).replace(" ", "")
-                                self.speed_update.emit(speed)
-                                self._last_speed_emit = now
-                        continue
-
-                    # lọc bớt log ồn
-                    if (s == "Downloading..." or s == "" or
-                        s.startswith("From (original):") or s.startswith("From (redirected):") or
-                        s.startswith("From:") or s.startswith("To:") or
-                        s.startswith("Processing") or s.startswith("Checking")):
-                        continue
-
-                    # còn lại: ghi log
-                    self.log_message.emit(s, "INFO")
-
-                proc.wait()
-                if proc.returncode != 0:
-                    raise RuntimeError(f"gdown exited with code {proc.returncode}")
-
-                # hoàn tất file
-                self.progress_update.emit(100)
-                self.speed_update.emit("—")
-                shown = current_filename or "Downloaded file"
-                self.update_item_status.emit(row, "Completed", shown)
-                self.log_message.emit(f"✅ Downloaded: {shown}", "SUCCESS")
-
-                done += 1
-                self.total_update.emit(f"Total: {done}/{total}")
-
-            except Exception as e:
-                self.progress_update.emit(0)
-                self.speed_update.emit("—")
-                self.update_item_status.emit(row, "Failed", "Error")
-                self.log_message.emit(f"❌ Error: {e}", "ERROR")
-                if proc and proc.poll() is None:
-                    proc.kill()
-
-        self.log_message.emit(f"All downloads attempted. Successfully downloaded {done} out of {total} links.", "INFO")
+        self.batch.run()
         self.finished.emit()
 
     # controls
+    @property
+    def is_paused(self):
+        return self.batch.is_paused
+
     def pause(self):
-        self._is_paused = True
-        self.log_message.emit("Paused.", "INFO")
+        self.batch.pause()
 
     def resume(self):
-        self._is_paused = False
-        self.log_message.emit("Resumed.", "INFO")
+        self.batch.resume()
 
     def stop(self):
-        self._is_stopped = True
-        self.log_message.emit("Stopping...", "WARNING")
+        self.batch.stop()
+
+    # queue edits while running
+    def add_jobs(self, entries):
+        return self.batch.add_jobs(entries)
+
+    def remove_jobs(self, job_ids):
+        return self.batch.remove_jobs(job_ids)
+
+    def replace_job(self, job_id, link):
+        return self.batch.replace_job(job_id, link)
+
+    def reorder_jobs(self, job_ids):
+        self.batch.reorder_jobs(job_ids)
+
+    def set_policy(self, policy):
+        self.batch.set_policy(policy)
+
+    def set_priority(self, job_ids, priority):
+        self.batch.set_priority(job_ids, priority)
+
+    def set_template(self, job_ids, template):
+        self.batch.set_template(job_ids, template)
 
         
 # --- Main Application Window ---
 class DriveDownloaderMainWindow(QtWidgets.QWidget):
+    # thứ tự khớp với các mục của comboBox_Engine
+    ENGINE_MODES = (DownloadWorker.ENGINE_NATIVE, DownloadWorker.ENGINE_SUBPROCESS)
+    # mức log tối thiểu theo các mục của comboBox_LogLevel (xem drivecore.logs.LEVELS)
+    LOG_FILTER_RANKS = (0, 1, 2)
+    # thứ tự khớp với các mục của comboBox_Order (xem drivecore.jobs.POLICIES)
+    ORDER_POLICIES = (POLICY_FIFO, POLICY_SHORTEST, POLICY_ROUND_ROBIN)
+    # thứ tự khớp với các mục của comboBox_Conflict (xem drivecore.naming.CONFLICTS)
+    CONFLICT_POLICIES = (CONFLICT_SUFFIX, CONFLICT_OVERWRITE, CONFLICT_SKIP)
+
     def __init__(self):
         super().__init__()
         self.ui = Ui_Form_DriveGoogleMultilinkDownloader()
@@ -166,18 +92,45 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         self.download_thread = None
         self.worker = None
         self.is_downloading = False
-        self.current_links_data = [] # Stores (link_text, row_index)
+        self.job_model = JobTableModel(self) # Link queue shown in the table
+        # Log: the view keeps a bounded history, the destination folder keeps the full one on disk
+        self.log_ring = LogRing()
+        self.file_log = None
         self.ui.label_Total.setText("Total: 0/0")
         
         # Set default download directory and display in lineEdit
         self.default_save_directory = os.path.join(os.path.expanduser("~"), "Downloads", "DriveGoogleDownloads")
         os.makedirs(self.default_save_directory, exist_ok=True) # Ensure default directory exists
-        self.ui.lineEdit_DestinationFolder.setText(self.default_save_directory)
+        # The queue (links, statuses, destination) is kept on disk and restored on the next start
+        self.queue_db = QueueDB()
+        save_directory = self.queue_db.setting("save_path") or self.default_save_directory
+        self.ui.lineEdit_DestinationFolder.setText(save_directory)
+        self._open_file_log(save_directory)
+        policy = self.queue_db.setting("policy", POLICY_FIFO)
+        if policy in self.ORDER_POLICIES:
+            self.ui.comboBox_Order.setCurrentIndex(self.ORDER_POLICIES.index(policy))
+        # Where files go below the destination folder and what to do with names already there
+        self.ui.lineEdit_Template.setPlaceholderText(DEFAULT_TEMPLATE)
+        self.ui.lineEdit_Template.setText(self.queue_db.setting("template", ""))
+        conflict = self.queue_db.setting("conflict", CONFLICT_SUFFIX)
+        if conflict in self.CONFLICT_POLICIES:
+            self.ui.comboBox_Conflict.setCurrentIndex(self.CONFLICT_POLICIES.index(conflict))
+
+        # Bandwidth limiter lives with the window so limits apply across batches
+        # and can be changed while a download is running
+        self.limiter = BandwidthLimiter()
+        # Drive metadata resolved in earlier runs (filename, size, final download URL)
+        self.meta_cache = MetadataCache()
 
         self._connect_signals()
-        self._setup_table_widget()
+        self._setup_table_view()
         self._update_download_buttons_state()
 
+        # Nạp hàng đợi cũ từng chunk qua event loop để cửa sổ hiện ra ngay cả khi có rất nhiều link
+        self._queue_loader = self.queue_db.load()
+        self._restored_count = 0
+        QtCore.QTimer.singleShot(0, self._load_queue_chunk)
+
     def _connect_signals(self):
         self.ui.pushButton_Add.clicked.connect(self._open_add_link_form)
         self.ui.pushButton_Delete.clicked.connect(self._delete_selected_link)
@@ -187,18 +140,68 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         self.ui.pushButton_Pause.clicked.connect(self._pause_download)
         self.ui.pushButton_Stop.clicked.connect(self._stop_download)
         self.ui.pushButton_SelectFolder.clicked.connect(self._browse_save_folder)
+        self.ui.comboBox_LogLevel.currentIndexChanged.connect(self._refresh_log_view)
         
         
         # Connect Up, Down, Edit buttons
         self.ui.pushButton_Up.clicked.connect(lambda: self._move_link_in_table(-1))
         self.ui.pushButton_Down.clicked.connect(lambda: self._move_link_in_table(1))
         self.ui.pushButton_Edit.clicked.connect(self._edit_selected_link)
-
-    def _setup_table_widget(self):
-        self.ui.tableWidget_ListLinkDriveGoogle.setColumnWidth(0, 400) # Link column
-        self.ui.tableWidget_ListLinkDriveGoogle.setColumnWidth(1, 150) # Status column
-        self.ui.tableWidget_ListLinkDriveGoogle.setColumnWidth(2, 150) # ETA/Filename column
-        self.ui.tableWidget_ListLinkDriveGoogle.horizontalHeader().setStretchLastSection(True)
+        self.ui.pushButton_Next.clicked.connect(self._download_selected_next)
+        self.ui.pushButton_Template.clicked.connect(self._set_selected_template)
+        # Which file starts next; applies to a running batch too
+        self.ui.comboBox_Order.currentIndexChanged.connect(self._apply_order_policy)
+
+        # Bandwidth limits (KB/s, 0 = unlimited) apply live
+        self.ui.spinBox_Limit.valueChanged.connect(self._apply_bandwidth_limits)
+        self.ui.spinBox_FileLimit.valueChanged.connect(self._apply_bandwidth_limits)
+        self.ui.checkBox_Schedule.toggled.connect(self._apply_bandwidth_limits)
+        self.ui.timeEdit_ScheduleStart.timeChanged.connect(self._apply_bandwidth_limits)
+        self.ui.timeEdit_ScheduleEnd.timeChanged.connect(self._apply_bandwidth_limits)
+
+    def _apply_bandwidth_limits(self, *_):
+        self.limiter.set_global_rate(self.ui.spinBox_Limit.value() * 1024)
+        self.limiter.set_per_file_rate(self.ui.spinBox_FileLimit.value() * 1024)
+        schedule = None
+        if self.ui.checkBox_Schedule.isChecked():
+            start = self.ui.timeEdit_ScheduleStart.time().toPyTime()
+            end = self.ui.timeEdit_ScheduleEnd.time().toPyTime()
+            schedule = RateSchedule([(start, end, None)])  # None = unlimited trong khung giờ này
+        self.limiter.set_schedule(schedule)
+
+    def _load_queue_chunk(self):
+        if self._queue_loader is None:
+            return
+        jobs = next(self._queue_loader, None)
+        if jobs is None:
+            self._queue_loader = None
+            if self._restored_count:
+                self._log_message(f"Restored {self._restored_count} links from the previous session.", "INFO")
+            return
+        self.job_model.append_jobs(jobs)
+        self._restored_count += len(jobs)
+        QtCore.QTimer.singleShot(0, self._load_queue_chunk)
+
+    def _finish_queue_load(self):
+        # Adding links or starting a batch needs the whole saved queue in the table first
+        while self._queue_loader is not None:
+            self._load_queue_chunk()
+
+    def _setup_table_view(self):
+        table = self.ui.tableView_ListLinkDriveGoogle
+        table.setModel(self.job_model)
+        table.setColumnWidth(0, 400) # Link column
+        table.setColumnWidth(1, 150) # Status column
+        table.setColumnWidth(2, 150) # Filename column
+        table.setColumnWidth(3, 90)  # Size column
+        table.setColumnWidth(4, 90)  # Speed column
+        table.horizontalHeader().setStretchLastSection(True)
+        # Fixed row height: the view doesn't have to measure every row of a 100k-link queue
+        table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        table.verticalHeader().setDefaultSectionSize(table.fontMetrics().height() + 8)
+
+    def _selected_rows(self):
+        return sorted(index.row() for index in self.ui.tableView_ListLinkDriveGoogle.selectionModel().selectedRows())
 
     def _open_add_link_form(self):
         # Pass self as parent to center the dialog
@@ -208,97 +211,163 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         self.add_link_window.exec() # Use exec() for modal dialog
 
     def _add_links_to_table(self, new_links):
-        current_row_count = self.ui.tableWidget_ListLinkDriveGoogle.rowCount()
-        for i, link in enumerate(new_links):
-            row_index = current_row_count + i
-            self.ui.tableWidget_ListLinkDriveGoogle.insertRow(row_index)
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(row_index, 0, QtWidgets.QTableWidgetItem(link))
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(row_index, 1, QtWidgets.QTableWidgetItem("Pending"))
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(row_index, 2, QtWidgets.QTableWidgetItem("N/A"))
-            # When adding, update current_links_data
-            self.current_links_data.append((link, row_index)) 
-
-        self._log_message(f"Added {len(new_links)} new links to the list.", "INFO")
+        # One batched insert for the whole paste instead of a row at a time
+        self._finish_queue_load()
+        queued = {link_key(link) for link in self.job_model.links()}
+        fresh = [link for link in new_links if link_key(link) not in queued]
+        entries = self.job_model.add_links(fresh, self._cached_meta)
+        self.queue_db.add(self.job_model.store.get(job_id) for _, job_id in entries)
+        self._log_message(f"Added {len(fresh)} new links to the list.", "INFO")
+        if len(fresh) < len(new_links):
+            self._log_message(f"Skipped {len(new_links) - len(fresh)} links already in the list.", "INFO")
+        if self.worker and self.is_downloading and entries:
+            if self.worker.add_jobs(entries):
+                self._log_message("New links were added to the running batch.", "INFO")
+            else:
+                self._log_message("The batch is finishing; new links will be downloaded next time.", "INFO")
+
+    def _cached_meta(self, link):
+        # Show the name/size from an earlier run, if we already resolved this file
+        file_id = extract_file_id(link)
+        entry = self.meta_cache.get(file_id) if file_id else None
+        if not entry or not entry.get("filename"):
+            return "N/A", format_size(None)
+        return entry["filename"], format_size(entry.get("size"))
 
     def _delete_selected_link(self):
-        selected_rows = sorted(list(set(index.row() for index in self.ui.tableWidget_ListLinkDriveGoogle.selectedIndexes())), reverse=True)
+        selected_rows = self._selected_rows()
         if not selected_rows:
             self._log_message("No link selected to delete.", "WARNING")
             return
-        
-        for row in selected_rows:
-            link_item = self.ui.tableWidget_ListLinkDriveGoogle.item(row, 0)
-            if link_item:
-                link_text = link_item.text()
-                self.ui.tableWidget_ListLinkDriveGoogle.removeRow(row)
-                self._log_message(f"Deleted link: {link_text}", "INFO")
-
-        self._reindex_links_data() # Re-index after deletion
-        
-    def _reindex_links_data(self):
-        # Rebuild current_links_data from the table widget after modifications
-        new_links_data = []
-        for r in range(self.ui.tableWidget_ListLinkDriveGoogle.rowCount()):
-            link_item = self.ui.tableWidget_ListLinkDriveGoogle.item(r, 0)
-            if link_item:
-                link_text = link_item.text()
-                new_links_data.append((link_text, r))
-        self.current_links_data = new_links_data
+
+        if len(selected_rows) == 1:
+            self._log_message(f"Deleted link: {self.job_model.link(selected_rows[0])}", "INFO")
+        else:
+            self._log_message(f"Deleted {len(selected_rows)} links.", "INFO")
+        removed = self.job_model.remove_rows(selected_rows)
+        self.queue_db.remove(removed)
+        if self.worker and self.is_downloading:
+            self.worker.remove_jobs(removed) # Transfers already running are left to finish
 
     def _move_link_in_table(self, direction):  # -1: Up, +1: Down
-            table = self.ui.tableWidget_ListLinkDriveGoogle
-            selected_rows = sorted(list(set(index.row() for index in table.selectedIndexes())))
+            selected_rows = self._selected_rows()
 
-            if not selected_rows or len(selected_rows) != 1:
-                self._log_message("Please select exactly one link to move.", "WARNING")
+            if not selected_rows:
+                self._log_message("Please select the links to move.", "WARNING")
                 return
 
-            current_row = selected_rows[0]
-            new_row = current_row + direction
+            if len(selected_rows) == 1:
+                current_row = selected_rows[0]
+                new_row = current_row + direction
+
+                # Kiểm tra nếu vị trí mới nằm ngoài phạm vi của bảng
+                if not self.job_model.move_row(current_row, new_row):
+                    return
 
-            # Kiểm tra nếu vị trí mới nằm ngoài phạm vi của bảng
-            if not (0 <= new_row < table.rowCount()):
+                # Chọn lại hàng đã được di chuyển đến vị trí mới
+                self.ui.tableView_ListLinkDriveGoogle.selectRow(new_row)
+                self._store_new_order(min(current_row, new_row), max(current_row, new_row))
+                self._log_message(f"Moved link from row {current_row + 1} to {new_row + 1}.", "INFO")
                 return
 
-            # Hoán đổi nội dung của các ô giữa hàng hiện tại và hàng mới
-            for col in range(table.columnCount()):
-                current_item = table.takeItem(current_row, col)
-                new_item = table.takeItem(new_row, col)
+            # Nhiều dòng: gom lại thành một khối, lùi/tiến một dòng so với dòng đầu tiên được chọn
+            remaining = self.job_model.rowCount() - len(selected_rows)
+            dest = min(max(selected_rows[0] + direction, 0), remaining)
+            if dest == selected_rows[0] and selected_rows[-1] - selected_rows[0] == len(selected_rows) - 1:
+                return  # khối liền nhau đã chạm đầu/cuối bảng
+            self.job_model.move_rows(selected_rows, dest)
+            self._store_new_order(min(selected_rows[0], dest), max(selected_rows[-1], dest + len(selected_rows) - 1))
+            self._log_message(f"Moved {len(selected_rows)} links to rows {dest + 1}-{dest + len(selected_rows)}.", "INFO")
+
+    def _store_new_order(self, first, last):
+        # Rows first..last changed places: save their new positions, re-sort the running queue
+        store = self.job_model.store
+        self.queue_db.reorder([store[row].job_id for row in range(first, last + 1)])
+        if self.worker and self.is_downloading:
+            self.worker.reorder_jobs(self.job_model.ids()) # Hàng đợi tải theo thứ tự mới của bảng
 
-                table.setItem(current_row, col, new_item)
-                table.setItem(new_row, col, current_item)
-            
-            # Chọn lại hàng đã được di chuyển đến vị trí mới
-            table.selectRow(new_row)
-            self._reindex_links_data()
-            self._log_message(f"Moved link from row {current_row + 1} to {new_row + 1}.", "INFO")
+    def _download_selected_next(self):
+        # Move the selection to the top and give it a priority above everything else,
+        # so it starts next whatever the queue order policy
+        selected_rows = self._selected_rows()
+        if not selected_rows:
+            self._log_message("Please select the links to download next.", "WARNING")
+            return
+        store = self.job_model.store
+        job_ids = [store[row].job_id for row in selected_rows]
+        priority = max((job.priority for job in store), default=0) + 1
+        self.job_model.set_priority(job_ids, priority)
+        for job_id in job_ids:
+            self.queue_db.update(job_id, priority=priority)
+        self.job_model.move_rows(selected_rows, 0)
+        self._store_new_order(0, selected_rows[-1])
+        if self.worker and self.is_downloading:
+            self.worker.set_priority(job_ids, priority)
+        self._log_message(f"{len(job_ids)} links will be downloaded next.", "INFO")
+
+    def _set_selected_template(self):
+        # Naming template of the selected rows only; empty = the template of the batch
+        selected_rows = self._selected_rows()
+        if not selected_rows:
+            self._log_message("Please select the links to name.", "WARNING")
+            return
+        store = self.job_model.store
+        current = store[selected_rows[0]].template
+        template, ok = QtWidgets.QInputDialog.getText(
+            self, "File names",
+            "Path of each file below the destination folder\n"
+            "({name} {stem} {ext} {id} {folder} {job}; empty = the common template):",
+            QtWidgets.QLineEdit.EchoMode.Normal, current)
+        if not ok:
+            return
+        template = template.strip()
+        try:
+            check_template(template)
+        except ValueError as e:
+            self._log_message(str(e), "ERROR")
+            return
+        job_ids = [store[row].job_id for row in selected_rows]
+        self.job_model.set_template(job_ids, template)
+        for job_id in job_ids:
+            self.queue_db.update(job_id, template=template)
+        if self.worker and self.is_downloading:
+            self.worker.set_template(job_ids, template) # Files not named yet
+        self._log_message(f"File name template of {len(job_ids)} links: {template or 'common template'}.", "INFO")
+
+    def _apply_order_policy(self, index):
+        policy = self.ORDER_POLICIES[index]
+        self.queue_db.set_setting("policy", policy)
+        if self.worker and self.is_downloading:
+            self.worker.set_policy(policy)
 
 
     def _edit_selected_link(self):
-        selected_items = self.ui.tableWidget_ListLinkDriveGoogle.selectedItems()
-        if not selected_items or len(selected_items) > 1:
+        selected_rows = self._selected_rows()
+        if not selected_rows or len(selected_rows) > 1:
             self._log_message("Please select exactly one link to edit.", "WARNING")
             return
         
-        current_row = selected_items[0].row()
-        current_link_item = self.ui.tableWidget_ListLinkDriveGoogle.item(current_row, 0)
+        current_row = selected_rows[0]
+        old_link = self.job_model.link(current_row)
+        # QInputDialog for simple text input
+        new_link, ok = QtWidgets.QInputDialog.getText(self, "Edit Link", "Edit Google Drive Link:", 
+                                                    QtWidgets.QLineEdit.EchoMode.Normal, old_link)
         
-        if current_link_item:
-            old_link = current_link_item.text()
-            # QInputDialog for simple text input
-            new_link, ok = QtWidgets.QInputDialog.getText(self, "Edit Link", "Edit Google Drive Link:", 
-                                                        QtWidgets.QLineEdit.EchoMode.Normal, old_link)
-            
-            if ok and new_link != old_link:
-                self.ui.tableWidget_ListLinkDriveGoogle.setItem(current_row, 0, QtWidgets.QTableWidgetItem(new_link))
-                self.ui.tableWidget_ListLinkDriveGoogle.setItem(current_row, 1, QtWidgets.QTableWidgetItem("Pending")) # Reset status
-                self.ui.tableWidget_ListLinkDriveGoogle.setItem(current_row, 2, QtWidgets.QTableWidgetItem("N/A"))     # Reset ETA
-                self._reindex_links_data() # Re-index after editing
-                self._log_message(f"Edited link in row {current_row}: '{old_link}' -> '{new_link}'", "INFO")
-            elif ok:
-                self._log_message("Link not changed.", "INFO")
-            else:
-                self._log_message("Edit cancelled.", "INFO")
+        if ok and new_link != old_link:
+            filename, size = self._cached_meta(new_link)
+            job_id = self.job_model.set_link(current_row, new_link, filename, size) # Reset status
+            self.queue_db.update(job_id, link=new_link, status="Pending", filename=filename, size=size,
+                                 bytes_done=0, error=None)
+            if self.worker and self.is_downloading:
+                # Replace the queued job (if it hasn't started yet) with the edited link
+                if not self.worker.replace_job(job_id, new_link):
+                    self._log_message("The old link was already started; the edited link will be "
+                                      "downloaded next time.", "INFO")
+            self._log_message(f"Edited link in row {current_row}: '{old_link}' -> '{new_link}'", "INFO")
+        elif ok:
+            self._log_message("Link not changed.", "INFO")
+        else:
+            self._log_message("Edit cancelled.", "INFO")
 
 
     def _delete_all_links(self):
@@ -307,24 +376,94 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
                                             QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No,
                                             QtWidgets.QMessageBox.StandardButton.No)
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
-            self.ui.tableWidget_ListLinkDriveGoogle.setRowCount(0)
-            self.current_links_data = []
+            if self.worker and self.is_downloading:
+                self.worker.remove_jobs(self.job_model.ids())
+            self._queue_loader = None # Rows not shown yet are deleted along with the rest
+            self.job_model.clear()
+            self.queue_db.clear()
             self._log_message("All links deleted.", "INFO")
 
     def _log_message(self, message, level="INFO"):
-        self.ui.textEdit_Log.append(f"[{level}] {message}")
-        self.ui.textEdit_Log.verticalScrollBar().setValue(self.ui.textEdit_Log.verticalScrollBar().maximum()) # Auto-scroll
+        self._log_messages([(message, level)])
+
+    def _log_messages(self, entries):
+        # One append + one scroll for a whole batch of worker log lines
+        if not entries:
+            return
+        self.log_ring.extend(entries)
+        if self.file_log:
+            self.file_log.write(entries)
+        min_rank = self.LOG_FILTER_RANKS[self.ui.comboBox_LogLevel.currentIndex()]
+        lines = [f"[{level}] {message}" for message, level in entries if level_rank(level) >= min_rank]
+        if lines:
+            self.ui.plainTextEdit_Log.appendPlainText("\n".join(lines))
+            self.ui.plainTextEdit_Log.verticalScrollBar().setValue(self.ui.plainTextEdit_Log.verticalScrollBar().maximum()) # Auto-scroll
+
+    def _refresh_log_view(self, *_):
+        # Rebuild the view from the ring buffer (level filter changed, history loaded)
+        min_rank = self.LOG_FILTER_RANKS[self.ui.comboBox_LogLevel.currentIndex()]
+        self.ui.plainTextEdit_Log.setPlainText("\n".join(f"[{level}] {message}" for message, level in self.log_ring.filtered(min_rank)))
+        self.ui.plainTextEdit_Log.verticalScrollBar().setValue(self.ui.plainTextEdit_Log.verticalScrollBar().maximum())
+
+    def _open_file_log(self, folder, load_history=True):
+        # Rotating .hishiro_download.log in the destination folder; its tail is shown again on startup
+        if self.file_log and self.file_log.folder == folder:
+            return
+        if self.file_log:
+            self.file_log.close()
+            self.file_log = None
+        try:
+            os.makedirs(folder, exist_ok=True)
+            self.file_log = FileLog(folder)
+        except OSError:
+            return
+        if load_history:
+            self.log_ring.clear()
+            self.log_ring.extend(self.file_log.tail())
+            self._refresh_log_view()
+
+    def _apply_worker_events(self, batch):
+        # Everything the worker reported since the last tick (drivecore.EventBatch)
+        for job_id, (status, filename) in batch.statuses.items():
+            self._update_table_item_status(job_id, status, filename)
+        for job_id, size_text in batch.sizes.items():
+            self._update_table_item_size(job_id, size_text)
+        for job_id, (speed, eta) in batch.rates.items():
+            self.job_model.set_rate(job_id, speed, eta)
+        self._persist_worker_events(batch)
+        if batch.progress is not None:
+            self.ui.progressBar.setValue(batch.progress)
+        if batch.speed is not None:
+            self.ui.label_Speed.setText(f"Speed: {batch.speed}")
+        if batch.eta is not None:
+            self.ui.label_ETA.setText(f"ETA: {batch.eta}")
+        if batch.total is not None:
+            self.ui.label_Total.setText(batch.total)
+        self._log_messages(batch.logs)
+
+    def _persist_worker_events(self, batch):
+        # Only recorded here; QueueDB writes them in its own thread, one transaction per second
+        db = self.queue_db
+        for job_id, (status, filename) in batch.statuses.items():
+            db.update(job_id, status=status, filename=filename)
+        for job_id, size_text in batch.sizes.items():
+            db.update(job_id, size=size_text)
+        for job_id, done in batch.bytes.items():
+            db.update(job_id, bytes_done=done)
+        for job_id, message in batch.errors.items():
+            db.update(job_id, error=message)
+        for job_id, count in batch.attempts.items():
+            db.attempt(job_id, count)
 
     def _update_progress_bar(self, value):
         self.ui.progressBar.setValue(value)
 
-    def _update_table_item_status(self, row, status, eta_or_filename):
-        # Ensure row exists before attempting to set item
-        if 0 <= row < self.ui.tableWidget_ListLinkDriveGoogle.rowCount():
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(row, 1, QtWidgets.QTableWidgetItem(status))
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(row, 2, QtWidgets.QTableWidgetItem(eta_or_filename))
-        else:
-            self._log_message(f"Attempted to update non-existent row {row}. Link might have been deleted.", "WARNING")
+    def _update_table_item_status(self, job_id, status, filename):
+        # Updates for links deleted while downloading are simply dropped
+        self.job_model.set_status(job_id, status, filename)
+
+    def _update_table_item_size(self, job_id, size_text):
+        self.job_model.set_size(job_id, size_text)
 
 
     def _browse_save_folder(self):
@@ -336,6 +475,8 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         folder_selected = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Destination Folder", initial_dir)
         if folder_selected:
             self.ui.lineEdit_DestinationFolder.setText(folder_selected)
+            self._open_file_log(folder_selected)
+            self.queue_db.set_setting("save_path", folder_selected)
             self._log_message(f"Destination folder set to: {folder_selected}", "INFO")
 
     def _start_download(self):
@@ -343,7 +484,8 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
             self._log_message("A download is already in progress.", "WARNING")
             return
         
-        if not self.current_links_data:
+        self._finish_queue_load()
+        if not self.job_model.rowCount():
             self._log_message("No links available for download. Please add links.", "WARNING")
             return
 
@@ -351,24 +493,43 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         if not save_path:
             self._log_message("Please select a destination folder.", "ERROR")
             return
+        template = self.ui.lineEdit_Template.text().strip()
+        try:
+            check_template(template)
+        except ValueError as e:
+            self._log_message(str(e), "ERROR")
+            return
+        conflict = self.CONFLICT_POLICIES[self.ui.comboBox_Conflict.currentIndex()]
         
-        # Ensure current_links_data is up-to-date with current table state
-        self._reindex_links_data()
-        
+        # Snapshot (link, job_id) of the current queue for the worker
+        links_data = list(zip(self.job_model.links(), self.job_model.ids()))
+
         # Reset all table items to "Pending" before starting a new download run
-        for r in range(self.ui.tableWidget_ListLinkDriveGoogle.rowCount()):
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(r, 1, QtWidgets.QTableWidgetItem("Pending"))
-            self.ui.tableWidget_ListLinkDriveGoogle.setItem(r, 2, QtWidgets.QTableWidgetItem("N/A"))
+        self.job_model.reset_all(self._cached_meta)
+        for job in self.job_model.store:
+            self.queue_db.update(job.job_id, status=job.status, filename=job.filename, size=job.size, error=None)
+        self.queue_db.set_setting("save_path", save_path)
+        self.queue_db.set_setting("template", template)
+        self.queue_db.set_setting("conflict", conflict)
 
         self.is_downloading = True
         self._update_download_buttons_state()
-        self.ui.textEdit_Log.clear()
+        self._open_file_log(save_path, load_history=False)
+        self.log_ring.clear()
+        self.ui.plainTextEdit_Log.clear()
         self.ui.progressBar.setValue(0)
 
         # Create QThread and Worker
         self.download_thread = QtCore.QThread()
-        # Pass a copy of current_links_data to worker to prevent modifications while running
-        self.worker = DownloadWorker(list(self.current_links_data), save_path) 
+        # The worker reports by job id, so the table stays editable while it runs
+        self.worker = DownloadWorker(links_data, save_path,
+                                     max_workers=self.ui.spinBox_Parallel.value(),
+                                     engine=self.ENGINE_MODES[self.ui.comboBox_Engine.currentIndex()],
+                                     limiter=self.limiter, meta_cache=self.meta_cache,
+                                     policy=self.ORDER_POLICIES[self.ui.comboBox_Order.currentIndex()],
+                                     priorities=self.job_model.priorities(),
+                                     template=template or DEFAULT_TEMPLATE, templates=self.job_model.templates(),
+                                     conflict=conflict)
         self.worker.moveToThread(self.download_thread)
 
         # Connect signals and slots
@@ -378,17 +539,14 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         self.download_thread.finished.connect(self.download_thread.deleteLater)
         self.download_thread.finished.connect(self._download_finished)
 
-        self.worker.progress_update.connect(self.ui.progressBar.setValue)
-        self.worker.log_message.connect(self._log_message)
-        self.worker.update_item_status.connect(self._update_table_item_status)
-        self.worker.total_update.connect(lambda t: self.ui.label_Total.setText(t))
-        self.worker.speed_update.connect(lambda s: self.ui.label_Speed.setText(f"Speed: {s}"))
+        self.worker.events.connect(self._apply_worker_events)
         # khi bắt đầu:
-        self.ui.label_Total.setText(f"Total: 0/{len(self.current_links_data)}")
+        self.ui.label_Total.setText(f"Total: 0/{len(links_data)}")
         # Start the thread
         
         self.ui.label_Speed.setText("Speed: —")
-        self.ui.label_Total.setText(f"Total: 0/{len(self.current_links_data)}")
+        self.ui.label_ETA.setText("ETA: —")
+        self.ui.label_Total.setText(f"Total: 0/{len(links_data)}")
 
         self.download_thread.start()
         self._log_message("Download initiated.", "INFO")
@@ -403,7 +561,7 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         
     def _pause_download(self):
         if self.worker and self.is_downloading:
-            if self.worker._is_paused:
+            if self.worker.is_paused:
                 self.worker.resume()
                 self.ui.pushButton_Pause.setText("PAUSE")
             else:
@@ -425,17 +583,15 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
         self.ui.pushButton_Pause.setEnabled(self.is_downloading)
         self.ui.pushButton_Stop.setEnabled(self.is_downloading)
         
-        # Enable/disable table modification buttons and folder selection
-        can_modify_table = not self.is_downloading
-        self.ui.pushButton_Add.setEnabled(can_modify_table)
-        self.ui.pushButton_Delete.setEnabled(can_modify_table)
-        self.ui.pushButton_DeleteAll.setEnabled(can_modify_table)
-        self.ui.pushButton_Up.setEnabled(can_modify_table)
-        self.ui.pushButton_Down.setEnabled(can_modify_table)
-        self.ui.pushButton_Edit.setEnabled(can_modify_table)
-
-        self.ui.pushButton_SelectFolder.setEnabled(can_modify_table)
-        self.ui.lineEdit_DestinationFolder.setEnabled(can_modify_table)
+        # The link table stays editable while downloading (jobs are tracked by id);
+        # only the batch settings are locked
+        can_change_settings = not self.is_downloading
+        self.ui.pushButton_SelectFolder.setEnabled(can_change_settings)
+        self.ui.spinBox_Parallel.setEnabled(can_change_settings)
+        self.ui.comboBox_Engine.setEnabled(can_change_settings)
+        self.ui.lineEdit_DestinationFolder.setEnabled(can_change_settings)
+        self.ui.lineEdit_Template.setEnabled(can_change_settings)
+        self.ui.comboBox_Conflict.setEnabled(can_change_settings)
 
         # Reset pause button text if not downloading
         if not self.is_downloading:
@@ -444,6 +600,19 @@ class DriveDownloaderMainWindow(QtWidgets.QWidget):
     def _update_total_label(self, text: str):
         self.ui.label_Total.setText(text)
 
+    def closeEvent(self, event):
+        # Stop cleanly (partial files stay resumable), then write the queue out before quitting
+        if self.worker and self.is_downloading:
+            self.worker.stop()
+            if self.download_thread:
+                # quit() trực tiếp: tín hiệu finished -> quit đi qua event loop đang bị chặn ở đây
+                self.download_thread.quit()
+                self.download_thread.wait()
+        self.queue_db.close()
+        if self.file_log:
+            self.file_log.close()
+        super().closeEvent(event)
+
 
 # --- Add Link Window (now a QDialog) ---
 class AddLinkWindow(QtWidgets.QDialog): # Changed from QWidget to QDialog
@@ -460,19 +629,42 @@ class AddLinkWindow(QtWidgets.QDialog): # Changed from QWidget to QDialog
     def _connect_signals(self):
         self.ui.pushButton_OK.clicked.connect(self._emit_links_and_close)
         self.ui.pushButton_Cancel.clicked.connect(self.close)
+        self.ui.pushButton_ImportFile.clicked.connect(self._import_file)
+        self.ui.pushButton_PasteClipboard.clicked.connect(self._add_from_clipboard)
 
     def _emit_links_and_close(self):
-        links_text = self.ui.textEdit_ListLink.toPlainText()
-        if links_text.find(",") != -1:
-            links = [link.strip() for link in links_text.split(',') if link.strip()]
-        else:
-            links = [link.strip() for link in links_text.split('\n') if link.strip()]
+        # Every Drive link in the text (per line, comma separated, inside HTML...), normalized and deduplicated
+        links = extract_links(self.ui.textEdit_ListLink.toPlainText())
         
         if links:
             self.links_added.emit(links) # Emit the list of links
         
         self.accept() # Use accept() for QDialog when OK is pressed
 
+    def _import_file(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import Links", os.path.expanduser("~"),
+                                                        "Link lists (*.txt *.csv *.html *.htm);;All files (*)")
+        if not path:
+            return
+        try:
+            links = read_link_file(path) # Streamed line by line, never loaded into the text box
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Import Links", f"Could not read {path}:\n{e}")
+            return
+        self._emit_found(links)
+
+    def _add_from_clipboard(self):
+        # HTML flavour too: links copied from a web page often only exist in its href attributes
+        mime = QtWidgets.QApplication.clipboard().mimeData()
+        self._emit_found(extract_links((mime.html(), mime.text())))
+
+    def _emit_found(self, links):
+        if not links:
+            QtWidgets.QMessageBox.information(self, "Add Links", "No Google Drive links found.")
+            return
+        self.links_added.emit(links)
+        self.accept()
+
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# chạy được cả bằng "pytest" lẫn "python -m pytest" từ thư mục gốc của repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+"""The gdown subprocess fallback, run against a stub ``gdown`` module."""
+import textwrap
+
+from benchmarks.fake_drive import FakeDrive
+from drivecore import BandwidthLimiter, BatchDownloader, RetryPolicy
+
+_STUB = textwrap.dedent('''
+    import os
+    import re
+    import sys
+    if "--speed" in sys.argv:
+        speed = sys.argv[sys.argv.index("--speed") + 1]
+        if not re.fullmatch(r"[0-9]+(B|KB|MB|GB)", speed):   # như argparse của gdown
+            print("gdown: error: argument --speed: invalid parse_speed value: " + repr(speed))
+            sys.exit(2)
+    out = sys.argv[sys.argv.index("-O") + 1]
+    print("Downloading...")
+    print("From: " + sys.argv[1])
+    print("To: " + out)
+    if os.environ.get("STUB_GDOWN") == "short":
+        with open(out, "wb") as f:
+            f.write(b"x" * 10)
+        sys.exit(0)
+    if os.environ.get("STUB_GDOWN") == "full":
+        with open(out, "wb") as f:
+            f.write(b"x" * 1024)
+        sys.exit(0)
+    print("Failed to retrieve file url:")
+    print("")
+    print("\\tToo many users have viewed or downloaded this file recently. Please")
+    print("\\ttry accessing the file again later.")
+    sys.exit(1)
+''')
+
+
+def _errors(tmp_path, monkeypatch, mode="", limiter=None, failed=1):
+    stub = tmp_path / "stub" / "gdown"
+    stub.mkdir(parents=True)
+    (stub / "__init__.py").write_text("")
+    (stub / "__main__.py").write_text(_STUB)
+    monkeypatch.setenv("PYTHONPATH", str(stub.parent))
+    monkeypatch.setenv("STUB_GDOWN", mode)
+
+    logs = []
+    with FakeDrive() as drive:
+        drive.add_file("f1", "file.bin", 1024)
+        batch = BatchDownloader([("https://drive.google.com/file/d/f1/view", 1)], str(tmp_path / "out"),
+                                engine=BatchDownloader.ENGINE_SUBPROCESS, drive_url=drive.base_url,
+                                retry=RetryPolicy(max_attempts=1), limiter=limiter,
+                                on_events=lambda batch: logs.extend(batch.logs))
+        assert batch.run() == (1 - failed, 1)
+    return [message for message, level in logs if level == "ERROR"]
+
+
+def test_quota_output_is_classified(tmp_path, monkeypatch):
+    errors = _errors(tmp_path, monkeypatch)
+    assert len(errors) == 1
+    assert errors[0].startswith("❌ Quota exceeded: gdown exited with code 1")
+    assert "Too many users" in errors[0]
+
+
+def test_wrong_size_is_a_corrupt_download(tmp_path, monkeypatch):
+    errors = _errors(tmp_path, monkeypatch, "short")
+    assert errors == ["❌ Corrupt download: Size mismatch: expected 1024 bytes, got 10"]
+    assert not (tmp_path / "out" / "file.bin").exists()
+
+
+def test_per_file_limit_is_passed_with_a_unit(tmp_path, monkeypatch):
+    errors = _errors(tmp_path, monkeypatch, "full", limiter=BandwidthLimiter(per_file_rate=512 * 1024), failed=0)
+    assert errors == []
+    assert (tmp_path / "out" / "file.bin").stat().st_size == 1024
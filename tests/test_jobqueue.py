@@ -0,0 +1,85 @@
+"""Order in which JobQueue hands out jobs."""
+import pytest
+
+from drivecore.jobs import POLICY_FIFO, POLICY_ROUND_ROBIN, POLICY_SHORTEST, JobQueue, contiguous_ranges
+
+
+def _drain(q):
+    out = []
+    while True:
+        job = q.get()
+        if job is None:
+            return out
+        out.append(job)
+        q.task_done()
+
+
+def test_fifo():
+    q = JobQueue(POLICY_FIFO)
+    for key, job, size in ((1, "a", 30), (2, "b", 10), (3, "c", 20)):
+        q.put(key, job, size)
+    assert _drain(q) == ["a", "b", "c"]
+
+
+def test_shortest_first_unknown_sizes_last():
+    q = JobQueue(POLICY_SHORTEST)
+    for key, job, size in ((1, "big", 300), (2, "unknown", None), (3, "small", 10), (4, "mid", 20)):
+        q.put(key, job, size)
+    assert _drain(q) == ["small", "mid", "big", "unknown"]
+
+
+def test_round_robin_between_keys():
+    q = JobQueue(POLICY_ROUND_ROBIN)
+    for i in range(3):
+        q.put(1, f"folder{i}")     # một folder lớn xếp trước
+    q.put(2, "file")
+    q.put(3, "other")
+    assert _drain(q) == ["folder0", "file", "other", "folder1", "folder2"]
+
+
+def test_priority_beats_policy():
+    q = JobQueue(POLICY_SHORTEST)
+    q.put(1, "small", 10)
+    q.put(2, "big", 1000)
+    q.set_priority([2], 5)
+    q.put(3, "urgent-late", 500)
+    q.set_priority([3], 9)
+    q.set_priority([4], 1)         # priority của key chưa xếp hàng: áp dụng khi nó tới
+    q.put(4, "later", 2000)
+    assert _drain(q) == ["urgent-late", "big", "later", "small"]
+
+
+def test_policy_change_resorts_queued_jobs():
+    q = JobQueue(POLICY_FIFO)
+    q.put(1, "big", 100)
+    q.put(2, "small", 1)
+    q.set_policy(POLICY_SHORTEST)
+    assert _drain(q) == ["small", "big"]
+    with pytest.raises(ValueError):
+        q.set_policy("random")
+
+
+def test_reorder_follows_rows():
+    q = JobQueue(POLICY_FIFO)
+    for key in (1, 2, 3):
+        q.put(key, str(key))
+    q.reorder([3, 1])
+    q.put(4, "4")
+    assert _drain(q) == ["3", "1", "2", "4"]
+
+
+def test_put_later_waits_for_its_delay():
+    now = [0.0]
+    q = JobQueue(clock=lambda: now[0])
+    q.put_later(1, "retry", 5.0)
+    q.put(2, "ready")
+    assert q.get() == "ready"
+    q.task_done()
+    now[0] = 5.0
+    assert q.get() == "retry"
+    q.task_done()
+    assert q.get() is None
+
+
+def test_contiguous_ranges():
+    assert contiguous_ranges([5, 1, 2, 3, 7, 6]) == [(5, 7), (1, 3)]
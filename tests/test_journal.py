@@ -0,0 +1,46 @@
+"""The .part.json journal of a resumable download."""
+from drivecore.journal import PartJournal
+
+
+def test_ranges_merge_and_gaps(tmp_path):
+    journal = PartJournal(str(tmp_path / "x.part"), size=100)
+    journal.add(10, 20)
+    journal.add(40, 50)
+    journal.add(20, 30)        # nối liền đoạn trước
+    journal.add(45, 60)        # chồng lên đoạn sau
+    journal.add(5, 5)          # rỗng: bỏ qua
+    assert journal.ranges == [(10, 30), (40, 60)]
+    assert journal.completed() == 40
+    assert journal.missing() == [(0, 10), (30, 40), (60, 100)]
+
+
+def test_unknown_size_has_no_tail_gap(tmp_path):
+    journal = PartJournal(str(tmp_path / "x.part"), ranges=[(0, 10), (20, 30)])
+    assert journal.missing() == [(10, 20)]
+
+
+def test_reload(tmp_path):
+    part = str(tmp_path / "file.bin.part")
+    journal = PartJournal(part, url="https://example.com/f", file_id="abc", size=64, etag='"e1"')
+    journal.add(0, 16)
+    journal.add(32, 48)
+    journal.save()
+
+    loaded = PartJournal.load(part)
+    assert (loaded.url, loaded.file_id, loaded.size, loaded.etag) == ("https://example.com/f", "abc", 64, '"e1"')
+    assert loaded.ranges == [(0, 16), (32, 48)]
+    assert loaded.missing() == [(16, 32), (48, 64)]
+    assert loaded.matches("abc", 64, '"e1"')
+    assert loaded.matches(None, 64, None)          # không biết id/ETag: chỉ so size
+    assert not loaded.matches("abc", 65, '"e1"')
+    assert not loaded.matches("other", 64, '"e1"')
+    assert not loaded.matches("abc", 64, '"e2"')
+
+    loaded.remove()
+    assert PartJournal.load(part) is None
+
+
+def test_unreadable_journal_is_ignored(tmp_path):
+    part = tmp_path / "file.bin.part"
+    (tmp_path / "file.bin.part.json").write_text("{not json", encoding="utf-8")
+    assert PartJournal.load(str(part)) is None
@@ -0,0 +1,47 @@
+"""Finding Drive links in pasted text and files."""
+from drivecore.links import (KIND_FILE, KIND_FOLDER, extract_file_id, extract_folder_id, extract_links,
+                             link_key, read_link_file)
+
+FILE = "https://drive.google.com/file/d/{}/view"
+FOLDER = "https://drive.google.com/drive/folders/{}"
+
+
+def test_file_and_folder_links():
+    text = ("see https://drive.google.com/file/d/abc_1/view?usp=sharing and "
+            "drive.google.com/drive/folders/FOLD-2?usp=drive_link, "
+            "https://drive.google.com/uc?id=xyz3&export=download\n"
+            "https://drive.google.com/open?id=def4 https://drive.google.com/embeddedfolderview?id=fv5")
+    assert extract_links(text) == [FILE.format("abc_1"), FOLDER.format("FOLD-2"), FILE.format("xyz3"),
+                                   FILE.format("def4"), FOLDER.format("fv5")]
+
+
+def test_duplicates_are_dropped():
+    text = [
+        "https://drive.google.com/file/d/abc/view",
+        '<a href="https://drive.google.com/uc?export=download&amp;id=abc">same file</a>',
+        "https://drive.google.com/drive/folders/abc",   # cùng id nhưng là folder: link khác
+        "https://docs.google.com/file/d/abc/edit",
+    ]
+    assert extract_links(text) == [FILE.format("abc"), FOLDER.format("abc")]
+
+
+def test_seen_set_is_shared():
+    seen = {link_key(FILE.format("queued"))}
+    assert extract_links(f"{FILE.format('queued')} {FILE.format('new')}", seen) == [FILE.format("new")]
+    assert (KIND_FILE, "new") in seen
+    assert extract_links(FILE.format("new"), seen) == []
+
+
+def test_read_link_file(tmp_path):
+    path = tmp_path / "links.csv"
+    path.write_text("name,link\na,https://drive.google.com/file/d/one/view\n"
+                    "b,https://drive.google.com/drive/folders/two\nc,not a link\n", encoding="utf-8")
+    assert read_link_file(str(path)) == [FILE.format("one"), FOLDER.format("two")]
+
+
+def test_id_helpers():
+    assert extract_file_id(FILE.format("abc")) == "abc"
+    assert extract_file_id(FOLDER.format("abc")) is None
+    assert extract_folder_id(FOLDER.format("abc")) == "abc"
+    assert link_key(FOLDER.format("abc")) == (KIND_FOLDER, "abc")
+    assert link_key("https://example.com/x") == "https://example.com/x"
@@ -0,0 +1,27 @@
+"""Where files land and what happens when their names clash."""
+from benchmarks.fake_drive import FakeDrive
+from drivecore import BatchDownloader
+from drivecore.naming import CONFLICT_OVERWRITE
+
+FOLDER_LINK = "https://drive.google.com/drive/folders/top"
+
+
+def _files(root):
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*.bin"))
+
+
+def test_indexed_folder_file_is_not_overwritten(tmp_path):
+    with FakeDrive() as drive:
+        drive.add_file("f1", "same.bin", 1024)
+        drive.add_file("f2", "same.bin", 2048)
+        drive.add_folder("top", "Top", ["f1"])
+        first = BatchDownloader([(FOLDER_LINK, 1)], str(tmp_path), drive_url=drive.base_url,
+                                template="{name}", conflict=CONFLICT_OVERWRITE)
+        assert first.run() == (1, 1)
+
+        drive.add_folder("top", "Top", ["f1", "f2"])   # f1 đã có trong index, f2 trùng tên với nó
+        second = BatchDownloader([(FOLDER_LINK, 1)], str(tmp_path), drive_url=drive.base_url,
+                                 template="{name}", conflict=CONFLICT_OVERWRITE)
+        assert second.run() == (2, 2)
+    assert _files(tmp_path) == ["same (1).bin", "same.bin"]
+    assert (tmp_path / "same.bin").stat().st_size == 1024
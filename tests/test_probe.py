@@ -0,0 +1,45 @@
+"""Probing a link: every request but the landing page asks for the first byte only."""
+import pytest
+
+from benchmarks.fake_drive import FakeDrive
+from drivecore.engine import DriveEngine
+from drivecore.links import to_direct_url
+from drivecore.metacache import MetadataCache
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """(path, Range header) of every request the engine sends."""
+    requests = []
+    engine_request = DriveEngine._request
+
+    def recording_request(self, parts, path, headers):
+        requests.append((path, headers.get("Range")))
+        return engine_request(self, parts, path, headers)
+
+    monkeypatch.setattr(DriveEngine, "_request", recording_request)
+    return requests
+
+
+def _probe(tmp_path, size):
+    with FakeDrive(confirm_over=1024, checksums=True) as drive:
+        drive.add_file("f1", "file.bin", size)
+        cache = MetadataCache(str(tmp_path / "meta.json"))
+        engine = DriveEngine(meta_cache=cache, drive_hosts=("127.0.0.1",))
+        info = engine.probe(to_direct_url("https://drive.google.com/file/d/f1/view", drive.base_url))
+    assert (info["filename"], info["size"]) == ("file.bin", size)
+    return cache.get("f1"), engine.pool.stats
+
+
+def test_probe_small_file(tmp_path, sent):
+    entry, pool = _probe(tmp_path, 512)
+    assert [(path.split("?")[0], rng) for path, rng in sent] == [("/uc", None), ("/download", "bytes=0-0")]
+    assert pool["connections"] == 1                 # body đọc hết: connection quay lại pool
+    assert entry["md5"] is None                     # không lấy md5 từ một câu trả lời 206
+
+
+def test_probe_behind_warning_page(tmp_path, sent):
+    entry, pool = _probe(tmp_path, 4096)
+    assert [(path.split("?")[0], rng) for path, rng in sent] == [("/uc", None), ("/download", "bytes=0-0")]
+    assert pool["connections"] == 1
+    assert entry["md5"] is None
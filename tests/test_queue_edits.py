@@ -0,0 +1,61 @@
+"""Editing the queue of a running batch (rows removed or replaced mid-run)."""
+import threading
+import time
+
+from benchmarks.fake_drive import FakeDrive
+from drivecore import BatchDownloader, JobQueue
+
+FOLDER_LINK = "https://drive.google.com/drive/folders/top"
+
+
+def test_discarded_key_refuses_new_jobs():
+    q = JobQueue()
+    q.put(1, "a")
+    assert q.discard([1]) == 1
+    assert not q.put(1, "b")
+    assert not q.put_later(1, "c", 0)
+    q.restore([1])
+    assert q.put(1, "d")
+
+
+def test_removed_folder_stops_listing(tmp_path):
+    # một file mỗi thư mục con: mỗi lần liệt kê (chậm) chỉ thêm một file
+    with FakeDrive(latency=0.1) as drive:
+        subs = []
+        for i in range(10):
+            drive.add_file(f"f{i}", f"file{i}.bin", 1024)
+            drive.add_folder(f"sub{i}", f"Sub{i}", [f"f{i}"])
+            subs.append(f"sub{i}")
+        drive.add_folder("top", "Top", subs)
+        batch = BatchDownloader([(FOLDER_LINK, 1)], str(tmp_path), max_workers=1, drive_url=drive.base_url)
+        runner = threading.Thread(target=batch.run)
+        runner.start()
+        deadline = time.monotonic() + 30
+        while batch._folders.get(1, {}).get("listed", 0) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        batch.remove_jobs([1])
+        runner.join(60)
+        assert not runner.is_alive()
+        listed = batch._folders[1]["listed"]
+        assert listed < 10
+        assert batch.total == batch.done <= listed
+        assert len([p for p in tmp_path.rglob("*.bin")]) == batch.done
+
+
+def test_replace_queued_job(tmp_path):
+    with FakeDrive(latency=0.05) as drive:
+        links = []
+        for i in range(1, 4):
+            drive.add_file(f"f{i}", f"file{i}.bin", 1024)
+            links.append((f"https://drive.google.com/file/d/f{i}/view", i))
+        drive.add_file("new", "new.bin", 1024)
+        batch = BatchDownloader(links, str(tmp_path), max_workers=1, drive_url=drive.base_url)
+        runner = threading.Thread(target=batch.run)
+        runner.start()
+        # job 3 còn trong hàng đợi khi job 1 bắt đầu (một luồng, FIFO): đổi link được
+        while batch._started == 0:
+            time.sleep(0.01)
+        assert batch.replace_job(3, "https://drive.google.com/file/d/new/view")
+        runner.join(60)
+        assert (batch.done, batch.total) == (3, 3)
+        assert sorted(p.name for p in tmp_path.glob("*.bin")) == ["file1.bin", "file2.bin", "new.bin"]
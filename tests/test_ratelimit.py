@@ -0,0 +1,71 @@
+"""Token-bucket limiting driven by a fake clock."""
+import datetime
+
+import pytest
+
+from drivecore.ratelimit import BURST_SECONDS, BandwidthLimiter, RateSchedule, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock)
+    assert bucket.reserve(1000 * BURST_SECONDS) == 0.0     # bucket bắt đầu đầy
+    assert bucket.reserve(100) == 0.1
+
+
+def test_steady_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock)
+    bucket.reserve(1000 * BURST_SECONDS)
+    for _ in range(10):
+        clock.now += 0.1
+        assert bucket.reserve(100) == pytest.approx(0.0)   # đúng bằng lượng token nạp lại
+    assert bucket.reserve(200) == pytest.approx(0.2)
+
+
+def test_live_rate_change():
+    clock = FakeClock()
+    limiter = BandwidthLimiter(per_file_rate=1000, clock=clock)
+    bucket = limiter.file_bucket()
+    bucket.reserve(1000 * BURST_SECONDS)
+    assert limiter.reserve(100, bucket) == 0.1
+    limiter.set_per_file_rate(2000)                         # áp dụng ngay cho file đang tải, giữ phần nợ
+    assert limiter.reserve(100, bucket) == 0.1
+    limiter.set_global_rate(100)
+    assert limiter.reserve(100) == 0.5                      # limit vừa bật: bucket đầy (50 byte)
+    assert limiter.reserve(100) == 1.5
+
+
+def test_zero_rate_is_unlimited():
+    clock = FakeClock()
+    limiter = BandwidthLimiter(global_rate=0, per_file_rate=0, clock=clock)
+    bucket = limiter.file_bucket()
+    assert limiter.reserve(10 ** 9, bucket) == 0.0
+    limiter.set_global_rate(1000)
+    limiter.set_global_rate(0)
+    assert limiter.reserve(10 ** 9) == 0.0
+    assert limiter.global_rate is None and limiter.effective_rate() is None
+
+
+def test_schedule_window_past_midnight():
+    night = RateSchedule([(datetime.time(22), datetime.time(7), 500)])
+    assert night.match(datetime.datetime(2024, 1, 1, 23, 30)) == (True, 500)
+    assert night.match(datetime.datetime(2024, 1, 1, 6, 59)) == (True, 500)
+    assert night.match(datetime.datetime(2024, 1, 1, 12, 0)) == (False, None)
+
+    clock = FakeClock()
+    when = [datetime.datetime(2024, 1, 1, 12, 0)]
+    limiter = BandwidthLimiter(global_rate=None, schedule=night, clock=clock, now=lambda: when[0])
+    assert limiter.reserve(10 ** 6) == 0.0
+    when[0] = datetime.datetime(2024, 1, 1, 23, 0)
+    clock.now += 1.0                                        # lịch chỉ được xét lại sau SCHEDULE_RECHECK
+    limiter.reserve(0)
+    assert limiter.effective_rate() == 500
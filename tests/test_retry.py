@@ -0,0 +1,45 @@
+"""Sorting failures into kinds and spacing out the retries."""
+import pytest
+
+from drivecore.engine import DownloadCancelled, DownloadError
+from drivecore.retry import (ERROR_INTEGRITY, ERROR_NETWORK, ERROR_NOT_FOUND, ERROR_OTHER, ERROR_PERMISSION,
+                             ERROR_QUOTA, RetryPolicy, classify)
+
+
+@pytest.mark.parametrize("exc, kind", [
+    (DownloadError("Too many users have viewed or downloaded this file recently."), ERROR_QUOTA),
+    (DownloadError("HTTP 403: Quota exceeded", status=403), ERROR_QUOTA),   # trang quota trả về 403
+    (DownloadError("HTTP 429 for url", status=429), ERROR_QUOTA),
+    (DownloadError("HTTP 503 for url", status=503), ERROR_NETWORK),
+    (DownloadError("Connection lost", kind="network"), ERROR_NETWORK),
+    (ConnectionResetError("reset by peer"), ERROR_NETWORK),
+    (TimeoutError("timed out"), ERROR_NETWORK),
+    (RuntimeError("gdown exited with code 1: Connection aborted"), ERROR_NETWORK),
+    (DownloadError("HTTP 403: Access denied", status=403), ERROR_PERMISSION),
+    (DownloadError("HTTP 404 for url", status=404), ERROR_NOT_FOUND),
+    (RuntimeError("gdown exited with code 1: File does not exist"), ERROR_NOT_FOUND),
+    (DownloadError("Size mismatch: expected 2 bytes, got 1", kind="integrity"), ERROR_INTEGRITY),
+    (ValueError("something else"), ERROR_OTHER),
+])
+def test_classify(exc, kind):
+    assert classify(exc) == kind
+
+
+def test_cancelled_is_not_an_error():
+    assert classify(DownloadCancelled("Stopped by user")) is None
+
+
+def test_only_transient_kinds_are_retried():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(ERROR_QUOTA, 1) and policy.should_retry(ERROR_NETWORK, 2)
+    assert not policy.should_retry(ERROR_NETWORK, 3)
+    assert not policy.should_retry(ERROR_PERMISSION, 1)
+    assert not policy.should_retry(ERROR_NOT_FOUND, 1)
+
+
+def test_backoff_grows_to_its_cap():
+    low = RetryPolicy(base=2.0, cap=10.0, quota_base=60.0, quota_cap=600.0, rng=lambda: 0.0)
+    high = RetryPolicy(base=2.0, cap=10.0, quota_base=60.0, quota_cap=600.0, rng=lambda: 1.0)
+    assert [low.delay(ERROR_NETWORK, n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 5.0]
+    assert [high.delay(ERROR_NETWORK, n) for n in (1, 2, 3, 4)] == [2.0, 4.0, 8.0, 10.0]
+    assert high.delay(ERROR_QUOTA, 1) == 60.0 and high.delay(ERROR_QUOTA, 10) == 600.0
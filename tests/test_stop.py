@@ -0,0 +1,34 @@
+"""Stopping a batch leaves its unfinished files resumable, not failed."""
+import threading
+import time
+
+from benchmarks.fake_drive import FakeDrive
+from drivecore import BatchDownloader
+from drivecore.queuedb import resumed_status
+
+
+def test_stop_keeps_jobs_resumable(tmp_path):
+    statuses, logs = {}, []
+
+    def on_events(batch):
+        statuses.update(batch.statuses)
+        logs.extend(batch.logs)
+
+    with FakeDrive(bandwidth=256 * 1024) as drive:
+        drive.add_file("f1", "slow.bin", 4 * 1024 * 1024)
+        batch = BatchDownloader([("https://drive.google.com/file/d/f1/view", 1)], str(tmp_path),
+                                drive_url=drive.base_url, on_events=on_events)
+        runner = threading.Thread(target=batch.run)
+        runner.start()
+        deadline = time.monotonic() + 30
+        while not (tmp_path / "slow.bin.part").exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        batch.stop()
+        runner.join(30)
+    assert not runner.is_alive()
+    status, _ = statuses[1]
+    assert status == "Stopped"
+    assert resumed_status(status) == "Pending"
+    assert not [message for message, level in logs if level == "ERROR"]
+    assert (tmp_path / "slow.bin.part").exists()
@@ -0,0 +1,44 @@
+"""FileWriter: sync never hangs on a writer that has stopped taking buffers."""
+import io
+
+import pytest
+
+from drivecore.engine import DownloadCancelled, DriveEngine
+from drivecore.writer import FileWriter
+
+
+def test_sync_after_close_returns(tmp_path):
+    writer = FileWriter(str(tmp_path / "f.part"))
+    stream = writer.stream()
+    stream.write(b"abc")
+    stream.flush()
+    writer.close()
+    writer.sync()
+    assert (tmp_path / "f.part").read_bytes() == b"abc"
+    with pytest.raises(ValueError):
+        stream.write(b"x" * writer.chunk_size)
+
+
+def test_sync_after_writer_thread_exit_raises(tmp_path):
+    writer = FileWriter(str(tmp_path / "f.part"))
+    writer._queue.put(None)     # luồng writer thoát mà FileWriter chưa được close
+    writer._thread.join()
+    with pytest.raises(ValueError):
+        writer.sync()
+    writer.close()
+
+
+def test_fetch_range_keeps_original_error(tmp_path):
+    class Journal:
+        def add(self, start, stop):
+            pass
+
+    def checkpoint():
+        raise DownloadCancelled("Stopped")
+
+    writer = FileWriter(str(tmp_path / "f.part"))
+    writer._error = OSError("disk full")
+    src = io.BytesIO(b"data")
+    with pytest.raises(DownloadCancelled):
+        DriveEngine()._fetch_range(src, None, writer, 0, 4, None, checkpoint, Journal())
+    writer.close(raise_errors=False)
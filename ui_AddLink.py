@@ -30,7 +30,13 @@ class Ui_Form_AddLink(object):
         self.verticalLayout.addWidget(self.groupBox)
         self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_3.setObjectName("horizontalLayout_3")
-        spacerItem = QtWidgets.QSpacerItem(558, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.pushButton_ImportFile = QtWidgets.QPushButton(parent=Form_AddLink)
+        self.pushButton_ImportFile.setObjectName("pushButton_ImportFile")
+        self.horizontalLayout_3.addWidget(self.pushButton_ImportFile)
+        self.pushButton_PasteClipboard = QtWidgets.QPushButton(parent=Form_AddLink)
+        self.pushButton_PasteClipboard.setObjectName("pushButton_PasteClipboard")
+        self.horizontalLayout_3.addWidget(self.pushButton_PasteClipboard)
+        spacerItem = QtWidgets.QSpacerItem(318, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
         self.horizontalLayout_3.addItem(spacerItem)
         self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_2.setObjectName("horizontalLayout_2")
@@ -50,6 +56,8 @@ class Ui_Form_AddLink(object):
     def retranslateUi(self, Form_AddLink):
         _translate = QtCore.QCoreApplication.translate
         Form_AddLink.setWindowTitle(_translate("Form_AddLink", "Add link"))
-        self.groupBox.setTitle(_translate("Form_AddLink", "Paste Google Drive Link ( One per line ):"))
+        self.groupBox.setTitle(_translate("Form_AddLink", "Paste Google Drive links (any text, HTML or CSV):"))
+        self.pushButton_ImportFile.setText(_translate("Form_AddLink", "Import from file..."))
+        self.pushButton_PasteClipboard.setText(_translate("Form_AddLink", "Add from clipboard"))
         self.pushButton_OK.setText(_translate("Form_AddLink", "OK"))
         self.pushButton_Cancel.setText(_translate("Form_AddLink", "Cancel"))
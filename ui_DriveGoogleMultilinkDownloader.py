@@ -29,17 +29,11 @@ class Ui_Form_DriveGoogleMultilinkDownloader(object):
         self.groupBox.setObjectName("groupBox")
         self.horizontalLayout = QtWidgets.QHBoxLayout(self.groupBox)
         self.horizontalLayout.setObjectName("horizontalLayout")
-        self.tableWidget_ListLinkDriveGoogle = QtWidgets.QTableWidget(parent=self.groupBox)
-        self.tableWidget_ListLinkDriveGoogle.setObjectName("tableWidget_ListLinkDriveGoogle")
-        self.tableWidget_ListLinkDriveGoogle.setColumnCount(3)
-        self.tableWidget_ListLinkDriveGoogle.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_ListLinkDriveGoogle.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_ListLinkDriveGoogle.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget_ListLinkDriveGoogle.setHorizontalHeaderItem(2, item)
-        self.horizontalLayout.addWidget(self.tableWidget_ListLinkDriveGoogle)
+        self.tableView_ListLinkDriveGoogle = QtWidgets.QTableView(parent=self.groupBox)
+        self.tableView_ListLinkDriveGoogle.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableView_ListLinkDriveGoogle.setWordWrap(False)
+        self.tableView_ListLinkDriveGoogle.setObjectName("tableView_ListLinkDriveGoogle")
+        self.horizontalLayout.addWidget(self.tableView_ListLinkDriveGoogle)
         self.verticalLayout.addWidget(self.groupBox)
         self.groupBox_2 = QtWidgets.QGroupBox(parent=Form_DriveGoogleMultilinkDownloader)
         self.groupBox_2.setTitle("")
@@ -76,6 +70,12 @@ class Ui_Form_DriveGoogleMultilinkDownloader(object):
         self.pushButton_Down.setIconSize(QtCore.QSize(24, 24))
         self.pushButton_Down.setObjectName("pushButton_Down")
         self.horizontalLayout_2.addWidget(self.pushButton_Down)
+        self.pushButton_Next = QtWidgets.QPushButton(parent=self.groupBox_2)
+        self.pushButton_Next.setObjectName("pushButton_Next")
+        self.horizontalLayout_2.addWidget(self.pushButton_Next)
+        self.pushButton_Template = QtWidgets.QPushButton(parent=self.groupBox_2)
+        self.pushButton_Template.setObjectName("pushButton_Template")
+        self.horizontalLayout_2.addWidget(self.pushButton_Template)
         self.pushButton_Edit = QtWidgets.QPushButton(parent=self.groupBox_2)
         self.pushButton_Edit.setText("")
         icon4 = QtGui.QIcon()
@@ -121,8 +121,72 @@ class Ui_Form_DriveGoogleMultilinkDownloader(object):
         self.pushButton_SelectFolder.setIconSize(QtCore.QSize(16, 16))
         self.pushButton_SelectFolder.setObjectName("pushButton_SelectFolder")
         self.horizontalLayout_8.addWidget(self.pushButton_SelectFolder)
+        self.label_Parallel = QtWidgets.QLabel(parent=self.groupBox_4)
+        self.label_Parallel.setObjectName("label_Parallel")
+        self.horizontalLayout_8.addWidget(self.label_Parallel)
+        self.spinBox_Parallel = QtWidgets.QSpinBox(parent=self.groupBox_4)
+        self.spinBox_Parallel.setMinimum(1)
+        self.spinBox_Parallel.setMaximum(16)
+        self.spinBox_Parallel.setProperty("value", 4)
+        self.spinBox_Parallel.setObjectName("spinBox_Parallel")
+        self.horizontalLayout_8.addWidget(self.spinBox_Parallel)
+        self.comboBox_Engine = QtWidgets.QComboBox(parent=self.groupBox_4)
+        self.comboBox_Engine.setObjectName("comboBox_Engine")
+        self.comboBox_Engine.addItem("")
+        self.comboBox_Engine.addItem("")
+        self.horizontalLayout_8.addWidget(self.comboBox_Engine)
+        self.comboBox_Order = QtWidgets.QComboBox(parent=self.groupBox_4)
+        self.comboBox_Order.setObjectName("comboBox_Order")
+        self.comboBox_Order.addItem("")
+        self.comboBox_Order.addItem("")
+        self.comboBox_Order.addItem("")
+        self.horizontalLayout_8.addWidget(self.comboBox_Order)
+        self.lineEdit_Template = QtWidgets.QLineEdit(parent=self.groupBox_4)
+        self.lineEdit_Template.setObjectName("lineEdit_Template")
+        self.horizontalLayout_8.addWidget(self.lineEdit_Template)
+        self.comboBox_Conflict = QtWidgets.QComboBox(parent=self.groupBox_4)
+        self.comboBox_Conflict.setObjectName("comboBox_Conflict")
+        self.comboBox_Conflict.addItem("")
+        self.comboBox_Conflict.addItem("")
+        self.comboBox_Conflict.addItem("")
+        self.horizontalLayout_8.addWidget(self.comboBox_Conflict)
         self.horizontalLayout_9.addLayout(self.horizontalLayout_8)
         self.verticalLayout.addWidget(self.groupBox_4)
+        self.horizontalLayout_11 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_11.setObjectName("horizontalLayout_11")
+        self.label_Limit = QtWidgets.QLabel(parent=Form_DriveGoogleMultilinkDownloader)
+        self.label_Limit.setObjectName("label_Limit")
+        self.horizontalLayout_11.addWidget(self.label_Limit)
+        self.spinBox_Limit = QtWidgets.QSpinBox(parent=Form_DriveGoogleMultilinkDownloader)
+        self.spinBox_Limit.setMaximum(1000000)
+        self.spinBox_Limit.setSingleStep(100)
+        self.spinBox_Limit.setObjectName("spinBox_Limit")
+        self.horizontalLayout_11.addWidget(self.spinBox_Limit)
+        self.label_FileLimit = QtWidgets.QLabel(parent=Form_DriveGoogleMultilinkDownloader)
+        self.label_FileLimit.setObjectName("label_FileLimit")
+        self.horizontalLayout_11.addWidget(self.label_FileLimit)
+        self.spinBox_FileLimit = QtWidgets.QSpinBox(parent=Form_DriveGoogleMultilinkDownloader)
+        self.spinBox_FileLimit.setMaximum(1000000)
+        self.spinBox_FileLimit.setSingleStep(100)
+        self.spinBox_FileLimit.setObjectName("spinBox_FileLimit")
+        self.horizontalLayout_11.addWidget(self.spinBox_FileLimit)
+        self.checkBox_Schedule = QtWidgets.QCheckBox(parent=Form_DriveGoogleMultilinkDownloader)
+        self.checkBox_Schedule.setObjectName("checkBox_Schedule")
+        self.horizontalLayout_11.addWidget(self.checkBox_Schedule)
+        self.timeEdit_ScheduleStart = QtWidgets.QTimeEdit(parent=Form_DriveGoogleMultilinkDownloader)
+        self.timeEdit_ScheduleStart.setTime(QtCore.QTime(22, 0, 0))
+        self.timeEdit_ScheduleStart.setObjectName("timeEdit_ScheduleStart")
+        self.horizontalLayout_11.addWidget(self.timeEdit_ScheduleStart)
+        self.label_ScheduleTo = QtWidgets.QLabel(parent=Form_DriveGoogleMultilinkDownloader)
+        self.label_ScheduleTo.setObjectName("label_ScheduleTo")
+        self.horizontalLayout_11.addWidget(self.label_ScheduleTo)
+        self.timeEdit_ScheduleEnd = QtWidgets.QTimeEdit(parent=Form_DriveGoogleMultilinkDownloader)
+        self.timeEdit_ScheduleEnd.setTime(QtCore.QTime(7, 0, 0))
+        self.timeEdit_ScheduleEnd.setObjectName("timeEdit_ScheduleEnd")
+        self.horizontalLayout_11.addWidget(self.timeEdit_ScheduleEnd)
+        spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_11.addItem(spacerItem1)
+        self.verticalLayout.addLayout(self.horizontalLayout_11)
         self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_6.setObjectName("horizontalLayout_6")
         self.progressBar = QtWidgets.QProgressBar(parent=Form_DriveGoogleMultilinkDownloader)
@@ -139,6 +203,9 @@ class Ui_Form_DriveGoogleMultilinkDownloader(object):
         self.label_Speed = QtWidgets.QLabel(parent=Form_DriveGoogleMultilinkDownloader)
         self.label_Speed.setObjectName("label_Speed")
         self.horizontalLayout_6.addWidget(self.label_Speed)
+        self.label_ETA = QtWidgets.QLabel(parent=Form_DriveGoogleMultilinkDownloader)
+        self.label_ETA.setObjectName("label_ETA")
+        self.horizontalLayout_6.addWidget(self.label_ETA)
         self.label_Total = QtWidgets.QLabel(parent=Form_DriveGoogleMultilinkDownloader)
         self.label_Total.setObjectName("label_Total")
         self.horizontalLayout_6.addWidget(self.label_Total)
@@ -154,14 +221,26 @@ class Ui_Form_DriveGoogleMultilinkDownloader(object):
         self.horizontalLayout_7.setObjectName("horizontalLayout_7")
         self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_5.setObjectName("horizontalLayout_5")
-        self.textEdit_Log = QtWidgets.QTextEdit(parent=self.groupBox_3)
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.comboBox_LogLevel = QtWidgets.QComboBox(parent=self.groupBox_3)
+        self.comboBox_LogLevel.setObjectName("comboBox_LogLevel")
+        self.comboBox_LogLevel.addItem("")
+        self.comboBox_LogLevel.addItem("")
+        self.comboBox_LogLevel.addItem("")
+        self.verticalLayout_2.addWidget(self.comboBox_LogLevel)
+        self.plainTextEdit_Log = QtWidgets.QPlainTextEdit(parent=self.groupBox_3)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Maximum)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.textEdit_Log.sizePolicy().hasHeightForWidth())
-        self.textEdit_Log.setSizePolicy(sizePolicy)
-        self.textEdit_Log.setObjectName("textEdit_Log")
-        self.horizontalLayout_5.addWidget(self.textEdit_Log)
+        sizePolicy.setHeightForWidth(self.plainTextEdit_Log.sizePolicy().hasHeightForWidth())
+        self.plainTextEdit_Log.setSizePolicy(sizePolicy)
+        self.plainTextEdit_Log.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        self.plainTextEdit_Log.setReadOnly(True)
+        self.plainTextEdit_Log.setMaximumBlockCount(5000)
+        self.plainTextEdit_Log.setObjectName("plainTextEdit_Log")
+        self.verticalLayout_2.addWidget(self.plainTextEdit_Log)
+        self.horizontalLayout_5.addLayout(self.verticalLayout_2)
         self.splitter = QtWidgets.QSplitter(parent=self.groupBox_3)
         self.splitter.setOrientation(QtCore.Qt.Orientation.Vertical)
         self.splitter.setObjectName("splitter")
@@ -205,16 +284,37 @@ class Ui_Form_DriveGoogleMultilinkDownloader(object):
         _translate = QtCore.QCoreApplication.translate
         Form_DriveGoogleMultilinkDownloader.setWindowTitle(_translate("Form_DriveGoogleMultilinkDownloader", "Drive Google Multilink Downloader"))
         self.groupBox.setTitle(_translate("Form_DriveGoogleMultilinkDownloader", "Link Drive Google"))
-        item = self.tableWidget_ListLinkDriveGoogle.horizontalHeaderItem(0)
-        item.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Link"))
-        item = self.tableWidget_ListLinkDriveGoogle.horizontalHeaderItem(1)
-        item.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Status"))
-        item = self.tableWidget_ListLinkDriveGoogle.horizontalHeaderItem(2)
-        item.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Filename"))
+        self.pushButton_Next.setToolTip(_translate("Form_DriveGoogleMultilinkDownloader", "Download the selected links next"))
+        self.pushButton_Next.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Next"))
+        self.pushButton_Template.setToolTip(_translate("Form_DriveGoogleMultilinkDownloader", "File name template of the selected links"))
+        self.pushButton_Template.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Name"))
         self.groupBox_4.setTitle(_translate("Form_DriveGoogleMultilinkDownloader", "Destination folder:"))
+        self.label_Parallel.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Parallel:"))
+        self.comboBox_Engine.setItemText(0, _translate("Form_DriveGoogleMultilinkDownloader", "Built-in"))
+        self.comboBox_Engine.setItemText(1, _translate("Form_DriveGoogleMultilinkDownloader", "gdown (subprocess)"))
+        self.comboBox_Order.setItemText(0, _translate("Form_DriveGoogleMultilinkDownloader", "Queue order"))
+        self.comboBox_Order.setItemText(1, _translate("Form_DriveGoogleMultilinkDownloader", "Smallest first"))
+        self.comboBox_Order.setItemText(2, _translate("Form_DriveGoogleMultilinkDownloader", "One per link in turn"))
+        self.lineEdit_Template.setToolTip(_translate("Form_DriveGoogleMultilinkDownloader", "Path of each file below the destination folder: {name} {stem} {ext} {id} {folder} {job}"))
+        self.comboBox_Conflict.setToolTip(_translate("Form_DriveGoogleMultilinkDownloader", "When a file with the same name is already in the destination folder"))
+        self.comboBox_Conflict.setItemText(0, _translate("Form_DriveGoogleMultilinkDownloader", "Rename (1), (2)..."))
+        self.comboBox_Conflict.setItemText(1, _translate("Form_DriveGoogleMultilinkDownloader", "Overwrite"))
+        self.comboBox_Conflict.setItemText(2, _translate("Form_DriveGoogleMultilinkDownloader", "Skip"))
+        self.label_Limit.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Limit (KB/s):"))
+        self.spinBox_Limit.setSpecialValueText(_translate("Form_DriveGoogleMultilinkDownloader", "Unlimited"))
+        self.label_FileLimit.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Per file (KB/s):"))
+        self.spinBox_FileLimit.setSpecialValueText(_translate("Form_DriveGoogleMultilinkDownloader", "Unlimited"))
+        self.checkBox_Schedule.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Unlimited from"))
+        self.timeEdit_ScheduleStart.setDisplayFormat(_translate("Form_DriveGoogleMultilinkDownloader", "HH:mm"))
+        self.label_ScheduleTo.setText(_translate("Form_DriveGoogleMultilinkDownloader", "to"))
+        self.timeEdit_ScheduleEnd.setDisplayFormat(_translate("Form_DriveGoogleMultilinkDownloader", "HH:mm"))
         self.label_Speed.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Speed: —"))
+        self.label_ETA.setText(_translate("Form_DriveGoogleMultilinkDownloader", "ETA: —"))
         self.label_Total.setText(_translate("Form_DriveGoogleMultilinkDownloader", "Total:10/10"))
         self.groupBox_3.setTitle(_translate("Form_DriveGoogleMultilinkDownloader", "Log:"))
+        self.comboBox_LogLevel.setItemText(0, _translate("Form_DriveGoogleMultilinkDownloader", "All messages"))
+        self.comboBox_LogLevel.setItemText(1, _translate("Form_DriveGoogleMultilinkDownloader", "Warnings and errors"))
+        self.comboBox_LogLevel.setItemText(2, _translate("Form_DriveGoogleMultilinkDownloader", "Errors only"))
         self.pushButton_Download.setText(_translate("Form_DriveGoogleMultilinkDownloader", "DOWNLOAD"))
         self.pushButton_Pause.setText(_translate("Form_DriveGoogleMultilinkDownloader", "PAUSE"))
         self.pushButton_Stop.setText(_translate("Form_DriveGoogleMultilinkDownloader", "STOP"))